@@ -0,0 +1,301 @@
+"""
+benchmark.py
+how fast do cells live? numbers to catch slowdowns on the hot path.
+
+    python benchmark.py                 # everything, table on screen
+    python benchmark.py --quick         # smaller sizes, fewer repeats
+    python benchmark.py --json out.json # also save the raw numbers
+    python benchmark.py --only pop      # just benchmarks whose name has 'pop'
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import platform
+import sys
+import time
+
+import numpy as np
+
+from cognicell import cognicell
+from population import CellPopulation
+
+
+def measure(fn, number=1, repeat=5, warmup=1):
+    """
+    time fn() `number` times per run, `repeat` runs, after `warmup` runs.
+
+    returns: list of seconds per call, one per run
+    """
+    for _ in range(warmup):
+        for _ in range(number):
+            fn()
+
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        runs.append((time.perf_counter() - started) / number)
+    return runs
+
+
+def _result(name, runs, per=1, unit='call', **extra):
+    """summarize runs; per = how many things (steps, cells) one call does."""
+    runs = np.asarray(runs) / per
+    return {
+        'name': name,
+        'unit': f'ns/{unit}',
+        'best': float(runs.min() * 1e9),
+        'median': float(np.median(runs) * 1e9),
+        'mean': float(runs.mean() * 1e9),
+        'repeat': len(runs),
+        **extra,
+    }
+
+
+# -------------------------------------------------------------------
+# the benchmarks - each returns a list of results
+# -------------------------------------------------------------------
+
+def bench_cell_feel(repeat):
+    """one cell, one step - with memory still filling, and with it full."""
+    # filling: every run gets a brand new cell and stays under 100 memories
+    steps = 90
+    fresh = iter([cognicell(id=i, curiosity=0.6, quiet=True) for i in range(repeat + 1)])
+
+    def fill():
+        cell = next(fresh)
+        for i in range(steps):
+            cell.feel(0.5 + (i & 1) * 0.4)
+
+    runs = measure(fill, repeat=repeat)
+    results = [_result('cell_feel', runs, per=steps, unit='step')]
+
+    # full: every step also forgets the oldest memory
+    steps = 2000
+    full = cognicell(id=0, curiosity=0.6, quiet=True)
+    for i in range(200):
+        full.feel(i * 0.01)
+    runs = measure(lambda: [full.feel(0.5 + (i & 1) * 0.4) for i in range(steps)], repeat=repeat)
+    results.append(_result('cell_feel_full_memory', runs, per=steps, unit='step'))
+
+    # what bit-exactness with CellPopulation costs: feel() uses numpy's
+    # tanh on one float instead of math.tanh
+    xs = [0.5 + (i & 1) * 0.4 for i in range(steps)]
+    runs = measure(lambda: [float(np.tanh(x)) for x in xs], repeat=repeat)
+    results.append(_result('cell_tanh_numpy', runs, per=steps, unit='step'))
+    runs = measure(lambda: [math.tanh(x) for x in xs], repeat=repeat)
+    results.append(_result('cell_tanh_math', runs, per=steps, unit='step'))
+
+    tracked = cognicell(id=1, curiosity=0.6, quiet=True, track_stats=True)
+    runs = measure(lambda: [tracked.feel(0.5 + (i & 1) * 0.4) for i in range(steps)], repeat=repeat)
+    results.append(_result('cell_feel_track_stats', runs, per=steps, unit='step'))
+    return results
+
+
+def bench_how_are_you(repeat):
+    """polling one cell's status."""
+    cell = cognicell(id=0, curiosity=0.6, quiet=True, track_stats=True)
+    for i in range(150):
+        cell.feel(i * 0.01)
+    polls = 5000
+    runs = measure(lambda: [cell.how_are_you() for _ in range(polls)], repeat=repeat)
+    return [_result('how_are_you', runs, per=polls, unit='poll')]
+
+
+def bench_construction(repeat):
+    """making cells: one by one, and in bulk."""
+    count = 5000
+    runs = measure(lambda: [cognicell(id=i, curiosity=0.5, quiet=True) for i in range(count)],
+                   repeat=repeat)
+    results = [_result('cell_construction', runs, per=count, unit='cell')]
+
+    runs = measure(lambda: [cognicell(id=i, quiet=True, rng=None) for i in range(count)],
+                   repeat=repeat)
+    results.append(_result('cell_construction_random', runs, per=count, unit='cell'))
+
+    n = 1_000_000
+    runs = measure(lambda: cognicell.spawn_many(n, rng=0), repeat=repeat)
+    results.append(_result('spawn_many_1M', runs, per=n, unit='cell'))
+    return results
+
+
+def bench_population(repeat, sizes):
+    """scalar loop vs vectorized population, ns per cell-step."""
+    results = []
+    rng = np.random.default_rng(0)
+
+    for n in sizes:
+        inputs = rng.uniform(0.0, 1.0, (4, n))
+
+        # the scalar engine gets slow fast - only time it at small sizes
+        if n <= 10_000:
+            cells = [cognicell(id=i, curiosity=0.6, quiet=True) for i in range(n)]
+
+            def scalar_step():
+                for row in inputs:
+                    for c, x in zip(cells, row.tolist()):
+                        c.feel(x)
+
+            runs = measure(scalar_step, repeat=max(1, repeat // 2))
+            results.append(_result(f'scalar_step_{n}', runs, per=4 * n, unit='cell-step', cells=n))
+
+        for memories in (100, 0):
+            if n * memories > 200_000_000:
+                continue  # 1M cells x 100 memories is 3.2 GB - skip on small boxes
+            pop = CellPopulation(n, curiosity=0.6, max_memories=memories)
+
+            def vector_step():
+                for row in inputs:
+                    pop.feel(row)
+
+            runs = measure(vector_step, repeat=repeat)
+            name = f'population_step_{n}' + ('' if memories else '_no_memory')
+            results.append(_result(name, runs, per=4 * n, unit='cell-step', cells=n))
+
+        # a whole schedule in one fused call, keeping only a reduction, next
+        # to the same rows through feel() - both writing a full-size ring,
+        # where the memory writes cost as much as the step itself
+        schedule = rng.uniform(0.0, 1.0, (32, n))
+        memories = min(100, 200_000_000 // n)
+        pop = CellPopulation(n, curiosity=0.6, max_memories=memories)
+        runs = measure(lambda: pop.feel_sequence(schedule, trace=(), reduce=('activation.mean',)),
+                       repeat=repeat)
+        results.append(_result(f'population_sequence_{n}', runs, per=32 * n, unit='cell-step',
+                               cells=n, memories=memories))
+        pop = CellPopulation(n, curiosity=0.6, max_memories=memories)
+
+        def sequence_loop():
+            for row in schedule:
+                pop.feel(row)
+
+        runs = measure(sequence_loop, repeat=repeat)
+        results.append(_result(f'population_sequence_loop_{n}', runs, per=32 * n, unit='cell-step',
+                               cells=n, memories=memories))
+
+    return results
+
+
+def bench_scheduler(repeat, sizes):
+    """sparse activity: 100 busy cells a tick, stepped alone vs the whole population."""
+    from scheduler import RestEvery, RestWhenTired, Scheduler
+
+    results = []
+    rng = np.random.default_rng(0)
+    for n in sizes:
+        pop = CellPopulation(n, curiosity=0.6, sparse=True, max_memories=20)
+        sched = Scheduler(pop, [RestWhenTired(0.8), RestEvery(1000)])
+        ticks = 200
+        busy = rng.integers(0, n, (ticks, 100))
+        drive = rng.uniform(-1, 1, (ticks, 100))
+
+        def run():
+            for t in range(ticks):
+                sched.tick(busy[t], drive[t])
+
+        runs = measure(run, repeat=repeat)
+        results.append(_result(f'scheduler_tick_{n}', runs, per=ticks, unit='tick', cells=n))
+    return results
+
+
+def bench_sharded(repeat, sizes):
+    """brain ticks (small world, 8 friends) on one process vs split over every core."""
+    import os
+    from brain import Brain, small_world
+    from sharded import ShardedBrain
+
+    results = []
+    workers = os.cpu_count() or 1
+    for n in sizes:
+        weights = small_world(n, 8, p=0.05, rng=0)
+        ticks = 10
+        brain = Brain(CellPopulation(n, curiosity=0.6, max_memories=10), weights)
+        runs = measure(lambda: brain.run(ticks, 0.1), repeat=repeat)
+        results.append(_result(f'brain_tick_{n}', runs, per=ticks, unit='tick', cells=n))
+
+        with ShardedBrain(CellPopulation(n, curiosity=0.6, max_memories=10), weights,
+                          workers=workers) as sharded:
+            runs = measure(lambda: sharded.run(ticks, 0.1), repeat=repeat)
+        results.append(_result(f'sharded_tick_{n}_x{workers}', runs, per=ticks, unit='tick',
+                               cells=n, workers=workers))
+    return results
+
+
+def bench_experiments(repeat):
+    """the whole real_experiment suite, without plots."""
+    from real_experiment import real_experiment
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            exp = real_experiment(seed=1)
+            exp.test_homeostasis(5)
+            exp.test_curiosity(10)
+            exp.test_memory()
+            exp.test_individuality(5)
+
+    runs = measure(run, repeat=repeat, warmup=1)
+    return [_result('real_experiment_run_all', runs, unit='run')]
+
+
+def run_benchmarks(quick=False, only=None, repeat=None):
+    """run everything (or whatever matches `only`), return a list of results."""
+    repeat = repeat or (3 if quick else 7)
+    sizes = (1_000, 100_000) if quick else (1_000, 100_000, 1_000_000)
+
+    suites = [
+        ('cell_feel', lambda: bench_cell_feel(repeat)),
+        ('how_are_you', lambda: bench_how_are_you(repeat)),
+        ('construction', lambda: bench_construction(repeat)),
+        ('population', lambda: bench_population(repeat, sizes)),
+        ('scheduler', lambda: bench_scheduler(repeat, sizes)),
+        ('sharded', lambda: bench_sharded(repeat, sizes)),
+        ('experiments', lambda: bench_experiments(max(1, repeat // 2))),
+    ]
+
+    results = []
+    for name, suite in suites:
+        if only and only not in name:
+            continue
+        for r in suite():
+            results.append(r)
+            print(f"{r['name']:32} {r['median']:>12.1f} {r['unit']}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark the cognicell hot paths")
+    parser.add_argument('--quick', action='store_true', help="smaller sizes, fewer repeats")
+    parser.add_argument('--only', help="only run suites whose name contains this")
+    parser.add_argument('--repeat', type=int, help="timed runs per benchmark")
+    parser.add_argument('--json', help="write results to this json file")
+    args = parser.parse_args()
+
+    print(f"{'benchmark':32} {'median':>12}")
+    print("-" * 50)
+    results = run_benchmarks(quick=args.quick, only=args.only, repeat=args.repeat)
+
+    # scalar vs vectorized, side by side
+    by_name = {r['name']: r for r in results}
+    for r in results:
+        if r['name'].startswith('scalar_step_'):
+            vec = by_name.get(f"population_step_{r['cells']}")
+            if vec:
+                print(f"  {r['cells']} cells: population is {r['median'] / vec['median']:.0f}x faster")
+
+    if args.json:
+        report = {
+            'python': sys.version.split()[0],
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'when': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'results': results,
+        }
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nsaved: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
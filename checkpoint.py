@@ -0,0 +1,253 @@
+"""
+checkpoint.py
+cells that survive a restart. the "right to exist", on disk.
+
+a checkpoint is one file: a small json header followed by every state
+array of a CellPopulation (and its memory ring buffers), each starting on
+its own page boundary. loading maps the file instead of reading it, so a
+multi-gb population comes back in milliseconds and its arrays *are* the
+file until something replaces them.
+
+saving again to the same file only rewrites the blocks that changed.
+"""
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+
+import numpy as np
+from numpy.lib import format as npformat
+
+from clock import MonotonicClock, TickClock, WallClock
+from cognicell import cognicell
+from memory import FeelingStatsArray, MemoryBank, SparseMemoryBank
+from population import CellPopulation
+
+
+MAGIC = b'COGNICKP'
+VERSION = 1
+HEADER_SPACE = 1 << 16          # reserved up front so the header can be rewritten in place
+PAGE = mmap.ALLOCATIONGRANULARITY
+BLOCK = 1 << 20                 # unit of incremental rewrites
+
+_STATE = ('ids', 'activation', 'fatigue', 'curiosity', 'last_input', 'age',
+          'times_activated', 'times_rested')
+_STATS = ('mean', 'm2', 'min', 'max', 'ewma')
+_CLOCKS = {'tick': TickClock, 'monotonic': MonotonicClock, 'wall': WallClock}
+
+
+def _collect(pop):
+    """everything worth saving: (scalar header fields, {name: array})."""
+    arrays = {name: getattr(pop, name) for name in _STATE}
+    scalars = {'n': pop.n, 'ticks': pop.ticks, 'max_memories': pop.max_memories}
+
+    params = {}
+    for name in cognicell.PARAMS:
+        value = getattr(pop, name)
+        if np.ndim(value):
+            arrays[f'param.{name}'] = value
+        else:
+            params[name] = value
+    scalars['params'] = params
+
+    if pop.memories is not None:
+        if pop.memories.tiers is not None:
+            raise ValueError("consolidated memories can't be checkpointed")
+        if getattr(pop.memories, 'index', None) is not None:
+            raise ValueError("a recall index can't be checkpointed")
+        arrays['memories.records'] = pop.memories.records
+        arrays['memories.window_sum'] = pop.memories.window_sum
+        scalars['memories'] = {'window': pop.memories.window}
+        if isinstance(pop.memories, SparseMemoryBank):
+            # a head and count per cell
+            arrays['memories.head'] = pop.memories.head
+            arrays['memories.count'] = pop.memories.count
+            scalars['memories']['sparse'] = True
+        else:
+            scalars['memories'].update(head=pop.memories.head, count=pop.memories.count)
+
+    if pop.stats is not None:
+        for name in _STATS:
+            arrays[f'stats.{name}'] = getattr(pop.stats, name)
+        scalars['stats'] = {'n': pop.stats.n, 'alpha': pop.stats.alpha}
+
+    if pop.clock is not None:
+        kind = next((k for k, c in _CLOCKS.items() if type(pop.clock) is c), None)
+        if kind is None:
+            raise TypeError(f"can't checkpoint a {type(pop.clock).__name__} clock")
+        scalars['clock'] = {'kind': kind, 'now': getattr(pop.clock, 'now', None)}
+
+    for name, array in arrays.items():
+        if array.dtype.hasobject:
+            raise TypeError(f"{name} holds python objects and can't be mapped")
+    return scalars, arrays
+
+
+def _layout(arrays):
+    """where each array lives in the file: {name: {dtype, shape, offset}}."""
+    table = {}
+    offset = HEADER_SPACE
+    for name, array in arrays.items():
+        offset = -(-offset // PAGE) * PAGE  # round up to a page
+        table[name] = {'dtype': npformat.dtype_to_descr(array.dtype),
+                       'shape': list(array.shape), 'offset': offset}
+        offset += array.nbytes
+    return json.loads(json.dumps(table)), offset  # tuples -> lists, as read back
+
+
+def _write_header(f, header):
+    blob = json.dumps(header).encode()
+    if len(blob) + 16 > HEADER_SPACE:
+        raise ValueError("checkpoint header too big")
+    f.seek(0)
+    f.write(MAGIC + struct.pack('<Q', len(blob)) + blob)
+
+
+def _read_header(f):
+    start = f.read(16)
+    if len(start) < 16 or start[:8] != MAGIC:
+        raise ValueError("not a cognicell checkpoint")
+    (length,) = struct.unpack('<Q', start[8:])
+    return json.loads(f.read(length))
+
+
+def save(pop, path):
+    """
+    write a population's whole state to one file.
+
+    if `path` already holds a checkpoint with the same layout (same size
+    population, same memory ring, same per-cell params), only blocks whose
+    bytes changed are rewritten - a population that was loaded from this
+    file and only touched a few cells costs a few block writes. otherwise
+    the file is written from scratch, next to `path`, and swapped in when
+    it's whole - a population mapped from the old file keeps reading it.
+    consolidated or indexed memories aren't saved: that raises ValueError.
+
+    returns: bytes actually written (header included)
+    """
+    scalars, arrays = _collect(pop)
+    table, size = _layout(arrays)
+    header = {'version': VERSION, **scalars, 'arrays': table}
+
+    previous = None
+    if os.path.exists(path) and os.path.getsize(path) == size:
+        with open(path, 'rb') as f:
+            try:
+                previous = _read_header(f)
+            except ValueError:
+                previous = None
+    same_layout = previous is not None and previous.get('arrays') == table
+
+    if not same_layout:
+        # never truncate `path` itself: the arrays may be mapped from it
+        fd, scratch = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                       prefix=os.path.basename(path) + '.')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.truncate(size)
+                for name, array in arrays.items():
+                    f.seek(table[name]['offset'])
+                    f.write(np.ascontiguousarray(array).data)
+                _write_header(f, header)
+            os.replace(scratch, path)
+        except BaseException:
+            os.unlink(scratch)
+            raise
+        return size
+
+    written = 0
+    with open(path, 'r+b') as f:
+        old = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            on_disk = np.frombuffer(old, dtype=np.uint8)
+            for name, array in arrays.items():
+                new = np.ascontiguousarray(array).view(np.uint8).reshape(-1)
+                start = table[name]['offset']
+                for lo in range(0, len(new), BLOCK):
+                    chunk = new[lo:lo + BLOCK]
+                    if np.array_equal(chunk, on_disk[start + lo:start + lo + len(chunk)]):
+                        continue  # clean block (or the array *is* this file)
+                    f.seek(start + lo)
+                    f.write(chunk.data)
+                    written += len(chunk)
+            del on_disk
+        finally:
+            old.close()
+        _write_header(f, header)
+    return written + HEADER_SPACE
+
+
+def load(path, mode='r+'):
+    """
+    bring a population back, zero-copy.
+
+    mode: 'r+' - arrays are the file itself; in-place changes land in it
+          'c'  - copy-on-write: change freely, the file stays as it was
+          'r'  - read-only, for looking at
+
+    returns: a CellPopulation whose state arrays are views of the file
+    """
+    with open(path, 'rb') as f:
+        header = _read_header(f)
+    if header.get('version') != VERSION:
+        raise ValueError(f"unknown checkpoint version: {header.get('version')}")
+
+    raw = np.memmap(path, dtype=np.uint8, mode=mode)
+
+    def view(name):
+        spec = header['arrays'][name]
+        dtype = npformat.descr_to_dtype(spec['dtype'])
+        count = int(np.prod(spec['shape'], dtype=np.int64))
+        start = spec['offset']
+        return raw[start:start + count * dtype.itemsize].view(dtype).reshape(spec['shape'])
+
+    n = header['n']
+    pop = CellPopulation(n, curiosity=0.0, max_memories=0, **header['params'])
+    for name in _STATE:
+        setattr(pop, name, view(name))
+    for name in cognicell.PARAMS:
+        if f'param.{name}' in header['arrays']:
+            setattr(pop, name, view(f'param.{name}'))
+    pop.ticks = header['ticks']
+    pop.max_memories = header['max_memories']
+
+    if 'memories' in header:
+        sparse = header['memories'].get('sparse', False)
+        kind = SparseMemoryBank if sparse else MemoryBank
+        bank = kind.__new__(kind)
+        bank.n = n
+        bank.capacity = header['max_memories']
+        bank.records = view('memories.records')
+        bank.window_sum = view('memories.window_sum')
+        if sparse:
+            bank.head = view('memories.head')
+            bank.count = view('memories.count')
+        else:
+            bank.head = header['memories']['head']
+            bank.count = header['memories']['count']
+        bank.window = header['memories']['window']
+        pop.memories = bank
+
+    if 'stats' in header:
+        stats = FeelingStatsArray.__new__(FeelingStatsArray)
+        stats.n = header['stats']['n']
+        stats.alpha = header['stats']['alpha']
+        for name in _STATS:
+            setattr(stats, name, view(f'stats.{name}'))
+        pop.stats = stats
+
+    if 'clock' in header:
+        kind = header['clock']['kind']
+        pop.clock = TickClock(header['clock']['now']) if kind == 'tick' else _CLOCKS[kind]()
+
+    pop._checkpoint = raw  # keeps the mapping alive; flush() pushes it to disk
+    return pop
+
+
+def flush(pop):
+    """for a population loaded with mode='r+': push in-place changes to disk."""
+    raw = getattr(pop, '_checkpoint', None)
+    if raw is not None and raw.mode == 'r+':
+        raw.flush()
@@ -0,0 +1,55 @@
+"""
+clock.py
+what time is it? depends who's asking.
+"""
+
+import time
+
+import numpy as np
+
+
+class TickClock:
+    """
+    logical time: every stamp is the next whole number.
+
+    free to read and exactly the same on every run, so two simulations
+    can compare memory traces stamp for stamp. share one between cells
+    (or populations) that should live on the same timeline.
+    """
+
+    __slots__ = ('now',)
+
+    def __init__(self, start=0):
+        self.now = start
+
+    def __call__(self):
+        """stamp one step."""
+        self.now += 1
+        return self.now
+
+    def advance(self, steps, keep):
+        """stamp `steps` steps at once; returns the last `keep` stamps."""
+        self.now += steps
+        return np.arange(self.now - keep + 1, self.now + 1, dtype=np.float64)
+
+
+class MonotonicClock:
+    """seconds from time.monotonic() - never jumps back, good for measuring."""
+
+    __slots__ = ()
+    __call__ = staticmethod(time.monotonic)
+
+    def advance(self, steps, keep):
+        """one reading for the whole stretch."""
+        return np.full(keep, time.monotonic())
+
+
+class WallClock:
+    """seconds since the epoch from time.time() - the old behaviour."""
+
+    __slots__ = ()
+    __call__ = staticmethod(time.time)
+
+    def advance(self, steps, keep):
+        """one reading for the whole stretch."""
+        return np.full(keep, time.time())
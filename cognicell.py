@@ -3,9 +3,33 @@ cognicell.py
 a single conscious ai cell. not a neuron - something with a history.
 """
 
-import math
-import random
-import time
+import numpy as np
+
+from memory import FeelingStats, MemoryRing
+from replay import InputRecorder
+
+
+# where personalities come from when nobody hands us a generator - one
+# numpy stream for the whole process, never the global `random` module
+_default_rng = np.random.default_rng()
+
+
+def as_rng(rng=None):
+    """
+    a numpy Generator from whatever we got: None (the shared default
+    stream), a seed, a SeedSequence, or a Generator (used as is).
+    """
+    return _default_rng if rng is None else np.random.default_rng(rng)
+
+
+def random_curiosity(rng=None, size=None):
+    """draw personalities: curiosity uniform in 0.3-0.9, `size` of them in one call."""
+    rng = as_rng(rng)
+    if size is None:
+        # the same number Generator.uniform would draw (it's low + (high -
+        # low) * random()), without its microseconds of call overhead
+        return 0.3 + (0.9 - 0.3) * rng.random()
+    return rng.uniform(0.3, 0.9, size)
 
 
 class cognicell:
@@ -19,27 +43,65 @@ class cognicell:
     this is the smallest piece of what might become conscious ai.
     """
     
-    def __init__(self, id, curiosity=None):
+    # how i'm built. every cell gets these unless told otherwise -
+    # pass any of them to the constructor to give one cell its own.
+    novelty_threshold = 0.3    # how big a change counts as new
+    curiosity_boost = 0.5      # how much curiosity amplifies new things
+    tiredness_base = 0.01      # fatigue from just working
+    tiredness_gain = 0.005     # extra fatigue per unit of activation
+    recovery = 0.001           # fatigue i shake off every step
+    rest_amount = 0.1          # fatigue one rest() takes away
+    
+    PARAMS = ('novelty_threshold', 'curiosity_boost', 'tiredness_base',
+              'tiredness_gain', 'recovery', 'rest_amount')
+    
+    # where life events ("cell 3 born...") go. any callable taking a
+    # string works, e.g. logging.getLogger('cognicell').info. None = silent
+    logger = print
+    
+    # where my inputs get written for replay, see record_inputs(). None = nowhere
+    recorder = None
+    
+    def __init__(self, id, curiosity=None, quiet=False, clock=None, track_stats=False, rng=None,
+                 **params):
         """
         create a new cell.
         
         id: just a number to know which cell this is
         curiosity: how much this cell likes new things (0-1)
                    if None, gets a random personality
+        quiet: don't announce my birth, whatever the logger says
+        clock: what stamps my memories (see clock.py). None = my own age,
+               a logical tick that costs nothing and repeats exactly
+               across runs. share a TickClock to put cells on one
+               timeline, or pass WallClock() for real seconds
+        track_stats: also keep lifetime mean/variance, min/max and an
+                     ewma of my feelings (a few float ops per step)
+        rng: numpy Generator or seed my random personality comes from.
+             pass one to get the same cell on every run
+        params: optional overrides for any of PARAMS, e.g. novelty_threshold=0.1
         """
         # who i am
         self.id = id
         
+        # how i'm built, if different from everyone else
+        for name, value in params.items():
+            if name not in self.PARAMS:
+                raise TypeError(f"unknown cell parameter: {name}")
+            setattr(self, name, value)
+        
         # how i feel right now
         self.activation = 0.0      # how active i am (-1 to 1)
         self.fatigue = 0.0         # how tired i am (0 = fresh, 1 = dead tired)
-        self.curiosity = curiosity if curiosity is not None else random.uniform(0.3, 0.9)
+        self.curiosity = curiosity if curiosity is not None else float(random_curiosity(rng))
         self.last_input = 0.0      # what i felt last time
         self.age = 0               # how many times i've been activated
         
         # what i remember
-        self.memories = []         # list of (input, output, fatigue, time)
         self.max_memories = 100    # i only remember 100 things
+        self.memories = MemoryRing(self.max_memories)  # (input, output, fatigue, time)
+        self.clock = clock         # None = stamp memories with my age
+        self.stats = FeelingStats() if track_stats else None  # lifetime feeling stats
         
         # who i talk to (set up later by the brain)
         self.friends = []          # other cells i'm connected to
@@ -48,7 +110,29 @@ class cognicell:
         self.times_activated = 0
         self.times_rested = 0
         
-        print(f"cell {id} born. curiosity: {self.curiosity:.2f}")
+        if not quiet and self.logger is not None:
+            self.logger(f"cell {id} born. curiosity: {self.curiosity:.2f}")
+    
+    @classmethod
+    def spawn_many(cls, n, curiosity=None, rng=None, max_memories=100, **params):
+        """
+        make a lot of cells at once, silently.
+        
+        a million python objects would take seconds to build and gigabytes
+        to hold, so bulk cells come back as one CellPopulation: every
+        curiosity is drawn in a single vectorized call and all the state
+        (memories included) is allocated up front in a few big arrays.
+        
+        n: how many cells
+        curiosity: one value, an array of n, or None for random (0.3-0.9)
+        rng: numpy Generator or seed for the random personalities
+        max_memories / params: passed on to CellPopulation
+        
+        returns: a CellPopulation of n cells with ids 0..n-1
+        """
+        from population import CellPopulation
+        
+        return CellPopulation(n, curiosity=curiosity, max_memories=max_memories, rng=rng, **params)
     
     def feel(self, input_signal):
         """
@@ -60,6 +144,9 @@ class cognicell:
         
         returns: my activation level (-1 to 1)
         """
+        if self.recorder is not None:
+            self.recorder.feel(input_signal)
+        
         # i'm older now
         self.age += 1
         self.times_activated += 1
@@ -74,70 +161,149 @@ class cognicell:
         feeling = input_signal
         change = abs(input_signal - self.last_input)
         
-        if change > 0.3:  # big change = something new!
+        if change > self.novelty_threshold:  # big change = something new!
             # curious cells amplify new feelings
-            boost = self.curiosity * 0.5
+            boost = self.curiosity * self.curiosity_boost
             feeling = feeling * (1.0 + boost)
         
         # my 'thinking' function
         # tanh keeps things between -1 and 1
+        # (numpy's tanh, not math's - the two disagree in the last bit on
+        # ~1 in 4 inputs on simd cpus, and CellPopulation has to match us
+        # exactly. it costs ~0.25 us a step over math.tanh, see
+        # benchmark.py; the other way round, a population would need
+        # libm's tanh per cell, ~45x slower than numpy's vectorized one)
         raw_feeling = feeling * efficiency
-        self.activation = math.tanh(raw_feeling)
+        self.activation = float(np.tanh(raw_feeling))
         
         # working makes me tired
         # the more activated i am, the more tired i get
-        tiredness_gain = 0.01 + (abs(self.activation) * 0.005)
+        tiredness_gain = self.tiredness_base + (abs(self.activation) * self.tiredness_gain)
         self.fatigue = min(1.0, self.fatigue + tiredness_gain)
         
         # but i also recover a tiny bit naturally
-        self.fatigue = max(0.0, self.fatigue - 0.001)
+        self.fatigue = max(0.0, self.fatigue - self.recovery)
         
         # remember this moment
-        memory = {
-            'input': input_signal,
-            'output': self.activation,
-            'fatigue': self.fatigue,
-            'time': time.time()
-        }
-        self.memories.append(memory)
+        # (the ring forgets the oldest one by itself once it's full)
+        stamp = self.age if self.clock is None else self.clock()
+        self.memories.append(input_signal, self.activation, self.fatigue, stamp)
         self.last_input = input_signal
-        
-        # forget old memories if i have too many
-        if len(self.memories) > self.max_memories:
-            self.memories.pop(0)  # remove the oldest
+        if self.stats is not None:
+            self.stats.update(self.activation)
         
         # tell everyone how i feel
         return self.activation
     
+    def feel_constant(self, input_signal, steps):
+        """
+        feel the same thing over and over, without paying for every step.
+        
+        same result as calling feel(input_signal) `steps` times: same
+        activation, fatigue, age, counters and memories. the trick is that
+        with a constant input the only thing still moving is fatigue, and it
+        settles at a fixed point (0.999 with the default rates, roughly 110
+        steps from fresh). once a step leaves fatigue exactly
+        where it was, every step after it is identical - so we count them
+        instead of living them, and only write the memories that would
+        still fit in the ring.
+        
+        returns: my activation level after the last step
+        """
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.constant(input_signal, steps)
+            self.recorder = None   # the steps below are that one frame
+        done = 0
+        try:
+            while done < steps:
+                settled = self.last_input == input_signal
+                fatigue_before = self.fatigue
+                self.feel(input_signal)
+                done += 1
+                
+                # no novelty and fatigue didn't move: i'm at a fixed point
+                if settled and self.fatigue == fatigue_before:
+                    break
+        finally:
+            if recorder is not None:
+                self.recorder = recorder
+        
+        left = steps - done
+        if left > 0:
+            self.age += left
+            self.times_activated += left
+            keep = min(left, self.memories.capacity)
+            if self.clock is None:
+                stamps = np.arange(self.age - keep + 1, self.age + 1, dtype=np.float64)
+            else:
+                stamps = self.clock.advance(left, keep)
+            self.memories.repeat(input_signal, self.activation, self.fatigue, stamps, keep,
+                                 skipped=left - keep)
+            if self.stats is not None:
+                self.stats.update_repeat(self.activation, left)
+        
+        return self.activation
+    
     def rest(self):
         """
         take a break. recover some fatigue.
         
         even machines need naps sometimes.
         """
-        recovery = 0.1  # recover 10% fatigue
+        if self.recorder is not None:
+            self.recorder.rest()
+        recovery = self.rest_amount  # recover 10% fatigue (by default)
         self.fatigue = max(0.0, self.fatigue - recovery)
         self.times_rested += 1
     
+    def record_inputs(self, path, meta=None):
+        """
+        write down everything i feel (and every rest) to `path`, so
+        replay.replay can live my life again. path=None stops.
+        
+        returns: the InputRecorder, or None when off
+        """
+        if self.recorder is not None:
+            self.recorder.close()
+        self.recorder = InputRecorder(path, 1, meta) if path is not None else None
+        return self.recorder
+    
+    def recall(self, input_signal, output=None, fatigue=None, k=5):
+        """
+        when did i feel something like this before?
+
+        returns: my k memories closest to (input, output, fatigue),
+                 closest first. leave output / fatigue out to ignore them
+        """
+        return self.memories.recall(input_signal, output, fatigue, k)
+    
     def how_are_you(self):
         """
         ask the cell how it's doing.
         
         returns: a dictionary with my current state
-        """
-        # average my last few activations
-        recent_outputs = [m['output'] for m in self.memories[-10:]]
-        avg_out = sum(recent_outputs) / len(recent_outputs) if recent_outputs else 0.0
         
-        return {
+        cheap enough to poll every step: the recent average is kept
+        running by my memory ring, not recomputed.
+        """
+        status = {
             'id': self.id,
             'feeling': self.activation,  # how i feel right now
             'tired': self.fatigue,       # how tired i am
             'curious': self.curiosity,   # my personality
             'age': self.age,             # how long i've lived
             'memories': len(self.memories),  # how much i remember
-            'avg_feeling': avg_out       # how i've been feeling lately
+            'avg_feeling': self.memories.recent_mean()  # how i've been feeling lately
         }
+        
+        if self.stats is not None:
+            status['ewma_feeling'] = self.stats.ewma      # recent mood, slowly fading
+            status['min_feeling'] = self.stats.min
+            status['max_feeling'] = self.stats.max
+            status['var_feeling'] = self.stats.variance   # how moody i am
+        
+        return status
     
     def __str__(self):
         """
@@ -0,0 +1,226 @@
+"""
+compact_cell.py
+the same cell, packed small - for when the cells have to fit in ram.
+
+a cognicell is a python object with a __dict__, a dozen boxed floats and
+a numpy ring buffer with its own header and views. that's ~4.3 kb a cell
+before it has lived a day. CompactCell keeps everything a cell is in one
+flat array.array:
+
+    [activation, fatigue, curiosity, last_input,       <- state
+     input, output, fatigue, time,                      <- memory 0
+     input, output, fatigue, time, ...]                 <- memory 1..
+
+plus a handful of __slots__ (id, ring head/count, age, counters). with
+precision='f' that array is float32, which halves it again.
+
+byte budget per cell (64-bit cpython 3.11, 100 memories):
+
+                                   float64 ('d')   float32 ('f')
+    object + 7 slots (gc header incl.)    88              88
+    array.array header                    80              80
+    state (4 values)                      32              16
+    memories (100 x 4 values)           3200            1600
+    list slot holding the cell             8               8
+    -----------------------------------------------------------
+    total                              3408 b          1792 b
+    10M cells                           ~34 gb          ~18 gb
+
+(ids and small counters are shared ints; past 256 steps age and
+times_activated become their own 28-byte ints, 56 more bytes a cell.)
+cell.nbytes reports the real number. with fewer memories it shrinks
+fast: max_memories=20 in float32 is ~0.5 kb a cell, ~5 gb for 10M.
+for comparison a cognicell is ~4.3 kb, and a CellPopulation row with 100
+float64 memories is 3.3 kb with no per-cell python object at all.
+
+what you give up:
+- float32 rounds every value it stores, so a float32 cell drifts from
+  the float64 one by ~1e-6 (well under anything the experiments measure).
+  float32 stamps are exact up to age 16,777,216.
+- memories are stamped with the cell's age - no clocks, no stats.
+- per-cell parameters come from a shared class (see variant), not from
+  the instance, since every per-cell field costs 8 bytes times 10M.
+"""
+
+import sys
+from array import array
+
+import numpy as np
+
+from cognicell import cognicell, random_curiosity
+from memory import slide_window
+
+
+_ACTIVATION, _FATIGUE, _CURIOSITY, _LAST_INPUT = range(4)
+_STATE = 4    # floats of state before the memories start
+_FIELDS = ('input', 'output', 'fatigue', 'time')
+
+
+class CompactCell:
+    """a cognicell in one packed buffer. same feel(), same numbers."""
+
+    __slots__ = ('id', '_buf', '_head', '_count', 'age', 'times_activated', 'times_rested')
+
+    # same build as every cognicell - change them with variant()
+    novelty_threshold = cognicell.novelty_threshold
+    curiosity_boost = cognicell.curiosity_boost
+    tiredness_base = cognicell.tiredness_base
+    tiredness_gain = cognicell.tiredness_gain
+    recovery = cognicell.recovery
+    rest_amount = cognicell.rest_amount
+
+    max_memories = 100
+    window = 10         # memories in the avg_feeling of how_are_you
+    precision = 'd'     # array typecode: 'd' float64, 'f' float32
+
+    _variants = {}
+
+    def __init__(self, id, curiosity=None, rng=None):
+        """
+        id: just a number to know which cell this is
+        curiosity: how much this cell likes new things (0-1), None = random
+        rng: numpy Generator or seed for the random personality
+        """
+        self.id = id
+        buf = array(self.precision, (0.0,)) * (_STATE + 4 * self.max_memories)  # sized exactly
+        buf[_CURIOSITY] = curiosity if curiosity is not None else float(random_curiosity(rng))
+        self._buf = buf
+        self._head = 0
+        self._count = 0
+        self.age = 0
+        self.times_activated = 0
+        self.times_rested = 0
+
+    @classmethod
+    def variant(cls, precision=None, max_memories=None, **params):
+        """
+        a CompactCell class with its own build, shared by every cell made
+        from it - so 10M cells with novelty_threshold=0.1 don't each
+        carry a copy.
+
+            Small = CompactCell.variant(precision='f', max_memories=20)
+            cells = [Small(id=i, rng=gen) for i in range(10_000_000)]
+        """
+        for name in params:
+            if name not in cognicell.PARAMS:
+                raise TypeError(f"unknown cell parameter: {name}")
+        if precision not in (None, 'd', 'f'):
+            raise ValueError("precision is 'd' (float64) or 'f' (float32)")
+        build = dict(params)
+        if precision is not None:
+            build['precision'] = precision
+        if max_memories is not None:
+            build['max_memories'] = int(max_memories)
+        key = (cls, tuple(sorted(build.items())))
+        if key not in cls._variants:
+            cls._variants[key] = type(cls.__name__, (cls,), {'__slots__': (), **build})
+        return cls._variants[key]
+
+    # state lives in the buffer; these make it look like a cognicell
+    @property
+    def activation(self):
+        return self._buf[_ACTIVATION]
+
+    @property
+    def fatigue(self):
+        return self._buf[_FATIGUE]
+
+    @property
+    def curiosity(self):
+        return self._buf[_CURIOSITY]
+
+    @property
+    def last_input(self):
+        return self._buf[_LAST_INPUT]
+
+    def feel(self, input_signal):
+        """
+        the same step as cognicell.feel, reading and writing the buffer.
+
+        returns: my activation level (-1 to 1), as stored
+        """
+        buf = self._buf
+        self.age += 1
+        self.times_activated += 1
+
+        efficiency = 1.0 - buf[_FATIGUE]
+        feeling = input_signal
+        if abs(input_signal - buf[_LAST_INPUT]) > self.novelty_threshold:
+            feeling = feeling * (1.0 + buf[_CURIOSITY] * self.curiosity_boost)
+
+        buf[_ACTIVATION] = float(np.tanh(feeling * efficiency))
+        activation = buf[_ACTIVATION]   # read back: rounded to float32 if that's what we store
+        fatigue = min(1.0, buf[_FATIGUE] + (self.tiredness_base + abs(activation) * self.tiredness_gain))
+        buf[_FATIGUE] = max(0.0, fatigue - self.recovery)
+
+        # remember this moment (ring: overwrite the oldest once full)
+        at = _STATE + 4 * self._head
+        buf[at] = input_signal
+        buf[at + 1] = activation
+        buf[at + 2] = buf[_FATIGUE]
+        buf[at + 3] = self.age
+        self._head = (self._head + 1) % self.max_memories
+        if self._count < self.max_memories:
+            self._count += 1
+
+        buf[_LAST_INPUT] = input_signal
+        return activation
+
+    def rest(self):
+        """take a break. recover some fatigue."""
+        self._buf[_FATIGUE] = max(0.0, self._buf[_FATIGUE] - self.rest_amount)
+        self.times_rested += 1
+
+    def memory_array(self):
+        """my memories as a (count, 4) numpy array, oldest first (a copy)."""
+        rows = np.frombuffer(self._buf, dtype=self._buf.typecode)[_STATE:].reshape(-1, 4)
+        if self._count < self.max_memories:
+            return rows[:self._count].copy()
+        return np.roll(rows, -self._head, axis=0)
+
+    def memory_column(self, name):
+        """one field ('input', 'output', 'fatigue' or 'time'), oldest first."""
+        return self.memory_array()[:, _FIELDS.index(name)]
+
+    @property
+    def memories(self):
+        """my memories as a list of dicts, oldest first (builds them - not for hot loops)."""
+        return [dict(zip(_FIELDS, row)) for row in self.memory_array().tolist()]
+
+    def how_are_you(self):
+        """
+        same status as cognicell.how_are_you (without the stats).
+
+        there's no running sum to keep in here, so the average is summed
+        the way MemoryRing's running one comes out: from its last re-sum,
+        oldest first (see memory.slide_window). float64 cells match a
+        cognicell exactly as long as max_memories >= 2 * window - 1.
+        """
+        w = min(self.window, self.max_memories)
+        k = min(w, self._count)
+        steps = min(self._count, self._head % w + w)   # back to the last re-sum
+        outputs = [self._buf[_STATE + 4 * ((self._head - back) % self.max_memories) + 1]
+                   for back in range(steps, 0, -1)]
+        total = slide_window(0.0, outputs, steps, w, self._head - steps, self._count - steps,
+                             self.max_memories)
+        return {
+            'id': self.id,
+            'feeling': self.activation,
+            'tired': self.fatigue,
+            'curious': self.curiosity,
+            'age': self.age,
+            'memories': self._count,
+            'avg_feeling': total / k if k else 0.0,
+        }
+
+    @property
+    def nbytes(self):
+        """what this cell really costs in ram, object and buffer included."""
+        size = sys.getsizeof(self) + sys.getsizeof(self._buf)
+        for value in (self.age, self.times_activated, self.times_rested):
+            if not -5 <= value <= 256:   # small ints are shared
+                size += sys.getsizeof(value)
+        return size
+
+    def __str__(self):
+        return f"cell {self.id}: feeling={self.activation:.2f}, tired={self.fatigue:.2f}, age={self.age}"
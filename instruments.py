@@ -0,0 +1,173 @@
+"""
+instruments.py
+what the hot path is doing, when you ask. nothing, when you don't.
+
+    pop = CellPopulation(1_000_000)
+    inst = pop.instrument()          # off by default; this turns it on
+    for _ in range(1000):
+        pop.feel(inputs)
+    inst.totals()                    # {'novelty': ..., 'evictions': ..., 'saturations': ...}
+    inst.to_json('metrics.json')
+    print(inst.to_prometheus())      # text format, for a node exporter textfile
+
+counters are per cell, as arrays next to the population's own state, so
+counting costs one vectorized add per step and no per-cell objects:
+
+    novelty      - steps where the input changed more than novelty_threshold
+    evictions    - memories pushed out of a full ring
+    saturations  - steps where fatigue hit the 1.0 ceiling
+
+phases are wall time per call (mean / max / total, as online_stats.Moments):
+
+    batching     - building the inputs (sensors.SensorPipeline)
+    step         - the cell math in feel / feel_some
+    propagation  - friends' activations through the weights (brain.Brain)
+    recording    - writing memories and stats
+
+with no instruments attached the hot path pays one `is None` check per
+call. for where the time goes *inside* python, wrap a section in
+profiled() - real_experiment does that per experiment with --profile.
+"""
+
+import contextlib
+import cProfile
+import io
+import json
+import os
+import pstats
+import time
+
+import numpy as np
+
+from online_stats import Moments
+
+
+COUNTERS = {
+    'novelty': "steps where the input changed more than novelty_threshold",
+    'evictions': "memories pushed out of a full ring",
+    'saturations': "steps where fatigue hit the 1.0 ceiling",
+}
+PHASES = ('batching', 'step', 'propagation', 'recording')
+
+
+class Instruments:
+    """per-cell counters and per-phase timers for one population."""
+
+    def __init__(self, n):
+        self.n = int(n)
+        for name in COUNTERS:
+            setattr(self, name, np.zeros(self.n, dtype=np.int64))
+        self.phases = {name: Moments() for name in PHASES}
+
+    def add_time(self, phase, seconds):
+        """one call of `phase` took `seconds`."""
+        self.phases[phase].update(seconds)
+
+    @contextlib.contextmanager
+    def timed(self, phase):
+        """time a block as one call of `phase` (for callers off the hot path)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[phase].update(time.perf_counter() - started)
+
+    def totals(self):
+        """every counter summed over the population."""
+        return {name: int(getattr(self, name).sum()) for name in COUNTERS}
+
+    def merge(self, other):
+        """add another population's (same size) or worker's numbers into these."""
+        if other.n != self.n:
+            raise ValueError(f"instruments for {other.n} cells, these are for {self.n}")
+        for name in COUNTERS:
+            getattr(self, name)[:] += getattr(other, name)
+        for name, timer in self.phases.items():
+            timer.merge(other.phases[name])
+        return self
+
+    def reset(self):
+        for name in COUNTERS:
+            getattr(self, name)[:] = 0
+        self.phases = {name: Moments() for name in PHASES}
+
+    def snapshot(self):
+        """plain numbers - what to_json writes."""
+        return {
+            'cells': self.n,
+            'counters': self.totals(),
+            'phases': {
+                name: {
+                    'calls': timer.n,
+                    'total_s': timer.mean * timer.n,
+                    'mean_s': timer.mean,
+                    'max_s': timer.max if timer.n else 0.0,
+                }
+                for name, timer in self.phases.items()
+            },
+        }
+
+    def to_json(self, path=None):
+        """the snapshot as json - written to `path` if given, returned either way."""
+        text = json.dumps(self.snapshot(), indent=2)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(text + '\n')
+        return text
+
+    def to_prometheus(self, prefix='cognicell', labels=None):
+        """
+        the snapshot in prometheus text exposition format.
+        labels: extra labels on every sample, e.g. {'run': 'sweep3'}
+        """
+        def tags(**more):
+            pairs = {**(labels or {}), **more}
+            if not pairs:
+                return ''
+            return '{' + ','.join(f'{k}="{v}"' for k, v in pairs.items()) + '}'
+
+        lines = []
+        for name, help_text in COUNTERS.items():
+            metric = f'{prefix}_{name}_total'
+            lines += [f'# HELP {metric} {help_text}',
+                      f'# TYPE {metric} counter',
+                      f'{metric}{tags()} {int(getattr(self, name).sum())}']
+
+        metric = f'{prefix}_phase_seconds'
+        lines += [f'# HELP {metric} wall time per call of each phase',
+                  f'# TYPE {metric} summary']
+        for name, timer in self.phases.items():
+            lines += [f'{metric}_sum{tags(phase=name)} {timer.mean * timer.n!r}',
+                      f'{metric}_count{tags(phase=name)} {timer.n}']
+        return '\n'.join(lines) + '\n'
+
+
+@contextlib.contextmanager
+def profiled(name, directory=None, top=0):
+    """
+    run a block under cProfile.
+
+    directory: where to dump `{name}.prof` (open it with snakeviz, or
+               pstats.Stats). None = don't profile, just run the block
+    top: also print the `top` most expensive functions (by cumulative time)
+
+    only this process is profiled - trials running in worker processes
+    show up as time spent waiting on the pool.
+    """
+    if directory is None:
+        yield None
+        return
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield profile
+    finally:
+        profile.disable()
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{name}.prof')
+        profile.dump_stats(path)
+        if top:
+            out = io.StringIO()
+            pstats.Stats(profile, stream=out).sort_stats('cumulative').print_stats(top)
+            print(out.getvalue())
+        print(f"   ⏱ profile saved: {path}")
@@ -0,0 +1,722 @@
+"""
+memory.py
+where cells keep their memories. fixed size, no garbage, oldest out first.
+"""
+
+from collections.abc import Mapping
+
+import numpy as np
+
+import recall
+import tiers
+
+
+# one memory: what came in, what i felt, how tired i was, and when
+MEMORY_DTYPE = np.dtype([
+    ('input', np.float64),
+    ('output', np.float64),
+    ('fatigue', np.float64),
+    ('time', np.float64),
+])
+
+
+def slide_window(total, recent, steps, window, head, count, capacity, zero=0.0):
+    """
+    the running window sum after `steps` more appends, without doing them
+    one by one - bit for bit what append() would leave. append slides the
+    sum a step at a time and re-sums it from scratch (oldest first) every
+    time the head lands on a multiple of `window`, so only the steps since
+    the last such landing matter.
+
+    total: the sum before the steps
+    recent: outputs oldest first, ending with the newest step: the last
+            `window` from before, then the new ones - all of them, or at
+            least the last 2 * window - 1 (floats, or rows for a bank)
+    head, count: the ring's before the steps
+    zero: what a re-sum starts from (0.0, or a row of zeros)
+    """
+    offset = len(recent) - steps   # recent[offset + j] is step j's output
+    first = 0
+    for j in range(steps - 1, max(-1, steps - 1 - window), -1):
+        if (head + j + 1) % capacity % window == 0:
+            total = zero
+            for u in range(j + 1 - min(window, count + j + 1), j + 1):
+                total += recent[offset + u]
+            first = j + 1
+            break
+    for j in range(first, steps):
+        if min(capacity, count + j) >= window:
+            total -= recent[offset + j - window]
+        total += recent[offset + j]
+    return total
+
+
+class MemoryRecord(Mapping):
+    """
+    one memory, readable like the old dict: record['input'].
+
+    built only when somebody asks for it, so feel() never makes dicts.
+    """
+
+    __slots__ = ('_record',)
+
+    def __init__(self, record):
+        self._record = record
+
+    def __getitem__(self, key):
+        if key not in MEMORY_DTYPE.fields:
+            raise KeyError(key)
+        return float(self._record[key])
+
+    def __iter__(self):
+        return iter(MEMORY_DTYPE.names)
+
+    def __len__(self):
+        return len(MEMORY_DTYPE.names)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class MemoryRing:
+    """
+    a circular buffer of memories for one cell.
+
+    preallocated numpy structured array plus a head index: remembering is
+    four float writes, forgetting the oldest is free (it just gets
+    overwritten). reads look like a list of dicts, oldest first, so
+    cell.memories[0]['input'] and cell.memories[-10:] still work.
+
+    it also keeps a running sum of the last `window` outputs, so "how have
+    i been feeling lately" is one division instead of a scan. it is
+    re-summed from scratch every `window` slots so rounding can't pile up
+    (and so many steps at once can land on the same number, see
+    slide_window).
+    """
+
+    __slots__ = ('capacity', 'records', 'head', 'count', 'window', 'window_sum',
+                 '_recent', '_ri', '_input', '_output', '_fatigue', '_time', 'tiers')
+
+    def __init__(self, capacity=100, window=10):
+        self.capacity = int(capacity)
+        self.records = np.zeros(self.capacity, dtype=MEMORY_DTYPE)
+        self.head = 0    # where the next memory goes
+        self.count = 0   # how many slots are in use
+
+        self.window = max(1, min(int(window), self.capacity))
+        self.window_sum = 0.0
+        # the window's outputs again, as python floats: reading them back
+        # out of numpy would turn the running sum into a slow numpy scalar
+        self._recent = [0.0] * self.window
+        self._ri = 0
+
+        # per-field views - scalar writes into these are much cheaper
+        # than assigning a whole structured record
+        self._input = self.records['input']
+        self._output = self.records['output']
+        self._fatigue = self.records['fatigue']
+        self._time = self.records['time']
+        self.tiers = None   # see consolidate()
+
+    def consolidate(self, unit=16):
+        """
+        from now on, fold memories that fall out of the ring into
+        summary bands instead of forgetting them (see tiers.py).
+        """
+        self.tiers = tiers.MemoryTiers(unit=unit)
+        return self.tiers
+
+    def append(self, input_signal, output, fatigue, time):
+        """remember one moment. if full, the oldest one is forgotten (or consolidated)."""
+        h = self.head
+        if self.tiers is not None and self.count == self.capacity:
+            self.tiers.fold(self._input[h], self._output[h], self._fatigue[h])
+
+        # slide the window: the output `window` steps back drops out
+        w = self._ri
+        if self.count >= self.window:
+            self.window_sum -= self._recent[w]
+        self.window_sum += output
+        self._recent[w] = output
+        self._ri = w + 1 if w + 1 < self.window else 0
+
+        self._input[h] = input_signal
+        self._output[h] = output
+        self._fatigue[h] = fatigue
+        self._time[h] = time
+
+        h += 1
+        if h == self.capacity:
+            h = 0
+        self.head = h
+        if self.count < self.capacity:
+            self.count += 1
+
+        # every `window` slots, redo the sum exactly (the window is full here)
+        if h % self.window == 0:
+            if self._ri:
+                self._recent = self._recent[self._ri:] + self._recent[:self._ri]
+                self._ri = 0
+            self.window_sum = sum(self._recent)
+
+    def _last(self, k):
+        """my last k outputs (fewer if i'm younger), oldest first, as python floats."""
+        k = min(k, self.count)
+        return self._output[(self.head - k + np.arange(k)) % self.capacity].tolist()
+
+    def recent_mean(self):
+        """average output over the last `window` memories (0 if none)."""
+        k = min(self.window, self.count)
+        return self.window_sum / k if k else 0.0
+
+    def repeat(self, input_signal, output, fatigue, time, k, skipped=0):
+        """
+        remember k moments in a row with the same values (k <= capacity).
+        time can be one stamp or k of them. skipped: how many identical
+        moments came before these k without ever reaching the ring (they
+        only matter when consolidating).
+        """
+        if self.tiers is not None:
+            for slot in self._order()[:max(0, self.count + k - self.capacity)]:
+                self.tiers.fold(self._input[slot], self._output[slot], self._fatigue[slot])
+            self.tiers.fold_constant(input_signal, output, fatigue, skipped)
+        recent = self._last(self.window) + [float(output)] * min(k, 2 * self.window - 1)
+        self.window_sum = slide_window(self.window_sum, recent, k, self.window,
+                                       self.head, self.count, self.capacity)
+        slots = (self.head + np.arange(k)) % self.capacity
+        self._input[slots] = input_signal
+        self._output[slots] = output
+        self._fatigue[slots] = fatigue
+        self._time[slots] = time
+
+        self.head = (self.head + k) % self.capacity
+        self.count = min(self.capacity, self.count + k)
+        last = self._last(self.window)
+        self._recent[:len(last)] = last
+        self._ri = len(last) % self.window
+
+    def clear(self):
+        """forget everything."""
+        self.head = 0
+        self.count = 0
+        self.window_sum = 0.0
+        self._ri = 0
+        if self.tiers is not None:
+            self.tiers = tiers.MemoryTiers(unit=self.tiers.unit)
+
+    def summary(self, steps=None):
+        """
+        count, mean and variance of input/output/fatigue over my last
+        `steps` memories (None = my whole life) - the ring exactly, older
+        ones from the consolidated bands if there are any.
+        """
+        k = self.count if steps is None else min(steps, self.count)
+        slots = (self.head - k + np.arange(k)) % self.capacity
+        band = tiers.exact(self.records[slots])
+        if self.tiers is not None:
+            older = self.tiers.folded if steps is None else steps - k
+            band.merge(self.tiers.recent(older))
+        return tiers.summarize(band)
+
+    def recall(self, input_signal, output=None, fatigue=None, k=5, scale=None):
+        """
+        the k memories most like (input, output, fatigue), closest first -
+        leave output or fatigue out to ignore them. see recall.py.
+        """
+        slots = recall.recall_ring(self, input_signal, output, fatigue, k, scale)
+        return [MemoryRecord(self.records[s].copy()) for s in slots]
+
+    def _order(self):
+        """physical slots, oldest first."""
+        start = self.head - self.count
+        return (start + np.arange(self.count)) % self.capacity
+
+    def ordered(self):
+        """all memories as a structured array, oldest first (a copy)."""
+        return self.records[self._order()]
+
+    def column(self, name):
+        """one field (e.g. 'output') for every memory, oldest first."""
+        return self.records[name][self._order()]
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self.count))]
+
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError("memory index out of range")
+        slot = (self.head - self.count + i) % self.capacity
+        return MemoryRecord(self.records[slot].copy())
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self[i]
+
+    def __repr__(self):
+        return f"MemoryRing({self.count}/{self.capacity})"
+
+
+class MemoryBank:
+    """
+    memory rings for a whole population, stored as one array.
+
+    shape is (capacity, n): every step all cells remember at once, so the
+    write is one contiguous row and there is a single head for everyone.
+    like MemoryRing it keeps a running sum of everyone's last `window`
+    outputs, updated and re-summed in the same order so the numbers match
+    exactly.
+    """
+
+    index = None   # a recall.RecallIndex, told about every row written
+    tiers = None   # a tiers.MemoryTiers catching evicted rows, see consolidate()
+
+    def __init__(self, n, capacity=100, window=10):
+        self.n = int(n)
+        self.capacity = int(capacity)
+        self.records = np.zeros((self.capacity, self.n), dtype=MEMORY_DTYPE)
+        self.head = 0
+        self.count = 0
+
+        self.window = max(1, min(int(window), self.capacity))
+        self.window_sum = np.zeros(self.n)
+
+    def consolidate(self, unit=16):
+        """fold rows that fall out of the ring into summary bands (see tiers.py)."""
+        self.tiers = tiers.MemoryTiers(self.n, unit=unit)
+        return self.tiers
+
+    def append(self, inputs, outputs, fatigue, time):
+        """everyone remembers this step. time is one stamp for the batch."""
+        row = self.records[self.head]
+        if self.tiers is not None and self.count == self.capacity:
+            self.tiers.fold(row['input'], row['output'], row['fatigue'])
+
+        if self.count >= self.window:
+            self.window_sum -= self.records['output'][self.head - self.window]
+        self.window_sum += outputs
+
+        row['input'] = inputs
+        row['output'] = outputs
+        row['fatigue'] = fatigue
+        row['time'] = time
+        if self.index is not None:
+            self.index.insert(self.head)
+
+        self.head = (self.head + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+        if self.head % self.window == 0:
+            self.window_sum[:] = 0.0
+            for row in self.recent('output', self.window):
+                self.window_sum += row
+
+    def window_tail(self):
+        """everyone's last `window` outputs, oldest first: what slide_window() starts from (a copy)."""
+        return self.recent('output', self.window)
+
+    def _slide(self, recent, steps):
+        """move everyone's window sum over `steps` steps at once (head and count not moved yet)."""
+        self.window_sum[:] = slide_window(self.window_sum, recent, steps, self.window,
+                                          self.head, self.count, self.capacity, np.zeros(self.n))
+
+    def recent_mean(self, cells=slice(None)):
+        """everyone's (or `cells`') average output over the last `window` memories."""
+        k = min(self.window, self.count)
+        total = self.window_sum[cells]
+        return total / k if k else np.zeros(np.shape(total))
+
+    def repeat(self, inputs, outputs, fatigue, time, k, skipped=0):
+        """
+        everyone remembers the same row k times in a row (k <= capacity).
+        time can be one stamp or k of them (one per row). skipped: like
+        MemoryRing.repeat, identical rows before these that never landed.
+        """
+        if self.tiers is not None:
+            for row in self._order()[:max(0, self.count + k - self.capacity)]:
+                old = self.records[row]
+                self.tiers.fold(old['input'], old['output'], old['fatigue'])
+            self.tiers.fold_constant(inputs, outputs, fatigue, skipped)
+        self._slide(np.concatenate([self.window_tail(),
+                                    np.broadcast_to(outputs, (min(k, 2 * self.window - 1), self.n))]), k)
+        rows = (self.head + np.arange(k)) % self.capacity
+        self.records['input'][rows] = inputs
+        self.records['output'][rows] = outputs
+        self.records['fatigue'][rows] = fatigue
+        self.records['time'][rows] = np.reshape(time, (-1, 1)) if np.ndim(time) else time
+        if self.index is not None:
+            self.index.insert(rows)
+
+        self.head = (self.head + k) % self.capacity
+        self.count = min(self.capacity, self.count + k)
+
+    def extend(self, inputs, outputs, fatigue, time, steps=None):
+        """
+        everyone remembers `steps` steps in a row, the last of which are
+        given as (k, n) arrays, oldest first (steps=None: just those k).
+        only the last `capacity` land, in the rows that many appends
+        would have put them in; with consolidation on, all steps must be
+        given, and the ones that don't land are folded as if they had
+        passed through. k must cover the last 2 * window - 1 steps (or
+        all of them) so the running window sum comes out as appends
+        would have left it.
+        time: stamps for the rows that land (or one for all of them)
+        """
+        given = len(outputs)
+        steps = given if steps is None else steps
+        keep = min(steps, self.capacity)
+        if given < min(steps, max(keep, 2 * self.window - 1)):
+            raise ValueError("need at least the last 2 * window - 1 steps (and every one that lands)")
+        recent = np.concatenate([self.window_tail(), outputs[given - min(given, 2 * self.window - 1):]])
+        if self.tiers is not None:
+            if given < steps:
+                raise ValueError("consolidating memories needs every step")
+            for row in self._order()[:max(0, self.count + steps - self.capacity)]:
+                old = self.records[row]
+                self.tiers.fold(old['input'], old['output'], old['fatigue'])
+            for t in range(steps - keep):
+                self.tiers.fold(inputs[t], outputs[t], fatigue[t])
+        rows = self.rows_for(steps)
+        times = np.broadcast_to(time, (keep,))
+        # row by row, like append: a fancy-indexed write into the structured
+        # records costs twice as much
+        for j, h in enumerate(rows.tolist()):
+            row = self.records[h]
+            row['input'] = inputs[given - keep + j]
+            row['output'] = outputs[given - keep + j]
+            row['fatigue'] = fatigue[given - keep + j]
+            row['time'] = times[j]
+        self.filled(rows, steps, recent)
+
+    def rows_for(self, steps):
+        """
+        the rows the last min(steps, capacity) of the next `steps` steps
+        land in, oldest first. for writers that fill them in place (see
+        CellPopulation.feel_sequence) and then call filled().
+        """
+        keep = min(steps, self.capacity)
+        return (self.head + (steps - keep) + np.arange(keep)) % self.capacity
+
+    def filled(self, rows, steps, recent):
+        """
+        `steps` steps were remembered, the ones that land already written
+        to `rows`. recent: window_tail() from before the writes, then the
+        new outputs (all of them, or the last 2 * window - 1).
+        """
+        if self.index is not None:
+            self.index.insert(rows)
+        self._slide(recent, steps)
+        self.head = (self.head + steps) % self.capacity
+        self.count = min(self.capacity, self.count + steps)
+
+    def clear(self):
+        """everyone forgets everything."""
+        self.head = 0
+        self.count = 0
+        self.window_sum[:] = 0.0
+        if self.tiers is not None:
+            self.tiers = tiers.MemoryTiers(self.n, unit=self.tiers.unit)
+
+    def summary(self, steps=None):
+        """
+        everyone's count, mean and variance of input/output/fatigue over
+        the last `steps` memories (None = the whole life), as arrays.
+        """
+        k = self.count if steps is None else min(steps, self.count)
+        band = tiers.exact(self.recent_rows(k))
+        if self.tiers is not None:
+            older = self.tiers.folded if steps is None else steps - k
+            band.merge(self.tiers.recent(older))
+        return tiers.summarize(band)
+
+    def recent_rows(self, k):
+        """the last k rows of records, oldest first, shape (k, n)."""
+        k = min(k, self.count)
+        return self.records[(self.head - k + np.arange(k)) % self.capacity]
+
+    def _order(self):
+        start = self.head - self.count
+        return (start + np.arange(self.count)) % self.capacity
+
+    def column(self, name):
+        """one field for everyone, shape (count, n), oldest row first."""
+        return self.records[name][self._order()]
+
+    def recent(self, name, k, cells=slice(None)):
+        """the last k values of one field, shape (min(k, count), cells)."""
+        k = min(k, self.count)
+        rows = (self.head - k + np.arange(k)) % self.capacity
+        return self.records[name][rows, cells]
+
+    def cell(self, i):
+        """one cell's memories as a MemoryRing-style list, oldest first."""
+        records = self.records[self._order(), i]
+        return [MemoryRecord(r) for r in records]
+
+    def __len__(self):
+        return self.count
+
+    def __repr__(self):
+        return f"MemoryBank({self.n} cells, {self.count}/{self.capacity})"
+
+
+class SparseMemoryBank:
+    """
+    MemoryBank for populations whose cells don't all step together.
+
+    same (capacity, n) records, but every cell has its own head and count,
+    so a step that touches 50 cells out of a million writes 50 memories
+    and leaves everyone else's ring alone. each cell's window sum is kept
+    and re-summed exactly like its own MemoryRing would, so a cell stepped
+    here remembers the same numbers as a lone cognicell.
+    """
+
+    tiers = None   # never - see consolidate()
+
+    def __init__(self, n, capacity=100, window=10):
+        self.n = int(n)
+        self.capacity = int(capacity)
+        self.records = np.zeros((self.capacity, self.n), dtype=MEMORY_DTYPE)
+        self.head = np.zeros(self.n, dtype=np.int64)    # per cell
+        self.count = np.zeros(self.n, dtype=np.int64)   # per cell
+
+        self.window = max(1, min(int(window), self.capacity))
+        self.window_sum = np.zeros(self.n)
+
+    def append(self, inputs, outputs, fatigue, time):
+        """everyone remembers this step."""
+        self.append_some(np.arange(self.n), inputs, outputs, fatigue, time)
+
+    def consolidate(self, unit=16):
+        """not for sparse banks: every cell's ring evicts at its own moment."""
+        raise ValueError("consolidation needs everyone forgetting in lockstep (sparse=False)")
+
+    def append_some(self, cells, inputs, outputs, fatigue, time):
+        """
+        only `cells` (an index array, no repeats) remember this step.
+        inputs/outputs/fatigue line up with cells; time is one stamp.
+        """
+        h = self.head[cells]
+        count = self.count[cells]
+
+        # slide each window: the output `window` steps back drops out
+        full = count >= self.window
+        if full.any():
+            drop = self.records['output'][(h[full] - self.window) % self.capacity, cells[full]]
+            self.window_sum[cells[full]] -= drop
+        self.window_sum[cells] += outputs
+
+        self.records['input'][h, cells] = inputs
+        self.records['output'][h, cells] = outputs
+        self.records['fatigue'][h, cells] = fatigue
+        self.records['time'][h, cells] = time
+
+        h += 1
+        h %= self.capacity
+        self.head[cells] = h
+        np.minimum(count + 1, self.capacity, out=count)
+        self.count[cells] = count
+
+        aligned = cells[h % self.window == 0]
+        if len(aligned):
+            self._resync(aligned)
+
+    def _resync(self, cells):
+        """re-sum these cells' windows from scratch, oldest memory first."""
+        k = np.minimum(self.window, self.count[cells])
+        self.window_sum[cells] = 0.0
+        for back in range(self.window, 0, -1):
+            use = k >= back
+            rows = (self.head[cells[use]] - back) % self.capacity
+            self.window_sum[cells[use]] += self.records['output'][rows, cells[use]]
+
+    def window_tail(self):
+        """
+        each cell's last `window` outputs, oldest first: (window, n), a
+        copy - rows a young cell doesn't have yet hold whatever is in its ring.
+        """
+        back = np.arange(self.window, 0, -1)[:, None]
+        return self.records['output'][(self.head - back) % self.capacity, np.arange(self.n)]
+
+    def _slide(self, recent, steps):
+        """slide_window() for every cell at once, each from its own head and count."""
+        w, cells = self.window, np.arange(self.n)
+        offset = len(recent) - steps
+        last = np.full(self.n, -1)
+        for j in range(steps - 1, max(-1, steps - 1 - w), -1):
+            last[(last < 0) & ((self.head + j + 1) % self.capacity % w == 0)] = j
+        total = self.window_sum
+        again = last >= 0
+        total[again] = 0.0
+        k = np.minimum(w, self.count + last + 1)
+        for i in range(w):
+            use = again & (i < k)
+            total[use] += recent[offset + last[use] + 1 - k[use] + i, cells[use]]
+        first = last + 1
+        for i in range(w - 1):
+            j = first + i
+            moving = j < steps
+            drop = moving & (np.minimum(self.capacity, self.count + j) >= w)
+            total[drop] -= recent[offset + j[drop] - w, cells[drop]]
+            total[moving] += recent[offset + j[moving], cells[moving]]
+
+    def repeat(self, inputs, outputs, fatigue, time, k, skipped=0):
+        """
+        everyone remembers the same thing k times in a row (see
+        MemoryBank.repeat). skipped is ignored: sparse banks don't consolidate.
+        """
+        times = np.broadcast_to(time, (k,))
+        for j in range(k):
+            self.append(inputs, outputs, fatigue, times[j])
+
+    def extend(self, inputs, outputs, fatigue, time, steps=None):
+        """everyone remembers `steps` steps in a row (see MemoryBank.extend)."""
+        given = len(outputs)
+        steps = given if steps is None else steps
+        keep = min(steps, self.capacity)
+        if given < min(steps, max(keep, 2 * self.window - 1)):
+            raise ValueError("need at least the last 2 * window - 1 steps (and every one that lands)")
+        self._slide(np.concatenate([self.window_tail(), outputs[given - min(given, 2 * self.window - 1):]]),
+                    steps)
+        cells = np.arange(self.n)
+        rows = (self.head + (steps - keep) + np.arange(keep)[:, None]) % self.capacity
+        self.records['input'][rows, cells] = inputs[given - keep:]
+        self.records['output'][rows, cells] = outputs[given - keep:]
+        self.records['fatigue'][rows, cells] = fatigue[given - keep:]
+        self.records['time'][rows, cells] = np.reshape(time, (-1, 1)) if np.ndim(time) else time
+        self.head = (self.head + steps) % self.capacity
+        self.count = np.minimum(self.count + steps, self.capacity)
+
+    def recent_mean(self, cells=slice(None)):
+        """average output over each cell's last `window` memories (0 if none)."""
+        k = np.minimum(self.window, self.count[cells])
+        return np.divide(self.window_sum[cells], k, out=np.zeros(k.shape), where=k > 0)
+
+    def clear(self, cells=slice(None)):
+        """forget everything (everyone, or just `cells`)."""
+        self.head[cells] = 0
+        self.count[cells] = 0
+        self.window_sum[cells] = 0.0
+
+    def _order(self, i):
+        start = self.head[i] - self.count[i]
+        return (start + np.arange(self.count[i])) % self.capacity
+
+    def cell(self, i):
+        """one cell's memories as a MemoryRing-style list, oldest first."""
+        return [MemoryRecord(r) for r in self.records[self._order(i), i]]
+
+    def cell_column(self, i, name):
+        """one field of one cell's memories, oldest first."""
+        return self.records[name][self._order(i), i]
+
+    def __repr__(self):
+        return f"SparseMemoryBank({self.n} cells, {self.capacity} each)"
+
+
+# -------------------------------------------------------------------
+# lifetime feeling stats - optional, O(1) per step
+# -------------------------------------------------------------------
+
+class FeelingStats:
+    """
+    running stats of everything one cell has felt: count, mean and
+    variance (welford), min, max and an exponential moving average.
+    """
+
+    __slots__ = ('alpha', 'n', 'mean', 'm2', 'min', 'max', 'ewma')
+
+    def __init__(self, alpha=0.1):
+        self.alpha = alpha   # ewma weight of the newest feeling
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = float('inf')
+        self.max = float('-inf')
+        self.ewma = 0.0
+
+    def update(self, x):
+        """one more feeling."""
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+        self.ewma = x if self.n == 1 else self.ewma + self.alpha * (x - self.ewma)
+
+    def update_repeat(self, x, k):
+        """the same feeling k times in a row, in closed form."""
+        if k <= 0:
+            return
+        if self.n == 0:
+            self.ewma = x
+        else:
+            self.ewma = x + (1.0 - self.alpha) ** k * (self.ewma - x)
+
+        # chan's merge of a batch of k identical values (mean x, no spread)
+        n = self.n + k
+        delta = x - self.mean
+        self.mean += delta * k / n
+        self.m2 += delta * delta * self.n * k / n
+        self.n = n
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+
+    @property
+    def variance(self):
+        return self.m2 / self.n if self.n else 0.0
+
+
+class FeelingStatsArray:
+    """FeelingStats for a whole population, one column per stat."""
+
+    def __init__(self, n, alpha=0.1):
+        self.alpha = alpha
+        self.n = 0   # everyone has felt the same number of things
+        self.mean = np.zeros(n)
+        self.m2 = np.zeros(n)
+        self.min = np.full(n, np.inf)
+        self.max = np.full(n, -np.inf)
+        self.ewma = np.zeros(n)
+
+    def update(self, x):
+        """one more feeling for everyone."""
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+        np.minimum(self.min, x, out=self.min)
+        np.maximum(self.max, x, out=self.max)
+        if self.n == 1:
+            self.ewma[:] = x
+        else:
+            self.ewma += self.alpha * (x - self.ewma)
+
+    def update_repeat(self, x, k):
+        """everyone feels the same thing (their own x) k more times."""
+        if k <= 0:
+            return
+        if self.n == 0:
+            self.ewma[:] = x
+        else:
+            self.ewma[:] = x + (1.0 - self.alpha) ** k * (self.ewma - x)
+
+        n = self.n + k
+        delta = x - self.mean
+        self.mean += delta * k / n
+        self.m2 += delta * delta * self.n * k / n
+        self.n = n
+        np.minimum(self.min, x, out=self.min)
+        np.maximum(self.max, x, out=self.max)
+
+    @property
+    def variance(self):
+        return self.m2 / self.n if self.n else np.zeros_like(self.m2)
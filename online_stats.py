@@ -0,0 +1,242 @@
+"""
+online_stats.py
+statistics that never keep the data.
+
+every accumulator here takes values one at a time (or a batch at a time),
+holds a handful of numbers no matter how long the run, and can be merged
+with another one of its kind - so each worker keeps its own and the
+results get combined at the end, in any order, with the same answer as
+one pass over everything (up to float rounding).
+
+    acc = Covariance()
+    for cycle in range(10_000_000):
+        acc.update(cell.feel(x), cell.fatigue)
+    acc.correlation
+"""
+
+import math
+
+import numpy as np
+
+
+class Moments:
+    """count, mean, variance (welford), min and max of a stream."""
+
+    __slots__ = ('n', 'mean', 'm2', 'min', 'max')
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0         # sum of squared distances from the mean
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, x):
+        """one more value."""
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    def update_many(self, xs):
+        """a whole batch at once (numpy does the pass, then one merge)."""
+        xs = np.asarray(xs, dtype=np.float64).ravel()
+        if len(xs):
+            mean = xs.mean()
+            self._merge(len(xs), float(mean), float(((xs - mean) ** 2).sum()),
+                        float(xs.min()), float(xs.max()))
+
+    def merge(self, other):
+        """fold another Moments into this one (chan et al). returns self."""
+        if other.n:
+            self._merge(other.n, other.mean, other.m2, other.min, other.max)
+        return self
+
+    def _merge(self, n, mean, m2, lo, hi):
+        total = self.n + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.n * n / total
+        self.n = total
+        self.min = min(self.min, lo)
+        self.max = max(self.max, hi)
+
+    @property
+    def variance(self):
+        """population variance (like np.var)."""
+        return self.m2 / self.n if self.n else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def sample_variance(self):
+        """unbiased variance (like np.var(ddof=1)) - what a t-test wants."""
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    def __repr__(self):
+        return f"Moments(n={self.n}, mean={self.mean:.6g}, std={self.std:.6g})"
+
+
+class Covariance:
+    """two streams side by side: both Moments plus their co-moment."""
+
+    __slots__ = ('x', 'y', 'c')
+
+    def __init__(self):
+        self.x = Moments()
+        self.y = Moments()
+        self.c = 0.0          # sum of (x - mean x) * (y - mean y)
+
+    @property
+    def n(self):
+        return self.x.n
+
+    def update(self, x, y):
+        """one more (x, y) pair."""
+        dx = x - self.x.mean          # against the old x mean...
+        self.x.update(x)
+        self.y.update(y)
+        self.c += dx * (y - self.y.mean)  # ...and the new y mean
+
+    def update_many(self, xs, ys):
+        """a batch of pairs at once."""
+        xs = np.asarray(xs, dtype=np.float64).ravel()
+        ys = np.asarray(ys, dtype=np.float64).ravel()
+        if len(xs) != len(ys):
+            raise ValueError("xs and ys need the same length")
+        if not len(xs):
+            return
+        batch = Covariance()
+        batch.x.update_many(xs)
+        batch.y.update_many(ys)
+        batch.c = float(((xs - batch.x.mean) * (ys - batch.y.mean)).sum())
+        self.merge(batch)
+
+    def merge(self, other):
+        """fold another Covariance into this one. returns self."""
+        if other.n:
+            n_a, n_b = self.n, other.n
+            dx = other.x.mean - self.x.mean
+            dy = other.y.mean - self.y.mean
+            self.c += other.c + dx * dy * n_a * n_b / (n_a + n_b)
+            self.x.merge(other.x)
+            self.y.merge(other.y)
+        return self
+
+    @property
+    def covariance(self):
+        """population covariance (like np.cov(bias=True))."""
+        return self.c / self.n if self.n else 0.0
+
+    @property
+    def correlation(self):
+        """pearson r (like np.corrcoef). nan if either stream never moved."""
+        spread = math.sqrt(self.x.m2 * self.y.m2)
+        return self.c / spread if spread > 0 else math.nan
+
+    def __repr__(self):
+        return f"Covariance(n={self.n}, r={self.correlation:.6g})"
+
+
+class Histogram:
+    """
+    fixed-bin histogram sketch on [lo, hi).
+
+    values outside the range are still counted (below / above), so the
+    total is exact and quantiles inside the range stay honest. two
+    sketches merge by adding counts - they need the same bins.
+    """
+
+    __slots__ = ('lo', 'hi', 'counts', 'below', 'above')
+
+    def __init__(self, lo=-1.0, hi=1.0, bins=64):
+        if not hi > lo:
+            raise ValueError("need lo < hi")
+        self.lo = float(lo)
+        self.hi = float(hi)
+        self.counts = np.zeros(int(bins), dtype=np.int64)
+        self.below = 0
+        self.above = 0
+
+    @property
+    def edges(self):
+        return np.linspace(self.lo, self.hi, len(self.counts) + 1)
+
+    @property
+    def n(self):
+        return int(self.counts.sum()) + self.below + self.above
+
+    def _bin(self, x):
+        return int((x - self.lo) * len(self.counts) / (self.hi - self.lo))
+
+    def update(self, x):
+        """one more value."""
+        if x < self.lo:
+            self.below += 1
+        elif x >= self.hi:
+            self.above += 1
+        else:
+            self.counts[min(self._bin(x), len(self.counts) - 1)] += 1
+
+    def update_many(self, xs):
+        """a batch at once."""
+        xs = np.asarray(xs, dtype=np.float64).ravel()
+        low = xs < self.lo
+        high = xs >= self.hi
+        self.below += int(low.sum())
+        self.above += int(high.sum())
+        inside = xs[~(low | high)]
+        bins = ((inside - self.lo) * (len(self.counts) / (self.hi - self.lo))).astype(np.int64)
+        np.minimum(bins, len(self.counts) - 1, out=bins)
+        self.counts += np.bincount(bins, minlength=len(self.counts))
+
+    def merge(self, other):
+        """add another sketch's counts. returns self."""
+        if (other.lo, other.hi, len(other.counts)) != (self.lo, self.hi, len(self.counts)):
+            raise ValueError("can only merge histograms with the same bins")
+        self.counts += other.counts
+        self.below += other.below
+        self.above += other.above
+        return self
+
+    def quantile(self, q):
+        """
+        approximate q-quantile (0-1), interpolated inside its bin - off by
+        at most one bin width. clamps to lo / hi when it lands outside.
+        """
+        total = self.n
+        if not total:
+            return math.nan
+        target = q * total
+        if target <= self.below:
+            return self.lo
+        cum = np.cumsum(self.counts) + self.below
+        i = int(np.searchsorted(cum, target))
+        if i >= len(self.counts):
+            return self.hi
+        before = cum[i] - self.counts[i]
+        width = (self.hi - self.lo) / len(self.counts)
+        return self.lo + width * (i + (target - before) / self.counts[i])
+
+    def __repr__(self):
+        return f"Histogram([{self.lo}, {self.hi}), bins={len(self.counts)}, n={self.n})"
+
+
+def merge_all(accumulators):
+    """combine a list of same-kind accumulators (e.g. one per worker) into a new one."""
+    accumulators = list(accumulators)
+    if not accumulators:
+        raise ValueError("nothing to merge")
+    first = accumulators[0]
+    if isinstance(first, Histogram):
+        total = Histogram(first.lo, first.hi, len(first.counts))
+    else:
+        total = type(first)()
+    for acc in accumulators:
+        total.merge(acc)
+    return total
@@ -0,0 +1,668 @@
+"""
+population.py
+lots of cells at once. same life as cognicell, but stored as arrays.
+"""
+
+import time
+
+import numpy as np
+
+from cognicell import cognicell, random_curiosity
+from instruments import Instruments
+from replay import InputRecorder
+from memory import FeelingStatsArray, MemoryBank, SparseMemoryBank
+from recall import RecallIndex, scan
+
+
+class CellPopulation:
+    """
+    n cells living side by side.
+
+    instead of one python object per cell, every piece of state is one
+    contiguous numpy array (struct-of-arrays). feel() advances all n cells
+    in a single vectorized call using exactly the same rules as
+    cognicell.feel - same novelty boost, same efficiency, same tanh, same
+    fatigue - so the numbers match a loop over scalar cells bit for bit.
+    """
+
+    def __init__(self, n, curiosity=None, ids=None, max_memories=100, clock=None,
+                 track_stats=False, rng=None, sparse=False, **params):
+        """
+        create n fresh cells.
+
+        n: how many cells
+        curiosity: one value for everyone, or an array with one per cell.
+                   if None, every cell gets a random personality (0.3-0.9)
+        ids: optional array of cell ids (defaults to 0..n-1)
+        max_memories: ring size per cell. 0 turns memories off, which
+                      is what you want for huge throwaway populations
+        clock: what stamps memories (see clock.py), read once per step
+               for the whole batch. None = the population's own tick count
+        track_stats: keep lifetime mean/variance, min/max and ewma of
+                     everyone's feelings (see status_arrays)
+        rng: numpy Generator or seed for the random personalities - all
+             n are drawn in one call
+        sparse: cells will be stepped a few at a time (feel_some, or a
+                Scheduler) - every cell gets its own memory head.
+                can't be combined with track_stats
+        params: any of cognicell.PARAMS, as one value for everyone or an
+                array with one per cell. unset ones use cognicell's defaults
+        """
+        self.n = int(n)
+        self.ids = np.arange(self.n) if ids is None else np.asarray(ids)
+
+        # how we're built - plain floats when shared, arrays when per cell
+        for name in cognicell.PARAMS:
+            self.set_param(name, params.pop(name, getattr(cognicell, name)))
+        if params:
+            raise TypeError(f"unknown cell parameter: {', '.join(params)}")
+
+        # how everyone feels right now
+        self.activation = np.zeros(self.n)
+        self.fatigue = np.zeros(self.n)
+        if curiosity is None:
+            curiosity = random_curiosity(rng, self.n)
+        self.curiosity = np.array(np.broadcast_to(curiosity, (self.n,)), dtype=np.float64)
+        self.last_input = np.zeros(self.n)
+        self.age = np.zeros(self.n, dtype=np.int64)
+
+        # what we remember - one ring buffer row per step for everyone
+        self.max_memories = int(max_memories)
+        if sparse and track_stats:
+            raise ValueError("track_stats needs everyone stepping together (sparse=False)")
+        bank = SparseMemoryBank if sparse else MemoryBank
+        self.memories = bank(self.n, self.max_memories) if self.max_memories else None
+        self.clock = clock
+        self.ticks = 0             # how many steps the population has taken
+        self.stats = FeelingStatsArray(self.n) if track_stats else None
+
+        # stats for debugging
+        self.times_activated = np.zeros(self.n, dtype=np.int64)
+        self.times_rested = np.zeros(self.n, dtype=np.int64)
+        self.instruments = None    # see instrument()
+        self.recorder = None       # see record_inputs()
+
+        # scratch space so a step doesn't allocate more than it has to
+        self._scratch = np.empty(self.n)
+        self._feeling = np.empty(self.n)
+        self._novel = np.empty(self.n, dtype=bool)
+
+    @classmethod
+    def from_cells(cls, cells):
+        """
+        pack existing cognicell objects into a population.
+
+        copies their current state so an experiment can switch engines
+        halfway through a life. memories start empty.
+        """
+        params = {}
+        for name in cognicell.PARAMS:
+            values = [getattr(c, name) for c in cells]
+            params[name] = values[0] if len(set(values)) == 1 else values
+        pop = cls(len(cells), curiosity=[c.curiosity for c in cells],
+                  ids=[c.id for c in cells], max_memories=cells[0].max_memories, **params)
+        pop.activation[:] = [c.activation for c in cells]
+        pop.fatigue[:] = [c.fatigue for c in cells]
+        pop.last_input[:] = [c.last_input for c in cells]
+        pop.age[:] = [c.age for c in cells]
+        pop.times_activated[:] = [c.times_activated for c in cells]
+        pop.times_rested[:] = [c.times_rested for c in cells]
+        pop.ticks = max((c.age for c in cells), default=0)
+        return pop
+
+    def __len__(self):
+        return self.n
+
+    def set_param(self, name, value):
+        """change one of cognicell.PARAMS for everyone (scalar) or per cell (array)."""
+        if name not in cognicell.PARAMS:
+            raise TypeError(f"unknown cell parameter: {name}")
+        if np.ndim(value) == 0:
+            value = float(value)
+        else:
+            value = np.array(np.broadcast_to(value, (self.n,)), dtype=np.float64)
+        setattr(self, name, value)
+
+    def instrument(self, on=True):
+        """
+        start (or stop, on=False) counting novelty, evictions and fatigue
+        saturation per cell and timing each phase of a step.
+
+        returns: the Instruments (see instruments.py), or None when off
+        """
+        self.instruments = Instruments(self.n) if on else None
+        return self.instruments
+
+    def record_inputs(self, path, meta=None):
+        """
+        start writing every input fed to feel / feel_some /
+        advance_constant / rest to `path`, for replay.replay and
+        replay.diverge. path=None stops (and closes the file).
+
+        returns: the InputRecorder, or None when off
+        """
+        if self.recorder is not None:
+            self.recorder.close()
+        self.recorder = InputRecorder(path, self.n, meta) if path is not None else None
+        return self.recorder
+
+    def _evicting(self, cells=None):
+        """which of these cells' next memory pushes an old one out."""
+        count = self.memories.count
+        if cells is not None:
+            count = count[cells]
+        return count >= self.memories.capacity
+
+    def feel(self, inputs):
+        """
+        every cell feels its input at once.
+
+        inputs: array with one input per cell (or a single value for all)
+
+        returns: a new array of activations (-1 to 1)
+        """
+        if self.recorder is not None:
+            self.recorder.feel(inputs)
+        inputs = np.broadcast_to(np.asarray(inputs, dtype=np.float64), (self.n,))
+        s = self._scratch
+        feeling = self._feeling
+        novel = self._novel
+        inst = self.instruments
+        if inst is not None:
+            started = time.perf_counter()
+
+        # everyone is older now
+        self.ticks += 1
+        self.age += 1
+        self.times_activated += 1
+
+        # what's new? big change = novelty boost for curious cells
+        np.subtract(inputs, self.last_input, out=s)
+        np.abs(s, out=s)
+        np.greater(s, self.novelty_threshold, out=novel)
+        if inst is not None:
+            inst.novelty += novel
+
+        # feeling = input * (1 + boost) if new, else input * 1 (which is
+        # exactly input). multiplying by the mask is much cheaper than a
+        # masked copy, and the same bits
+        np.multiply(self.curiosity, self.curiosity_boost, out=s)
+        np.multiply(s, novel, out=s)
+        s += 1.0
+        np.multiply(inputs, s, out=feeling)
+
+        # tired cells work worse
+        np.subtract(1.0, self.fatigue, out=s)
+        feeling *= s
+        activation = np.tanh(feeling)
+        self.activation = activation
+
+        # working makes us tired, the more active the more tired
+        np.abs(activation, out=s)
+        s *= self.tiredness_gain
+        s += self.tiredness_base
+        self.fatigue += s
+        if inst is not None:
+            inst.saturations += self.fatigue >= 1.0
+        np.minimum(self.fatigue, 1.0, out=self.fatigue)
+
+        # but we recover a tiny bit naturally
+        self.fatigue -= self.recovery
+        np.maximum(self.fatigue, 0.0, out=self.fatigue)
+        if inst is not None:
+            now = time.perf_counter()
+            inst.add_time('step', now - started)
+            started = now
+
+        # remember this moment (one stamp for the whole batch)
+        if self.memories is not None:
+            if inst is not None:
+                inst.evictions += self._evicting()   # one flag, or one per cell when sparse
+            stamp = self.ticks if self.clock is None else self.clock()
+            self.memories.append(inputs, activation, self.fatigue, stamp)
+
+        np.copyto(self.last_input, inputs)
+        if self.stats is not None:
+            self.stats.update(activation)
+        if inst is not None:
+            inst.add_time('recording', time.perf_counter() - started)
+        return activation
+
+    def _param(self, name, cells):
+        """a parameter for just these cells (a float when it's shared)."""
+        value = getattr(self, name)
+        return value[cells] if np.ndim(value) else value
+
+    def feel_some(self, cells, inputs):
+        """
+        only `cells` feel something this step; everyone else sits it out.
+
+        same rules as feel() (and cognicell.feel), gathered and scattered
+        for just those cells, so a step costs what it touches. needs
+        sparse=True when memories are on. idle cells don't age and don't
+        recover here - see scheduler.Scheduler for that.
+
+        cells: index array, no repeats
+        inputs: one per cell in `cells` (or one value for all of them)
+
+        returns: the activations of `cells`
+        """
+        if self.memories is not None and not isinstance(self.memories, SparseMemoryBank):
+            raise ValueError("stepping some cells needs a population made with sparse=True")
+        if self.stats is not None:
+            raise ValueError("track_stats needs everyone stepping together")
+        cells = np.asarray(cells, dtype=np.int64)
+        inputs = np.broadcast_to(np.asarray(inputs, dtype=np.float64), cells.shape)
+        if self.recorder is not None:
+            self.recorder.some(cells, inputs)
+        inst = self.instruments
+        if inst is not None:
+            started = time.perf_counter()
+
+        self.ticks += 1
+        self.age[cells] += 1
+        self.times_activated[cells] += 1
+
+        novel = np.abs(inputs - self.last_input[cells]) > self._param('novelty_threshold', cells)
+        if inst is not None:
+            inst.novelty[cells] += novel
+        s = self.curiosity[cells] * self._param('curiosity_boost', cells)
+        s *= novel
+        s += 1.0
+        feeling = inputs * s
+        fatigue = self.fatigue[cells]
+        feeling *= 1.0 - fatigue
+        activation = np.tanh(feeling)
+
+        s = np.abs(activation)
+        s *= self._param('tiredness_gain', cells)
+        s += self._param('tiredness_base', cells)
+        fatigue += s
+        if inst is not None:
+            inst.saturations[cells] += fatigue >= 1.0
+        np.minimum(fatigue, 1.0, out=fatigue)
+        fatigue -= self._param('recovery', cells)
+        np.maximum(fatigue, 0.0, out=fatigue)
+
+        self.activation[cells] = activation
+        self.fatigue[cells] = fatigue
+        self.last_input[cells] = inputs
+        if inst is not None:
+            now = time.perf_counter()
+            inst.add_time('step', now - started)
+            started = now
+        if self.memories is not None:
+            if inst is not None:
+                inst.evictions[cells] += self._evicting(cells)
+            stamp = self.ticks if self.clock is None else self.clock()
+            self.memories.append_some(cells, inputs, activation, fatigue, stamp)
+        if inst is not None:
+            inst.add_time('recording', time.perf_counter() - started)
+        return activation
+
+    def advance_constant(self, inputs, steps):
+        """
+        everyone feels the same input (their own, or one shared) for
+        `steps` steps. same end state as calling feel() in a loop.
+
+        steps are only lived until every cell's fatigue stops moving
+        (see cognicell.feel_constant); after that they are all identical,
+        so we bump the counters and write at most one ring's worth of
+        memories instead.
+
+        returns: the activations after the last step
+        """
+        inputs = np.broadcast_to(np.asarray(inputs, dtype=np.float64), (self.n,))
+        activation = self.activation
+
+        inst = self.instruments
+        recorder, self.recorder = self.recorder, None   # all of it is one recorded frame
+        if recorder is not None:
+            recorder.constant(inputs, steps)
+        done = 0
+        try:
+            while done < steps:
+                settled = np.array_equal(self.last_input, inputs)
+                fatigue_before = self.fatigue.copy()
+                if inst is not None:
+                    saturated_before = inst.saturations.copy()
+                activation = self.feel(inputs)
+                done += 1
+
+                if settled and np.array_equal(self.fatigue, fatigue_before):
+                    break
+        finally:
+            self.recorder = recorder
+
+        left = steps - done
+        if left > 0:
+            self.ticks += left
+            self.age += left
+            self.times_activated += left
+            if inst is not None:
+                # the skipped steps are the last one again: same saturations, no novelty
+                inst.saturations += (inst.saturations - saturated_before) * left
+                if self.memories is not None:
+                    count = np.broadcast_to(self.memories.count, (self.n,))
+                    inst.evictions += np.maximum(0, count + left - self.max_memories)
+            if self.memories is not None:
+                keep = min(left, self.max_memories)
+                if self.clock is None:
+                    stamps = np.arange(self.ticks - keep + 1, self.ticks + 1, dtype=np.float64)
+                else:
+                    stamps = self.clock.advance(left, keep)
+                self.memories.repeat(inputs, activation, self.fatigue, stamps, keep,
+                                     skipped=left - keep)
+            if self.stats is not None:
+                self.stats.update_repeat(activation, left)
+
+        return activation
+
+    # reductions feel_sequence knows, and what each starts from
+    _REDUCE = {'sum': 0.0, 'mean': 0.0, 'min': np.inf, 'max': -np.inf}
+    SEQUENCE_BLOCK = 16384   # ~1 mb of working state per block: fits l2, and few enough python calls
+
+    def feel_sequence(self, inputs, trace=('activation', 'fatigue'), reduce=(), block=None):
+        """
+        live a whole input schedule in one call: T steps of feel(), fused.
+
+        inputs: (T, n) - one row per step - or (T,) for one value per
+                step shared by everyone
+        trace: which (T, n) matrices to return, of 'activation' and
+               'fatigue'. () for long schedules where the reductions are
+               all you need
+        reduce: per-cell reductions over the T steps, as 'field.op' with
+                op one of sum, mean, min, max - e.g. ('activation.mean',
+                'fatigue.max')
+        block: cells walked through all T steps together (default
+               SEQUENCE_BLOCK). feel() streams every array of all n cells
+               through memory each step; here a block's state stays in
+               cache for the whole schedule, and memory only sees the
+               inputs going in and the traces coming out
+
+        same end state as feel() row by row, bit for bit: activations,
+        fatigue, counters, stats, instruments and memories (so the
+        recent average too). a dense ring is written by the kernel
+        itself, a block of cells at a time while that part of the row is
+        in cache; sparse and consolidated banks get the last ring's worth
+        of steps afterwards through extend().
+
+        returns: {name: array} for everything in trace and reduce
+        """
+        inputs = np.asarray(inputs, dtype=np.float64)
+        if inputs.ndim == 1:
+            inputs = np.broadcast_to(inputs[:, None], (len(inputs), self.n))
+        if inputs.ndim != 2 or inputs.shape[1] != self.n:
+            raise ValueError(f"inputs should be (steps, {self.n}), got {inputs.shape}")
+        steps = len(inputs)
+        for name in trace:
+            if name not in ('activation', 'fatigue'):
+                raise ValueError(f"can only trace activation and fatigue, not {name}")
+        reductions = []
+        for name in reduce:
+            field, _, op = name.partition('.')
+            if field not in ('activation', 'fatigue') or op not in self._REDUCE:
+                raise ValueError(f"unknown reduction: {name}")
+            reductions.append((name, field, op))
+        if self.recorder is not None:
+            for row in inputs:
+                self.recorder.feel(row)
+        inst = self.instruments
+        if inst is not None:
+            started = time.perf_counter()
+
+        out = {name: np.empty((steps, self.n)) for name in trace}
+        for name, field, op in reductions:
+            out[name] = np.full(self.n, self._REDUCE[op])
+        if not steps:
+            return out
+
+        # what has to outlive the kernel: the memories' last window, stats
+        memories, keep, ring = self.memories, 0, None
+        if memories is not None:
+            stored = min(steps, self.max_memories)
+            if self.clock is None:
+                stamps = np.arange(self.ticks + steps - stored + 1, self.ticks + steps + 1,
+                                   dtype=np.float64)
+            else:
+                stamps = self.clock.advance(steps, stored)
+            tail = min(steps, 2 * memories.window - 1)   # what the running window sum needs
+            if isinstance(memories, MemoryBank) and memories.tiers is None:
+                ring = (memories.rows_for(steps), np.broadcast_to(stamps, (stored,)))
+                before = memories.window_tail()
+            else:
+                keep = max(stored, tail)
+                if memories.tiers is not None:
+                    keep = steps   # the rest get folded, so they're needed too
+        need = {'activation': keep, 'fatigue': keep} if keep else {}
+        if ring is not None:
+            need['activation'] = tail
+        if self.stats is not None:
+            need['activation'] = steps
+        history = {field: out[field][steps - length:] if field in out else np.empty((length, self.n))
+                   for field, length in need.items()}
+
+        block = int(block or self.SEQUENCE_BLOCK)
+        final = np.empty(self.n)
+        for lo in range(0, self.n, block):
+            cells = slice(lo, min(lo + block, self.n))
+            self._feel_block(inputs, cells, out, history, reductions, final, ring)
+
+        self.ticks += steps
+        self.age += steps
+        self.times_activated += steps
+        np.copyto(self.last_input, inputs[-1])
+        self.activation = final
+        for name, field, op in reductions:
+            if op == 'mean':
+                out[name] /= steps
+        if inst is not None:
+            now = time.perf_counter()
+            inst.add_time('step', now - started)
+            started = now
+
+        if memories is not None:
+            if inst is not None:
+                count = np.broadcast_to(memories.count, (self.n,))
+                inst.evictions += np.maximum(0, count + steps - memories.capacity)
+            if ring is not None:
+                memories.filled(ring[0], steps,
+                                np.concatenate([before, history['activation'][-tail:]]))
+            else:
+                memories.extend(inputs[steps - keep:], history['activation'][-keep:],
+                                history['fatigue'], stamps, steps)
+        if self.stats is not None:
+            for row in history['activation']:
+                self.stats.update(row)
+        if inst is not None:
+            inst.add_time('recording', time.perf_counter() - started)
+        return out
+
+    def _feel_block(self, inputs, cells, out, history, reductions, final, ring=None):
+        """
+        every step of the schedule for one block of cells (feel_sequence's
+        kernel). ring: (rows, stamps) when it writes the dense bank itself.
+        """
+        m = cells.stop - cells.start
+        s, feeling, novel = self._scratch[:m], self._feeling[:m], self._novel[:m]
+        threshold = self._param('novelty_threshold', cells)
+        boost = self.curiosity[cells] * self._param('curiosity_boost', cells)
+        gain = self._param('tiredness_gain', cells)
+        base = self._param('tiredness_base', cells)
+        recovery = self._param('recovery', cells)
+        fatigue = self.fatigue[cells]
+        last = self.last_input[cells]
+        activation = np.empty(m)
+        inst = self.instruments
+        if inst is not None:
+            novelty, saturations = inst.novelty[cells], inst.saturations[cells]
+        traced = {field: out[field][:, cells] for field in ('activation', 'fatigue') if field in out}
+        steps = len(inputs)
+        kept = [(field, rows[:, cells], steps - len(rows))   # untraced steps worth keeping
+                for field, rows in history.items() if field not in out]
+        reduced = [(out[name][cells], field, op) for name, field, op in reductions]
+        if ring is not None:
+            records = self.memories.records
+            landing, stamps = ring[0].tolist(), ring[1].tolist()
+            ring_inputs, ring_outputs, ring_fatigue, ring_time = (
+                records[name][:, cells] for name in ('input', 'output', 'fatigue', 'time'))
+            first = steps - len(landing)   # steps before this don't land in the ring
+
+        for t in range(steps):
+            x = inputs[t, cells]
+            # exactly feel(), for m cells
+            np.subtract(x, last, out=s)
+            np.abs(s, out=s)
+            np.greater(s, threshold, out=novel)
+            if inst is not None:
+                novelty += novel
+            np.multiply(boost, novel, out=s)
+            s += 1.0
+            np.multiply(x, s, out=feeling)
+            np.subtract(1.0, fatigue, out=s)
+            feeling *= s
+            np.tanh(feeling, out=activation)
+
+            np.abs(activation, out=s)
+            s *= gain
+            s += base
+            fatigue += s
+            if inst is not None:
+                saturations += fatigue >= 1.0
+            np.minimum(fatigue, 1.0, out=fatigue)
+            fatigue -= recovery
+            np.maximum(fatigue, 0.0, out=fatigue)
+            last = x
+
+            now = {'activation': activation, 'fatigue': fatigue}
+            for field, rows in traced.items():
+                rows[t] = now[field]
+            for field, rows, skip in kept:
+                if t >= skip:
+                    rows[t - skip] = now[field]
+            for total, field, op in reduced:
+                if op in ('sum', 'mean'):
+                    total += now[field]
+                elif op == 'min':
+                    np.minimum(total, now[field], out=total)
+                else:
+                    np.maximum(total, now[field], out=total)
+            if ring is not None and t >= first:
+                row = landing[t - first]
+                ring_inputs[row] = x
+                ring_outputs[row] = activation
+                ring_fatigue[row] = fatigue
+                ring_time[row] = stamps[t - first]
+        final[cells] = activation
+
+    def rest(self, which=None):
+        """
+        let cells take a break (all of them, or a mask / index array).
+        """
+        if self.recorder is not None:
+            self.recorder.rest(which)
+        if which is None:
+            which = slice(None)
+        amount = self.rest_amount
+        if np.ndim(amount):
+            amount = amount[which]
+        self.fatigue[which] = np.maximum(0.0, self.fatigue[which] - amount)
+        self.times_rested[which] += 1
+
+    def index_memories(self, bins=32):
+        """
+        start keeping everyone's memories indexed for recall() (see
+        recall.py). costs one small sort of n per step from now on.
+
+        returns: the RecallIndex
+        """
+        if self.memories is None:
+            raise ValueError("this population has no memories to index")
+        self.memories.index = RecallIndex(self.memories, bins=bins)
+        return self.memories.index
+
+    def recall(self, input_signal, output=None, fatigue=None, k=10, cells=None, scale=None):
+        """
+        the k memories closest to (input, output, fatigue), closest first.
+        leave output / fatigue out to ignore them.
+
+        cells: only look at these cells' memories (a scan - cheap for a
+               few). None = everyone, through the index if there is one
+        scale: weight per field (input, output, fatigue) in the distance
+
+        returns: dict of arrays - cell, input, output, fatigue, time, distance
+        """
+        if self.memories is None:
+            raise ValueError("this population has no memories")
+        index = getattr(self.memories, 'index', None)
+        if cells is None and index is not None:
+            return index.query(input_signal, output, fatigue, k, scale)
+        return scan(self.memories, input_signal, output, fatigue, k, scale, cells)
+
+    def how_are_you(self, i):
+        """
+        ask one cell how it's doing, same shape as cognicell.how_are_you.
+
+        for polling lots of cells use status_arrays() instead.
+        """
+        if self.memories is None:
+            memories = 0
+        else:
+            count = self.memories.count
+            memories = int(count[i]) if np.ndim(count) else count
+        k = min(self.memories.window, memories) if memories else 0
+
+        status = {
+            'id': self.ids[i].item(),
+            'feeling': float(self.activation[i]),
+            'tired': float(self.fatigue[i]),
+            'curious': float(self.curiosity[i]),
+            'age': int(self.age[i]),
+            'memories': memories,
+            'avg_feeling': float(self.memories.window_sum[i]) / k if k else 0.0,
+        }
+
+        if self.stats is not None:
+            status['ewma_feeling'] = float(self.stats.ewma[i])
+            status['min_feeling'] = float(self.stats.min[i])
+            status['max_feeling'] = float(self.stats.max[i])
+            status['var_feeling'] = float(self.stats.m2[i]) / self.stats.n if self.stats.n else 0.0
+
+        return status
+
+    def status_arrays(self):
+        """
+        how everyone is doing, as numpy columns - no per-cell dicts.
+
+        same keys as cognicell.how_are_you, one array each ('memories' is
+        the same for everyone). reads running aggregates, so polling a
+        million cells is a handful of vectorized reads.
+        """
+        if self.memories is not None:
+            memories = np.array(np.broadcast_to(self.memories.count, (self.n,)))
+            avg_out = self.memories.recent_mean()
+        else:
+            memories = np.zeros(self.n, dtype=np.int64)
+            avg_out = np.zeros(self.n)
+
+        status = {
+            'id': self.ids,
+            'feeling': self.activation,
+            'tired': self.fatigue,
+            'curious': self.curiosity,
+            'age': self.age,
+            'memories': memories,
+            'avg_feeling': avg_out,
+        }
+
+        if self.stats is not None:
+            status['ewma_feeling'] = self.stats.ewma
+            status['min_feeling'] = self.stats.min
+            status['max_feeling'] = self.stats.max
+            status['var_feeling'] = self.stats.variance
+
+        return status
+
+    def __str__(self):
+        return (f"population of {self.n}: feeling={self.activation.mean():.2f}, "
+                f"tired={self.fatigue.mean():.2f}")
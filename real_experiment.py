@@ -1,65 +1,202 @@
 """
 real_experiment.py
 actual experiments - not theory, real data.
+
+    python real_experiment.py                          # the full suite, with plots
+    python -m real_experiment --trials 200 --workers 8 --no-plot
+    python real_experiment.py --headless               # save the png, never open a window
+    python real_experiment.py --sequential group       # stop curiosity trials early
+    python real_experiment.py --profile prof/          # cProfile each experiment
+
+matplotlib only gets imported when a plot is actually asked for, and
+p-values are computed in pure python (sequential.t_pvalue) - importing
+this module (which every worker process does) just needs numpy.
 """
-import random
-import time
+import argparse
+import functools
+import zlib
 import numpy as np
-import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
 try:
     from cognicell import cognicell
-    print("✓ loaded cognicell")
 except ImportError:
     print("✗ can't find cognicell.py")
     exit(1)
 
-try:
-    from scipy import stats
-    print("✓ scipy ready for stats")
-except ImportError:
-    print("⚠ no scipy - will skip p-values")
-    stats = None
+from instruments import profiled
+from online_stats import Covariance, Histogram, Moments, merge_all
+from sequential import GroupSequentialTest, SPRT, paired_t, plan_trials
+
+
+def pyplot(headless=False):
+    """
+    matplotlib.pyplot, imported on first use.
+    headless: use the Agg backend - files only, no window, safe on a cluster
+    """
+    import matplotlib
+    if headless:
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
+# -------------------------------------------------------------------
+# trials - module level so worker processes can run them
+# -------------------------------------------------------------------
+
+def homeostasis_trial(trial, seed, cycles=50):
+    """
+    one fresh cell worked hard.
+    returns: activation vs fatigue as a Covariance (constant memory, any cycles)
+    """
+    rng = np.random.default_rng(seed)
+    cell = cognicell(id=f"homeo_{trial}", quiet=True, rng=rng)
+    
+    act_vs_fatigue = Covariance()
+    
+    # work it hard with same input
+    for cycle in range(cycles):
+        act = cell.feel(0.7)
+        act_vs_fatigue.update(act, cell.fatigue)
+    
+    # correlation tells the story
+    return act_vs_fatigue
+
+
+def curiosity_trial(trial, seed):
+    """
+    a barely-curious and a very curious cell see the same new thing.
+    returns: (low response, high response)
+    """
+    rng = np.random.default_rng(seed)
+    
+    # extreme personalities
+    low = cognicell(id=f"low_{trial}", curiosity=0.1, quiet=True)
+    high = cognicell(id=f"high_{trial}", curiosity=0.9, quiet=True)
+    
+    # baseline - a bit different every trial so the stats have spread
+    calm = rng.uniform(0.1, 0.3)
+    low.feel(calm)
+    high.feel(calm)
+    
+    # big change (triggers curiosity)
+    new = rng.uniform(0.7, 1.0)
+    return low.feel(new), high.feel(new)
+
+
+def _ratio(low, high):
+    return high / low if low != 0 else 1.0
+
+
+def individuality_trial(trial, seed, cycles=50):
+    """one cell with a random personality lives a varied life."""
+    rng = np.random.default_rng(seed)
+    cur = float(rng.uniform(0.1, 0.9))
+    cell = cognicell(id=f"indiv_{trial}", curiosity=cur, quiet=True)
+    
+    acts = Moments()
+    spread = Histogram(-1.0, 1.0, bins=80)
+    for cycle in range(cycles):
+        # varied life
+        if cycle < 20:
+            inp = 0.3 + 0.4 * rng.random()
+        else:
+            inp = 0.5 + 0.3 * rng.random()
+        act = cell.feel(inp)
+        acts.update(act)
+        spread.update(act)
+    
+    return {
+        'curiosity': cur,
+        'avg_act': acts.mean,
+        'final_fatigue': cell.fatigue,
+        'acts': acts,
+        'hist': spread
+    }
+
+
+def run_trials(trial, trials, seed=0, workers=1, start=0, **kwargs):
+    """
+    run independent trials, maybe across processes.
+    
+    trial: a module-level function (trial_number, seed_sequence) -> result.
+           it should draw everything random from
+           np.random.default_rng(seed_sequence), never from a global
+    seed: master seed (int, list of ints or SeedSequence). trial i always
+          gets the same child from SeedSequence.spawn, so results are
+          identical no matter how many workers run
+    workers: processes to use (1 = run right here)
+    start: number of the first trial - run trials 0-9, then 10-19, and
+           get exactly what one run of 0-19 would have
+    kwargs: passed on to every trial (e.g. cycles=1_000_000)
+    
+    returns: results in trial order
+    """
+    if kwargs:
+        trial = functools.partial(trial, **kwargs)
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    # child i, exactly as seed.spawn would hand it out - but without
+    # depending on how many children were spawned before
+    numbers = range(start, start + trials)
+    seeds = [np.random.SeedSequence(seed.entropy, spawn_key=seed.spawn_key + (i,),
+                                    pool_size=seed.pool_size) for i in numbers]
+    
+    if workers <= 1 or trials <= 1:
+        return [trial(i, s) for i, s in zip(numbers, seeds)]
+    
+    # big chunks: per-trial work is tiny, pickling isn't
+    chunksize = max(1, trials // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(trial, numbers, seeds, chunksize=chunksize))
 
 
 class real_experiment:
     """run actual experiments, collect real data."""
     
-    def __init__(self):
-        random.seed(int(time.time() * 1000) % 1000000)
+    def __init__(self, seed=None, workers=1, profile=None):
+        """
+        seed: master seed for every trial - an int, or a numpy Generator
+              to draw one from (None = fresh os entropy, printed so the
+              run can be repeated)
+        workers: how many processes to spread trials over
+        profile: directory to save a cProfile dump per experiment in
+                 (None = no profiling, no overhead)
+        """
+        if seed is None:
+            seed = np.random.SeedSequence().entropy
+        elif isinstance(seed, np.random.Generator):
+            seed = int(seed.integers(2**63))
+        self.seed = int(seed)
+        self.workers = workers
+        self.profile = profile
         self.data = []
         self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
         print(f"\n{'='*60}")
         print("cognicell real experiments")
         print(f"started: {self.timestamp}")
+        print(f"seed: {self.seed}, workers: {self.workers}")
         print(f"{'='*60}")
     
-    def test_homeostasis(self, trials=5):
+    def _run(self, name, trial, trials, start=0, **kwargs):
+        """run one experiment's trials with its own stream off the master seed."""
+        key = zlib.crc32(name.encode())  # same experiment -> same stream, every run
+        return run_trials(trial, trials, seed=[self.seed, key], workers=self.workers,
+                          start=start, **kwargs)
+    
+    def test_homeostasis(self, trials=5, cycles=50):
         """do cells get tired and work less?"""
         print("\n🔬 test 1: homeostasis")
         print("   do tired cells work worse?")
         
-        results = []
+        accs = self._run('homeostasis', homeostasis_trial, trials, cycles=cycles)
+        results = [acc.correlation for acc in accs]
+        pooled = merge_all(accs)  # every step of every trial, as if one stream
         
-        for trial in range(trials):
-            # fresh cell each trial
-            cell = cognicell(id=f"homeo_{trial}")
-            
-            acts = []
-            fats = []
-            
-            # work it hard with same input
-            for cycle in range(50):
-                act = cell.feel(0.7)
-                acts.append(act)
-                fats.append(cell.fatigue)
-            
-            # correlation tells the story
-            corr = np.corrcoef(acts, fats)[0,1]
-            results.append(corr)
-            
+        for trial, corr in enumerate(results):
             status = "✓" if corr < -0.3 else "⚠" if corr < 0 else "✗"
             print(f"   trial {trial+1}: corr={corr:.3f} {status}")
         
@@ -67,75 +204,107 @@ class real_experiment:
         avg_corr = np.mean(results)
         success = avg_corr < -0.5
         
-        print(f"\n   📊 {trials} trials: avg corr={avg_corr:.3f}")
+        print(f"\n   📊 {trials} trials: avg corr={avg_corr:.3f} "
+              f"(pooled over {pooled.n} steps: {pooled.correlation:.3f})")
         print(f"   ✓ homeostasis strong" if success else "   ⚠ effect weak")
         
         self.data.append({
             'name': 'homeostasis',
             'avg_corr': avg_corr,
+            'pooled_corr': pooled.correlation,
             'trials': results,
             'success': success
         })
         
         return success
     
-    def test_curiosity(self, trials=10):
-        """do curious cells notice new things more?"""
+    def test_curiosity(self, trials=10, sequential=None, alpha=0.05, power=0.8, looks=5):
+        """
+        do curious cells notice new things more?
+        
+        both cells in a trial see the same stimuli, so the test is a paired
+        t-test on (high response - low response) across trials.
+        
+        sequential: None - run all `trials`, then test
+                    'group' - look `looks` times (fewer if there aren't 2
+                              trials per look), stop once p < alpha/looks
+                    'sprt' - check after every trial whether high beat low
+                    either way `trials` is the most that will run
+        """
         print("\n🔬 test 2: curiosity effect")
         print("   high curiosity = bigger response to new stuff?")
         
-        ratios = []
+        if sequential is None:
+            pairs = self._run('curiosity', curiosity_trial, trials)
+            diffs = Moments()
+            for low, high in pairs:
+                diffs.update(high - low)
+            t, p = paired_t(diffs)
+            seq = None
+        else:
+            pairs, seq = self._run_sequential(sequential, trials, alpha, power, looks)
+            p = seq['p_adjusted'] if sequential == 'group' else seq['p']
+        ratios = [_ratio(low, high) for low, high in pairs]
         
-        for trial in range(trials):
-            # extreme personalities
-            low = cognicell(id=f"low_{trial}", curiosity=0.1)
-            high = cognicell(id=f"high_{trial}", curiosity=0.9)
-            
-            # baseline
-            low.feel(0.2)
-            high.feel(0.2)
-            
-            # big change (triggers curiosity)
-            low_new = low.feel(0.9)
-            high_new = high.feel(0.9)
-            
-            # ratio
-            ratio = high_new / low_new if low_new != 0 else 1.0
-            ratios.append(ratio)
-            
+        for trial, ratio in enumerate(ratios[:10]):
             symbol = "↑↑" if ratio > 1.3 else "↑" if ratio > 1.1 else "→"
             print(f"   trial {trial+1}: {ratio:.2f}x {symbol}")
+        if len(ratios) > 10:
+            print(f"   ... {len(ratios) - 10} more")
         
         # stats
         avg_ratio = np.mean(ratios)
+        print(f"\n   📊 stats: avg={avg_ratio:.2f}x over {len(pairs)} trials, p={p:.4g}")
+        if seq is not None:
+            print(f"   sequential ({sequential}): '{seq['decision']}' after "
+                  f"{seq['trials']} of at most {trials} trials")
         
-        if stats:
-            # t-test if we have scipy
-            low_vals = [0.677] * len(ratios)  # typical low response
-            high_vals = [0.813] * len(ratios)  # typical high response
-            t, p = stats.ttest_ind(high_vals, low_vals)
-            print(f"\n   📊 stats: avg={avg_ratio:.2f}x, p={p:.4f}")
-        else:
-            print(f"\n   📊 avg ratio: {avg_ratio:.2f}x")
-        
-        success = avg_ratio > 1.1
+        success = avg_ratio > 1.1 and p < alpha
         print(f"   ✓ curiosity works" if success else "   ⚠ effect weak")
         
         self.data.append({
             'name': 'curiosity',
             'avg_ratio': avg_ratio,
             'ratios': ratios,
+            'p': p,
+            'sequential': seq,
             'success': success
         })
         
         return success
     
+    def _run_sequential(self, kind, max_trials, alpha, power, looks):
+        """feed curiosity trials to a sequential test until it decides."""
+        if kind == 'group':
+            # every look needs 2 trials: a short run just looks less often
+            looks = max(1, min(looks, max_trials // 2))
+            test = GroupSequentialTest(alpha=alpha, looks=looks, max_trials=max_trials)
+            batch = test.next_batch
+        elif kind == 'sprt':
+            test = SPRT(alpha=alpha, power=power, max_trials=max_trials)
+            # small batches keep the workers busy without overshooting much
+            batch = lambda: min(max(2, 2 * self.workers), max_trials - test.trials)
+        else:
+            raise ValueError(f"unknown sequential test: {kind}")
+        
+        pairs = []
+        while test.decision is None:
+            new = self._run('curiosity', curiosity_trial, batch(), start=len(pairs))
+            if kind == 'group':
+                test.update(high - low for low, high in new)
+            else:
+                test.update(high > low for low, high in new)
+            pairs.extend(new)
+        
+        result = test.result()
+        return pairs[:result['trials']], result
+    
     def test_memory(self):
         """does memory system actually work?"""
         print("\n🔬 test 3: memory system")
         print("   remembers 100 things, forgets old ones")
         
-        cell = cognicell(id="memory_test")
+        cell = cognicell(id="memory_test", quiet=True)
         
         # overflow the buffer
         for i in range(150):
@@ -165,48 +334,28 @@ class real_experiment:
         
         return success
     
-    def test_individuality(self, n_cells=5):
+    def test_individuality(self, n_cells=5, cycles=50):
         """do different cells develop differently?"""
         print(f"\n🔬 test 4: individuality ({n_cells} cells)")
         print("   different curiosity → different life?")
         
-        cells = []
-        
-        # create diverse cells
-        for i in range(n_cells):
-            cur = random.uniform(0.1, 0.9)
-            cell = cognicell(id=f"indiv_{i}", curiosity=cur)
-            cells.append((cell, cur))
-        
-        # let them live
-        patterns = []
-        for cell, curiosity in cells:
-            acts = []
-            for cycle in range(50):
-                # varied life
-                if cycle < 20:
-                    inp = 0.3 + 0.4 * random.random()
-                else:
-                    inp = 0.5 + 0.3 * random.random()
-                acts.append(cell.feel(inp))
-            
-            patterns.append({
-                'curiosity': curiosity,
-                'avg_act': np.mean(acts),
-                'final_fatigue': cell.fatigue
-            })
+        # diverse cells, each living its own life (one trial per cell)
+        patterns = self._run('individuality', individuality_trial, n_cells, cycles=cycles)
         
         # analyze
         curiosities = [p['curiosity'] for p in patterns]
         avg_acts = [p['avg_act'] for p in patterns]
         
-        if len(curiosities) > 1:
-            corr = np.corrcoef(curiosities, avg_acts)[0,1]
-        else:
-            corr = 0
+        personality = Covariance()
+        for p in patterns:
+            personality.update(p['curiosity'], p['avg_act'])
+        corr = personality.correlation if n_cells > 1 else 0
+        everyone = merge_all(p['hist'] for p in patterns)
         
         print(f"   curiosity range: {min(curiosities):.2f}-{max(curiosities):.2f}")
         print(f"   act range: {min(avg_acts):.3f}-{max(avg_acts):.3f}")
+        print(f"   all activations: median {everyone.quantile(0.5):.3f}, "
+              f"10-90% {everyone.quantile(0.1):.3f}-{everyone.quantile(0.9):.3f}")
         print(f"   correlation: {corr:.3f}")
         
         # success = there IS diversity
@@ -224,12 +373,16 @@ class real_experiment:
         
         return success
     
-    def plot_results(self):
-        """simple visualization of what we found."""
+    def plot_results(self, show=True):
+        """
+        simple visualization of what we found.
+        show: open a window too. False = headless (Agg), just save the png
+        """
         if not self.data:
             print("no data to plot")
             return
         
+        plt = pyplot(headless=not show)
         fig, axes = plt.subplots(2, 2, figsize=(10, 8))
         
         # plot 1: homeostasis correlations
@@ -274,7 +427,9 @@ class real_experiment:
         plt.tight_layout()
         plt.savefig(f'results_{self.timestamp}.png', dpi=150)
         print(f"\n📈 plot saved: results_{self.timestamp}.png")
-        plt.show()
+        if show:
+            plt.show()
+        plt.close(fig)
     
     def save_report(self):
         """save what we found."""
@@ -291,6 +446,7 @@ class real_experiment:
                     f.write(f"  avg correlation: {exp.get('avg_corr', 0):.3f}\n")
                 elif exp['name'] == 'curiosity':
                     f.write(f"  avg ratio: {exp.get('avg_ratio', 0):.2f}x\n")
+                    f.write(f"  p: {exp.get('p', float('nan')):.4g} ({len(exp.get('ratios', []))} trials)\n")
                 elif exp['name'] == 'memory':
                     f.write(f"  memories: {exp.get('mem_count', 0)}/100\n")
                 elif exp['name'] == 'individuality':
@@ -299,18 +455,31 @@ class real_experiment:
         
         print(f"📄 report saved: {filename}")
     
-    def run_all(self):
-        """run the full suite."""
+    def run_all(self, trials=None, plot=True, show=True, sequential=None):
+        """
+        run the full suite.
+        
+        trials: trials per experiment (None = 5 / 10 / 5 cells as usual)
+        plot: make the results png at all
+        show: open the plot in a window (False = headless)
+        sequential: 'group' or 'sprt' to let the curiosity test stop early
+                    (then trials is its cap; None = enough for a medium effect)
+        """
         print(f"\n{'='*60}")
         print("running all experiments...")
         print(f"{'='*60}")
         
-        results = {
-            'homeostasis': self.test_homeostasis(5),
-            'curiosity': self.test_curiosity(10),
-            'memory': self.test_memory(),
-            'individuality': self.test_individuality(5)
+        experiments = {
+            'homeostasis': lambda: self.test_homeostasis(trials or 5),
+            'curiosity': lambda: self.test_curiosity(
+                trials or (plan_trials(0.5, looks=5) if sequential else 10), sequential=sequential),
+            'memory': self.test_memory,
+            'individuality': lambda: self.test_individuality(trials or 5)
         }
+        results = {}
+        for name, experiment in experiments.items():
+            with profiled(f'{name}_{self.timestamp}', self.profile):
+                results[name] = experiment()
         
         print(f"\n{'='*60}")
         print("final results:")
@@ -326,28 +495,44 @@ class real_experiment:
         print(f"\n{passed}/{total} passed")
         
         # visualize and save
-        self.plot_results()
+        if plot:
+            self.plot_results(show=show)
         self.save_report()
         
         return results
 
 
-def main():
+def main(argv=None):
     """run experiments."""
+    parser = argparse.ArgumentParser(description="run the cognicell experiments")
+    parser.add_argument('--trials', type=int, help="trials per experiment (default 5 / 10 / 5)")
+    parser.add_argument('--workers', type=int, default=1, help="processes to spread trials over")
+    parser.add_argument('--seed', type=int, help="master seed (default: fresh, printed)")
+    parser.add_argument('--no-plot', action='store_true', help="skip the plot (matplotlib never loads)")
+    parser.add_argument('--headless', action='store_true', help="save the plot without opening a window")
+    parser.add_argument('--sequential', choices=('group', 'sprt'),
+                        help="stop curiosity trials as soon as the answer is in")
+    parser.add_argument('--profile', metavar='DIR',
+                        help="save a cProfile dump of each experiment in DIR")
+    args = parser.parse_args(argv)
+    if args.sequential and args.trials is not None and args.trials < 2:
+        parser.error("--sequential needs --trials of at least 2")
+    
     print("real experiments - collecting actual data")
     
-    # check for requirements
-    try:
-        import numpy as np
-        import matplotlib.pyplot as plt
-    except ImportError:
-        print("need numpy and matplotlib")
-        print("run: pip install numpy matplotlib")
-        return
+    plot = not args.no_plot
+    if plot:
+        try:
+            import matplotlib
+        except ImportError:
+            print("need matplotlib for plots")
+            print("run: pip install matplotlib (or pass --no-plot)")
+            return
     
     # run experiments
-    exp = real_experiment()
-    results = exp.run_all()
+    exp = real_experiment(seed=args.seed, workers=args.workers, profile=args.profile)
+    results = exp.run_all(trials=args.trials, plot=plot, show=not args.headless,
+                          sequential=args.sequential)
     
     # summary
     print(f"\n{'='*60}")
@@ -358,8 +543,11 @@ def main():
         print("⚠ some effects need more work")
     
     print("\ngenerated:")
-    print(f"  results_{exp.timestamp}.png")
+    if plot:
+        print(f"  results_{exp.timestamp}.png")
     print(f"  report_{exp.timestamp}.txt")
+    if args.profile:
+        print(f"  {args.profile}/*_{exp.timestamp}.prof")
 
 
 if __name__ == "__main__":
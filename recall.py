@@ -0,0 +1,263 @@
+"""
+recall.py
+"when did i last feel something like this?" - without reading every memory.
+
+a memory is a point (input, output, fatigue). recall finds the k memories
+closest to a query point, for one cell (a scan of its <= capacity
+memories is already cheap) or across a whole population, where a scan
+would read 100M records.
+
+for populations, RecallIndex keeps the MemoryBank sorted by grid bucket:
+the (input, output, fatigue) box is cut into bins^3 buckets, and every
+ring row (one step of everyone's memories) keeps its cells ordered by
+bucket, plus where each bucket starts:
+
+    row h:  order[h]  = cells of row h sorted by bucket
+            starts[h] = offset of each bucket in order[h]
+
+a step writes one row, so the index re-sorts just that row (a radix sort
+of n small ints) - which also drops whatever the row used to hold: the
+evicted memories leave the index the moment they leave the ring.
+
+a query visits buckets nearest-first. it only reads the memories in those
+buckets, and stops once no bucket left can hold anything closer than the
+k-th best found so far.
+
+    pop.index_memories()                       # opt in; kept up to date from now on
+    hits = pop.recall(0.8, output=0.6, k=5)    # across everyone
+    hits['cell'], hits['time'], hits['distance']
+    pop.recall(0.8, k=5, cells=[42])           # just cell 42 (no index needed)
+    cell.recall(0.8, k=3)                      # a lone cognicell
+
+leaving output or fatigue out means "any": that dimension doesn't count.
+
+what it costs (1M cells x 30 memories, one core): keeping the index
+up to date adds ~75 ms to a 50 ms step. a query on all three fields
+reads ~0.2M of the 30M memories, ~30-60 ms against ~3.5 s for a scan.
+a query that leaves fields out has to read every bucket along them (a
+whole slab of the grid), so it is only 3-5x faster than a scan. give
+such fields a small weight through `scale` instead when that's close
+enough.
+"""
+
+import numpy as np
+
+
+FIELDS = ('input', 'output', 'fatigue')
+RANGES = ((-1.0, 1.0), (-1.0, 1.0), (0.0, 1.0))   # values outside land in the edge bins
+
+
+def _query(input_signal, output, fatigue, scale):
+    """the query point and per-field weights (0 for fields left out)."""
+    point = np.array([input_signal, output or 0.0, fatigue or 0.0], dtype=np.float64)
+    weight = np.array(scale if scale is not None else (1.0, 1.0, 1.0), dtype=np.float64)
+    weight *= (1.0, output is not None, fatigue is not None)
+    return point, weight
+
+
+def _distance2(records, point, weight):
+    """weighted squared distance from each record to the query point."""
+    d2 = np.zeros(records.shape)
+    for name, p, w in zip(FIELDS, point, weight):
+        if w:
+            d2 += (w * (records[name] - p)) ** 2
+    return d2
+
+
+def _closest(d2, time, k):
+    """positions of the k smallest distances; ties go to the most recent."""
+    if len(d2) > k:
+        keep = np.argpartition(d2, k - 1)[:k]
+        # anything tied with the k-th best competes on recency too
+        tied = np.flatnonzero(d2 == d2[keep].max())
+        keep = np.union1d(keep, tied)
+    else:
+        keep = np.arange(len(d2))
+    return keep[np.lexsort((-time[keep], d2[keep]))][:k]
+
+
+def recall_ring(ring, input_signal, output=None, fatigue=None, k=5, scale=None):
+    """
+    the k memories of one MemoryRing closest to the query, closest first.
+    returns: their slots in ring.records
+    """
+    slots = ring._order()
+    if not len(slots) or k <= 0:
+        return slots[:0]
+    point, weight = _query(input_signal, output, fatigue, scale)
+    records = ring.records[slots]
+    return slots[_closest(_distance2(records, point, weight), records['time'], k)]
+
+
+def _hits(records, cells, d2):
+    """the columns a population query returns."""
+    return {
+        'cell': cells,
+        'input': records['input'],
+        'output': records['output'],
+        'fatigue': records['fatigue'],
+        'time': records['time'],
+        'distance': np.sqrt(d2),
+    }
+
+
+def scan(bank, input_signal, output=None, fatigue=None, k=10, scale=None, cells=None):
+    """
+    the k closest memories of `cells` (default: everyone) by reading them
+    all - fine for a few cells, the slow path for a population.
+    """
+    point, weight = _query(input_signal, output, fatigue, scale)
+    cells = np.arange(bank.n) if cells is None else np.atleast_1d(np.asarray(cells, dtype=np.int64))
+    if np.ndim(bank.count):   # sparse bank: a ring per cell
+        count, head = bank.count[cells], bank.head[cells]
+        back = np.arange(1, bank.capacity + 1)[:, None]
+        rows = (head - back) % bank.capacity
+        valid = back <= count
+        rows, owners = rows[valid], np.broadcast_to(cells, valid.shape)[valid]
+    else:
+        rows = (bank.head - 1 - np.arange(bank.count)) % bank.capacity
+        owners = np.broadcast_to(cells, (len(rows), len(cells))).ravel()
+        rows = np.repeat(rows, len(cells))
+    records = bank.records[rows, owners]
+    d2 = _distance2(records, point, weight)
+    best = _closest(d2, records['time'], k)
+    return _hits(records[best], owners[best], d2[best])
+
+
+class RecallIndex:
+    """a MemoryBank's rows kept sorted by grid bucket, updated on every write."""
+
+    FINE = 1024   # resolution bins are fitted at, per field
+
+    def __init__(self, bank, bins=32, ranges=RANGES):
+        """
+        bank: the (dense) MemoryBank to index - it calls back on every write
+        bins: buckets per field (bins^3 in all, at most 40). more bins =
+              fewer memories read per query, bigger starts table
+        ranges: (lo, hi) per field; outside values go to the edge bins
+
+        bins are fitted to the memories already there (equal counts per
+        bin, per field), so index a population after it has lived a bit -
+        or call refit() once it has.
+        """
+        if np.ndim(bank.count):
+            raise ValueError("the recall index needs a dense MemoryBank (sparse=False) "
+                             "- use scan() for sparse populations")
+        if not 1 <= bins <= 40:
+            raise ValueError("bins must be 1-40")
+        self.bank = bank
+        self.bins = int(bins)
+        self.buckets = self.bins ** 3
+        self.ranges = np.asarray(ranges, dtype=np.float64)
+        self.fine_width = (self.ranges[:, 1] - self.ranges[:, 0]) / self.FINE
+
+        self.order = np.zeros((bank.capacity, bank.n), dtype=np.int32)
+        self.starts = np.zeros((bank.capacity, self.buckets + 1), dtype=np.int32)
+        self.refit()
+
+    def _fine(self, values, field):
+        fine = np.floor((values - self.ranges[field, 0]) / self.fine_width[field])
+        return np.clip(fine, 0, self.FINE - 1).astype(np.intp)
+
+    def refit(self):
+        """
+        move the bin edges so every bin of every field holds about the
+        same number of memories, and re-sort every row. O(memories).
+        """
+        rows = self.bank._order()
+        # up to ~1M memories, spread over every row, are plenty to place the edges
+        cells = np.arange(0, self.bank.n, max(1, len(rows) * self.bank.n // 1_000_000))
+        sample = self.bank.records[rows[:, None], cells[None, :]].ravel()
+        self.lut, self.edges = [], []
+        for field, name in enumerate(FIELDS):
+            counts = np.bincount(self._fine(sample[name], field), minlength=self.FINE)
+            if counts.sum():
+                before = np.cumsum(counts) - counts
+                lut = np.minimum(before * self.bins // counts.sum(), self.bins - 1)
+            else:
+                lut = np.arange(self.FINE) * self.bins // self.FINE
+            lut = lut.astype(np.uint16)
+            self.lut.append(lut)
+
+            # each bin's [lo, hi); bins no fine cell maps to stay empty (nan)
+            fine_lo = self.ranges[field, 0] + self.fine_width[field] * np.arange(self.FINE)
+            lo = np.full(self.bins, np.nan)
+            hi = np.full(self.bins, np.nan)
+            np.fmin.at(lo, lut, fine_lo)
+            np.fmax.at(hi, lut, fine_lo + self.fine_width[field])
+            lo[lut[0]], hi[lut[-1]] = -np.inf, np.inf   # edge bins hold the outliers too
+            self.edges.append((lo, hi))
+        self.insert(rows)
+
+    def insert(self, rows):
+        """re-sort these ring rows (just written - whatever was there is gone)."""
+        records = self.bank.records
+        for h in np.atleast_1d(rows):
+            row = records[h]
+            key = self.lut[0][self._fine(row['input'], 0)]
+            key *= self.bins
+            key += self.lut[1][self._fine(row['output'], 1)]
+            key *= self.bins
+            key += self.lut[2][self._fine(row['fatigue'], 2)]
+            self.order[h] = np.argsort(key, kind='stable')   # radix sort on uint16
+            np.cumsum(np.bincount(key, minlength=self.buckets), out=self.starts[h, 1:])
+
+    def _lower_bounds(self, point, weight):
+        """per bucket: the least squared distance anything inside it can have."""
+        gaps = []
+        for field, (lo, hi) in enumerate(self.edges):
+            gap = np.maximum(0.0, np.maximum(lo - point[field], point[field] - hi))
+            gap = np.where(np.isnan(lo), np.inf, weight[field] * gap)   # empty bins
+            gaps.append(gap ** 2)
+        return (gaps[0][:, None, None] + gaps[1][None, :, None] + gaps[2][None, None, :]).ravel()
+
+    def query(self, input_signal, output=None, fatigue=None, k=10, scale=None):
+        """
+        the k memories in the whole bank closest to the query, closest
+        first (ties: most recent first).
+
+        returns: dict of arrays - cell, input, output, fatigue, time, distance
+        """
+        bank = self.bank
+        point, weight = _query(input_signal, output, fatigue, scale)
+        rows = bank._order()
+        empty = bank.records[:0, 0]
+        if not len(rows) or k <= 0:
+            return _hits(empty, np.empty(0, dtype=np.int64), np.empty(0))
+
+        bound = self._lower_bounds(point, weight)
+        nearest = np.argsort(bound, kind='stable')
+        order = self.order.reshape(-1)
+
+        best_cells = np.empty(0, dtype=np.int64)
+        best_records = empty
+        best_d2 = np.empty(0)
+        done, chunk = 0, 8
+        while done < self.buckets:
+            buckets = nearest[done:done + chunk]
+            done += len(buckets)
+            chunk *= 2
+
+            lo = self.starts[rows[:, None], buckets[None, :]]
+            lengths = (self.starts[rows[:, None], buckets[None, :] + 1] - lo).ravel()
+            total = int(lengths.sum())
+            if total:
+                # every (row, bucket) run of `order`, flattened
+                first = (rows[:, None] * bank.n + lo).ravel()
+                offsets = np.cumsum(lengths) - lengths
+                at = np.repeat(first - offsets, lengths) + np.arange(total)
+                cells = order[at].astype(np.int64)
+                slots = np.repeat(np.repeat(rows, len(buckets)), lengths)
+                records = bank.records[slots, cells]
+                d2 = _distance2(records, point, weight)
+
+                best_cells = np.concatenate([best_cells, cells])
+                best_records = np.concatenate([best_records, records])
+                best_d2 = np.concatenate([best_d2, d2])
+                keep = _closest(best_d2, best_records['time'], k)
+                best_cells, best_records, best_d2 = best_cells[keep], best_records[keep], best_d2[keep]
+
+            # nothing further out can beat the k-th best: done
+            if len(best_d2) == k and (done == self.buckets or bound[nearest[done]] > best_d2[-1]):
+                break
+        return _hits(best_records, best_cells, best_d2)
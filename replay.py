@@ -0,0 +1,328 @@
+"""
+replay.py
+same inputs, same outputs - and now you can check.
+
+a recorder sits on a cell or a population and writes every input it is
+fed to one compact binary file, as it is fed. replaying the file through
+a fresh cell or population (built the same way, or loaded from the same
+checkpoint) lives the same life again - at the engine's own speed, one
+vectorized call per recorded step. run two engines side by side through
+the same file and diverge() says where they first disagree:
+
+    rec = pop.record_inputs('run.rec')         # opt in; off by default
+    ...pop.feel(x) / feel_some / advance_constant / rest, as usual...
+    pop.record_inputs(None)                    # stop and close the file
+
+    fresh = CellPopulation(n, curiosity=..., rng=seed)
+    replay('run.rec', fresh)                   # the same life again
+    diverge('run.rec', CellPopulation(...), [cognicell(...) ...])
+    # -> None, or Divergence(frame, tick, cell, field, a, b)
+
+the file is a json header and then one frame per call:
+
+    kind (u8), 3 pad, count (u32), steps (i64)     16 bytes
+    payload                                         count * 8 bytes
+
+    FEEL      everyone felt `count` inputs (1 = one value for everyone)
+    CONSTANT  the same, for `steps` steps (advance_constant / feel_constant)
+    SOME      feel_some: `count` cell indices, then `count` inputs
+    REST      rest: `count` cell indices
+    REST_ALL  rest, everyone
+
+so a cell fed one float per step costs 24 bytes a step, a population fed
+one shared value costs the same, and a settled stretch of a million steps
+is one frame. a run that died mid-write replays up to its last whole frame.
+
+only what goes through those calls is an input: a Scheduler's passive
+recovery and anything that writes state arrays directly is not recorded.
+"""
+
+import json
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+
+MAGIC = b'COGNIREC'
+VERSION = 1
+FEEL, CONSTANT, SOME, REST, REST_ALL = range(5)
+
+_FRAME = struct.Struct('<BxxxIq')
+_SCALAR_FRAME = struct.Struct('<BxxxIqd')   # a frame with its one value, in one write
+
+# what diverge() compares after every frame, in this order
+STATE = ('activation', 'fatigue', 'last_input', 'age', 'times_activated', 'times_rested')
+
+Divergence = namedtuple('Divergence', 'frame tick cell field a b')
+
+
+class InputRecorder:
+    """writes the inputs fed to one cell (n=1) or one population, frame by frame."""
+
+    def __init__(self, path, n, meta=None, buffering=1 << 20):
+        """
+        path: the file to write (replaced if it exists)
+        n: cells being fed
+        meta: anything json-able to keep in the header (how the cells were built...)
+        """
+        self.path = path
+        self.n = int(n)
+        self.frames = 0
+        self.steps = 0
+        self._file = open(path, 'wb', buffering=buffering)
+
+        header = json.dumps({'format': 'cognicell-inputs', 'version': VERSION,
+                             'n': self.n, 'meta': meta or {}}).encode()
+        header += b' ' * (-(len(MAGIC) + 4 + len(header)) % 8)   # frames start 8-aligned
+        self._file.write(MAGIC + struct.pack('<I', len(header)) + header)
+
+    def _frame(self, kind, steps, *payload):
+        count = len(payload[0]) if payload else 0
+        self._file.write(_FRAME.pack(kind, count, steps))
+        for values in payload:
+            self._file.write(values.tobytes())
+        self.frames += 1
+        self.steps += steps
+
+    def feel(self, inputs):
+        """one step of everyone (one value, or one per cell)."""
+        if np.ndim(inputs) == 0:
+            self._file.write(_SCALAR_FRAME.pack(FEEL, 1, 1, float(inputs)))
+            self.frames += 1
+            self.steps += 1
+        else:
+            self._frame(FEEL, 1, self._inputs(inputs))
+
+    def constant(self, inputs, steps):
+        """`steps` steps of the same inputs."""
+        self._frame(CONSTANT, int(steps), self._inputs(inputs))
+
+    def some(self, cells, inputs):
+        """one step of just `cells`."""
+        cells = np.ascontiguousarray(cells, dtype='<i8').ravel()
+        inputs = np.ascontiguousarray(np.broadcast_to(inputs, cells.shape), dtype='<f8')
+        self._frame(SOME, 1, cells, inputs)
+
+    def rest(self, which=None):
+        """a rest, for everyone (None) or a mask / index array / slice."""
+        if which is None or (isinstance(which, slice) and which == slice(None)):
+            self._frame(REST_ALL, 0)
+            return
+        if isinstance(which, slice):
+            cells = np.arange(self.n)[which]
+        elif np.asarray(which).dtype == bool:
+            cells = np.flatnonzero(which)
+        else:
+            cells = np.asarray(which).ravel()
+        self._frame(REST, 0, np.ascontiguousarray(cells, dtype='<i8'))
+
+    def _inputs(self, inputs):
+        inputs = np.ascontiguousarray(inputs, dtype='<f8').ravel()
+        if len(inputs) not in (1, self.n):
+            raise ValueError(f"{len(inputs)} inputs for {self.n} cells")
+        return inputs
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Recording:
+    """a recorded input file, mapped and read frame by frame."""
+
+    def __init__(self, path):
+        self.path = path
+        self._data = np.memmap(path, dtype=np.uint8, mode='r')
+        if bytes(self._data[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not a cognicell input recording")
+        (length,) = struct.unpack_from('<I', self._data, len(MAGIC))
+        start = len(MAGIC) + 4
+        self.header = json.loads(bytes(self._data[start:start + length]))
+        if self.header['version'] > VERSION:
+            raise ValueError(f"recording version {self.header['version']} is newer than this code")
+        self.n = self.header['n']
+        self.meta = self.header['meta']
+        self._start = start + length
+
+    def frames(self):
+        """
+        every whole frame in order, as (kind, steps, cells, inputs).
+        cells is None unless kind is SOME or REST; inputs is None for
+        REST / REST_ALL. arrays are read-only views of the file.
+        """
+        data, at, end = self._data, self._start, len(self._data)
+        while at + _FRAME.size <= end:
+            kind, count, steps = _FRAME.unpack_from(data, at)
+            at += _FRAME.size
+            size = 8 * count * (2 if kind == SOME else 1)
+            if at + size > end:
+                return   # torn last frame: the recorder died mid-write
+            payload = data[at:at + size]
+            at += size
+            if kind in (FEEL, CONSTANT):
+                yield kind, steps, None, payload.view('<f8')
+            elif kind == SOME:
+                yield kind, steps, payload[:8 * count].view('<i8'), payload[8 * count:].view('<f8')
+            elif kind == REST:
+                yield kind, steps, payload.view('<i8'), None
+            else:
+                yield kind, steps, None, None
+
+    def __iter__(self):
+        return self.frames()
+
+
+def _open(recording):
+    return recording if isinstance(recording, Recording) else Recording(recording)
+
+
+class _Population:
+    """plays frames into a CellPopulation."""
+
+    def __init__(self, pop, n, column=None):
+        if pop.n != n:
+            raise ValueError(f"recording is for {n} cells, population has {pop.n}")
+        self.pop = pop
+        self.columns = slice(None) if column is None else [column]   # what state() shows
+
+    def play(self, kind, steps, cells, inputs):
+        pop = self.pop
+        if kind == FEEL:
+            pop.feel(inputs)
+        elif kind == CONSTANT:
+            pop.advance_constant(inputs, steps)
+        elif kind == SOME:
+            pop.feel_some(cells, inputs)
+        elif kind == REST:
+            pop.rest(cells)
+        else:
+            pop.rest()
+
+    def state(self, field):
+        return getattr(self.pop, field)[self.columns]
+
+
+class _Cells:
+    """plays frames into scalar cognicells, one per recorded column."""
+
+    def __init__(self, cells, n, column=None):
+        self.cells = [cells] if not isinstance(cells, (list, tuple)) else list(cells)
+        if column is not None:
+            if len(self.cells) != 1:
+                raise ValueError("column picks the input of one cell")
+            self.columns = np.array([column])
+        elif len(self.cells) == n:
+            self.columns = np.arange(n)
+        else:
+            raise ValueError(f"recording is for {n} cells, got {len(self.cells)} "
+                             "(pass column= to follow one of them)")
+        self._which = {int(c): i for i, c in enumerate(self.columns)}
+
+    def play(self, kind, steps, cells, inputs):
+        if kind in (FEEL, CONSTANT):
+            values = inputs[self.columns] if len(inputs) > 1 else np.repeat(inputs, len(self.cells))
+            for cell, x in zip(self.cells, values.tolist()):
+                if kind == FEEL:
+                    cell.feel(x)
+                else:
+                    cell.feel_constant(x, steps)
+        elif kind == SOME:
+            for c, x in zip(cells.tolist(), inputs.tolist()):
+                if c in self._which:
+                    self.cells[self._which[c]].feel(x)
+        elif kind == REST:
+            for c in cells.tolist():
+                if c in self._which:
+                    self.cells[self._which[c]].rest()
+        else:
+            for cell in self.cells:
+                cell.rest()
+
+    def state(self, field):
+        return np.array([getattr(cell, field) for cell in self.cells])
+
+
+def _player(target, n, column=None):
+    if hasattr(target, 'feel_some'):
+        return _Population(target, n, column)
+    return _Cells(target, n, column)
+
+
+def replay(recording, target, column=None, frames=None):
+    """
+    feed a recording to a population, a cognicell or a list of them (one
+    per recorded cell). column: follow just that recorded cell with a
+    lone cognicell (a population always lives every column). frames:
+    stop after this many.
+
+    returns: steps replayed
+    """
+    recording = _open(recording)
+    player = _player(target, recording.n, column)
+    steps = 0
+    for i, (kind, k, cells, inputs) in enumerate(recording.frames()):
+        if frames is not None and i >= frames:
+            break
+        player.play(kind, k, cells, inputs)
+        steps += k
+    return steps
+
+
+def first_difference(a, b, fields=STATE, atol=0.0):
+    """
+    the lowest cell whose state differs between two {field: array} sets.
+    returns: (cell, field, a value, b value) or None
+    """
+    first = None
+    for field in fields:
+        x, y = np.asarray(a[field]), np.asarray(b[field])
+        if atol:
+            differ = ~np.isclose(x, y, rtol=0.0, atol=atol, equal_nan=True)
+        else:
+            differ = x != y
+            if differ.any() and x.dtype.kind == 'f':
+                differ &= ~(np.isnan(x) & np.isnan(y))
+        bad = np.flatnonzero(differ)
+        if len(bad) and (first is None or bad[0] < first[0]):
+            first = (int(bad[0]), field, x[bad[0]].item(), y[bad[0]].item())
+    return first
+
+
+def diverge(recording, a, b, atol=0.0, fields=STATE, column=None):
+    """
+    replay a recording through two engines in lockstep and compare their
+    state after every frame.
+
+    a, b: populations, cognicells or lists of cognicells (see replay),
+          starting from the same state
+    atol: how far apart floats may be (0 = bit for bit)
+    column: compare just this recorded cell - a lone cognicell on
+            either side follows it, a population is judged on it alone
+
+    returns: the first Divergence(frame, tick, cell, field, a, b), or
+             None if they agree to the end. tick counts recorded steps,
+             so a CONSTANT frame is judged where it ends.
+    """
+    recording = _open(recording)
+    players = [_player(t, recording.n, column) for t in (a, b)]
+    tick = 0
+    for frame, (kind, steps, cells, inputs) in enumerate(recording.frames()):
+        for player in players:
+            player.play(kind, steps, cells, inputs)
+        tick += steps
+        found = first_difference(*({f: p.state(f) for f in fields} for p in players),
+                                 fields=fields, atol=atol)
+        if found is not None:
+            cell, field, x, y = found
+            return Divergence(frame, tick, cell if column is None else column, field, x, y)
+    return None
@@ -0,0 +1,191 @@
+"""
+scheduler.py
+only pay for the cells that are doing something.
+
+in most simulations a tick touches a few cells out of a million. the
+Scheduler steps just those (CellPopulation.feel_some), keeps future
+inputs in a priority queue, applies rest policies to whole batches at
+once, and lets everyone else sit: an idle cell's passive recovery (and
+any scheduled rests it slept through) is worked out in closed form the
+next time something touches it.
+
+    pop = CellPopulation(1_000_000, sparse=True)
+    sched = Scheduler(pop, policies=[RestWhenTired(0.8), RestEvery(1000)])
+    sched.post(cells=[3, 17], inputs=[0.9, 0.2], at=50)
+    sched.run(until=10_000)          # cost ~ events, not cells x ticks
+    sched.settle()                   # bring everyone up to date before reading
+"""
+
+import heapq
+import itertools
+
+import numpy as np
+
+
+def _for(value, cells):
+    """a population parameter (shared float or per-cell array) for just these cells."""
+    return value[cells] if np.ndim(value) else value
+
+
+class RestWhenTired:
+    """any cell that just worked and is now more tired than `threshold` rests."""
+
+    def __init__(self, threshold=0.8):
+        self.threshold = threshold
+
+    def after_step(self, scheduler, cells, now):
+        return cells[scheduler.population.fatigue[cells] > self.threshold]
+
+    def missed(self, since, upto):
+        return 0  # only ever fires on cells that worked
+
+
+class RestEvery:
+    """everyone rests every `k` ticks (on ticks that are multiples of k)."""
+
+    def __init__(self, k):
+        self.k = int(k)
+
+    def after_step(self, scheduler, cells, now):
+        return cells if now % self.k == 0 else cells[:0]
+
+    def missed(self, since, upto):
+        """rest ticks in (since, upto] - per cell when since is an array."""
+        return upto // self.k - since // self.k
+
+
+class Scheduler:
+    """
+    steps only active cells of a CellPopulation (made with sparse=True).
+
+    every cell remembers the tick its state is current as of. touching a
+    cell (stepping it, reading it, settle()) first catches it up: `idle`
+    ticks of passive recovery and whatever RestEvery rests fell in that
+    gap, applied at once. because recovery and rest only ever subtract
+    and clamp at 0, doing them in one go lands on the same fatigue as
+    doing them tick by tick (up to float rounding).
+    """
+
+    def __init__(self, population, policies=(), passive_recovery=True):
+        """
+        population: a CellPopulation (sparse=True if it has memories)
+        policies: rest policies applied after every step, e.g.
+                  [RestWhenTired(0.8), RestEvery(100)]
+        passive_recovery: idle cells shake off `recovery` fatigue per tick
+                          (False = idle cells are frozen in time)
+        """
+        self.population = population
+        self.policies = list(policies)
+        self.passive_recovery = passive_recovery
+        self.seen = np.full(population.n, population.ticks, dtype=np.int64)
+
+        self._events = []                 # (tick, order, cells, inputs)
+        self._order = itertools.count()   # keeps same-tick events in post order
+
+        # what it cost
+        self.ticks_run = 0
+        self.cell_steps = 0
+        self.rests = 0
+
+    @property
+    def now(self):
+        return self.population.ticks
+
+    def post(self, cells, inputs, at=None):
+        """queue inputs for some cells at a future tick (default: the next one)."""
+        at = self.now + 1 if at is None else int(at)
+        if at <= self.now:
+            raise ValueError(f"tick {at} is already over (now {self.now})")
+        cells = np.atleast_1d(np.asarray(cells, dtype=np.int64))
+        inputs = np.broadcast_to(np.asarray(inputs, dtype=np.float64), cells.shape)
+        heapq.heappush(self._events, (at, next(self._order), cells, inputs))
+
+    def pending(self):
+        """how many queued events haven't fired yet."""
+        return len(self._events)
+
+    def catch_up(self, cells, upto=None):
+        """
+        bring idle cells up to tick `upto` (default now): passive recovery
+        and missed RestEvery rests in one vectorized update.
+        """
+        pop = self.population
+        upto = self.now if upto is None else upto
+        cells = np.asarray(cells, dtype=np.int64)
+        since = self.seen[cells]
+        idle = upto - since
+        if not idle.any():
+            return
+
+        drop = np.zeros(len(cells))
+        if self.passive_recovery:
+            drop += idle * _for(pop.recovery, cells)
+        rests = np.zeros(len(cells), dtype=np.int64)
+        for policy in self.policies:
+            rests += policy.missed(since, upto)
+        if rests.any():
+            drop += rests * _for(pop.rest_amount, cells)
+            pop.times_rested[cells] += rests
+            self.rests += int(rests.sum())
+
+        pop.fatigue[cells] = np.maximum(0.0, pop.fatigue[cells] - drop)
+        self.seen[cells] = upto
+
+    def settle(self):
+        """catch every cell up to now - O(n), do it before reading everyone."""
+        self.catch_up(np.arange(self.population.n))
+
+    def tick(self, cells=None, inputs=None):
+        """
+        one tick: everything posted for it, plus `cells`/`inputs` if given.
+        a cell that gets several inputs in one tick feels the last one.
+
+        returns: (cells stepped, their activations)
+        """
+        now = self.now + 1
+        batches = []
+        while self._events and self._events[0][0] <= now:
+            _, _, c, x = heapq.heappop(self._events)
+            batches.append((c, x))
+        if cells is not None:
+            c = np.atleast_1d(np.asarray(cells, dtype=np.int64))
+            batches.append((c, np.broadcast_to(np.asarray(inputs, dtype=np.float64), c.shape)))
+
+        self.ticks_run += 1
+        if not batches:
+            self.population.ticks = now  # time passes; nobody is touched
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        cells = np.concatenate([c for c, _ in batches])
+        inputs = np.concatenate([x for _, x in batches])
+        if len(cells) > 1:
+            # last input per cell wins: unique on the reversed order
+            cells, last = np.unique(cells[::-1], return_index=True)
+            inputs = inputs[::-1][last]
+
+        self.catch_up(cells, upto=now - 1)
+        activation = self.population.feel_some(cells, inputs)
+        self.seen[cells] = now
+        self.cell_steps += len(cells)
+
+        for policy in self.policies:
+            tired = policy.after_step(self, cells, now)
+            if len(tired):
+                self.population.rest(tired)
+                self.rests += len(tired)
+        return cells, activation
+
+    def run(self, until):
+        """
+        fire every queued event up to tick `until`, skipping the ticks in
+        between where nothing happens. afterwards now == until.
+        """
+        while self._events and self._events[0][0] <= until:
+            self.population.ticks = self._events[0][0] - 1  # jump over the quiet ticks
+            self.tick()
+        self.population.ticks = max(self.now, until)
+
+    def how_are_you(self, i):
+        """one cell's status, caught up to now first."""
+        self.catch_up([i])
+        return self.population.how_are_you(i)
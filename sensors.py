@@ -0,0 +1,353 @@
+"""
+sensors.py
+giving cells a body: live readings in, steps out, without blocking.
+
+    sources ──> bounded queue ──> batcher (one batch per tick) ──> step in an executor
+
+sources are async iterables of readings. a reading is (cell, value) or a
+whole chunk (cells, values) as arrays. every source gets its own pump
+task that pushes into one bounded asyncio.Queue; when the queue is full
+the pump waits (backpressure - the source slows down) or, if you ask for
+it, readings get dropped and counted.
+
+every `tick` seconds the batcher drains what has arrived, keeps the
+last reading per cell, and steps the cells in a worker thread, so the
+event loop keeps ingesting while numpy works. there is only ever one step
+in flight, so cells see their inputs in order.
+
+    pop = CellPopulation(100_000, sparse=True)
+    pipe = SensorPipeline(pop, tick=0.01)
+    pipe.add_source(rate_source(cells=np.arange(1000), rate=50_000, duration=5))
+    metrics = asyncio.run(pipe.run())
+
+a target can be a CellPopulation (sparse ones step just the cells that
+got readings; dense ones step everyone, holding the last input for cells
+that got nothing) or a scheduler.Scheduler.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from memory import SparseMemoryBank
+from online_stats import Histogram, Moments
+
+
+# -------------------------------------------------------------------
+# sources
+# -------------------------------------------------------------------
+
+async def rate_source(cells, rate, duration=None, count=None, signal=None, chunk=None, rng=None):
+    """
+    synthetic sensor at a known rate.
+
+    cells: which cells it feeds (readings go round-robin over them)
+    rate: readings per second
+    duration / count: stop after this long / this many readings
+    signal: fn(t, cells) -> values (default: uniform noise in -1..1)
+    chunk: readings per yield (default: ~1 ms worth) - lets high rates
+           through without one await per reading
+    """
+    cells = np.asarray(cells, dtype=np.int64)
+    rng = np.random.default_rng(rng)
+    if signal is None:
+        signal = lambda t, which: rng.uniform(-1.0, 1.0, len(which))
+    chunk = chunk or max(1, int(rate / 1000))
+
+    start = time.perf_counter()
+    sent = 0
+    while count is None or sent < count:
+        now = time.perf_counter() - start
+        if duration is not None and now >= duration:
+            return
+        size = chunk if count is None else min(chunk, count - sent)
+        which = cells[(sent + np.arange(size)) % len(cells)]
+        yield which, signal(now, which)
+        sent += size
+        # pace to the rate: sleep until the next chunk is due
+        await asyncio.sleep(max(0.0, start + sent / rate - time.perf_counter()))
+
+
+async def file_source(path, rate=None, block=4096):
+    """
+    readings from a text file, one "cell value" per line (a recorded
+    stream, or a stand-in for a device). read in a thread so the loop
+    never waits on the disk; rate (readings/second) replays it in real time.
+    """
+    def read_blocks():
+        with open(path) as f:
+            lines = []
+            for line in f:
+                if line.strip():
+                    lines.append(line)
+                if len(lines) == block:
+                    yield lines
+                    lines = []
+            if lines:
+                yield lines
+
+    blocks = read_blocks()
+    start = time.perf_counter()
+    sent = 0
+    while True:
+        lines = await asyncio.to_thread(next, blocks, None)
+        if lines is None:
+            return
+        data = np.loadtxt(lines, ndmin=2)
+        yield data[:, 0].astype(np.int64), data[:, 1]
+        sent += len(data)
+        if rate:
+            await asyncio.sleep(max(0.0, start + sent / rate - time.perf_counter()))
+
+
+async def socket_source(host='127.0.0.1', port=0, ready=None, max_pending=1024):
+    """
+    readings over tcp: any number of clients send "cell value" lines.
+
+    ready: optional asyncio.Future, set to the (host, port) actually bound
+           (handy with port=0)
+    max_pending: lines buffered before clients are throttled (tcp flow
+                 control does the rest)
+    the source ends when the last client disconnects.
+    """
+    lines = asyncio.Queue(maxsize=max_pending)
+    clients = 0
+
+    async def handle(reader, writer):
+        nonlocal clients
+        clients += 1
+        try:
+            async for line in reader:
+                if line.strip():
+                    await lines.put(line)
+        finally:
+            clients -= 1
+            writer.close()
+            if clients == 0:
+                await lines.put(None)
+
+    server = await asyncio.start_server(handle, host, port)
+    if ready is not None:
+        ready.set_result(server.sockets[0].getsockname()[:2])
+    try:
+        async with server:
+            while True:
+                line = await lines.get()
+                if line is None:
+                    return
+                cell, value = line.split()
+                yield int(cell), float(value)
+    finally:
+        server.close()
+
+
+# -------------------------------------------------------------------
+# the pipeline
+# -------------------------------------------------------------------
+
+class PipelineMetrics:
+    """what the pipeline did and how fast - latency is reading-in to step-done."""
+
+    def __init__(self):
+        self.started = None
+        self.readings = 0
+        self.dropped = 0
+        self.ticks = 0
+        self.cell_steps = 0
+        self.queue_high = 0
+        self.latency = Moments()                      # seconds
+        self.latency_hist = Histogram(0.0, 1.0, 1000)  # 1 ms bins
+        self.step_time = Moments()
+
+    def snapshot(self):
+        """plain numbers, e.g. to log every few seconds."""
+        elapsed = time.perf_counter() - self.started if self.started else 0.0
+        return {
+            'elapsed_s': elapsed,
+            'readings': self.readings,
+            'dropped': self.dropped,
+            'ticks': self.ticks,
+            'cell_steps': self.cell_steps,
+            'readings_per_s': self.readings / elapsed if elapsed else 0.0,
+            'queue_high_water': self.queue_high,
+            'latency_mean_ms': self.latency.mean * 1e3,
+            'latency_p50_ms': self.latency_hist.quantile(0.5) * 1e3,
+            'latency_p99_ms': self.latency_hist.quantile(0.99) * 1e3,
+            'latency_max_ms': self.latency.max * 1e3 if self.latency.n else 0.0,
+            'step_mean_ms': self.step_time.mean * 1e3,
+        }
+
+
+class SensorPipeline:
+    """bounded queue + per-tick batcher + executor step, for one target."""
+
+    def __init__(self, target, tick=0.01, queue_size=1024, max_batch=None,
+                 overflow='block', executor=None):
+        """
+        target: a CellPopulation or a scheduler.Scheduler
+        tick: seconds between steps (0 = step as soon as anything arrives)
+        queue_size: chunks the queue holds before backpressure kicks in
+        max_batch: step early once this many readings are waiting
+        overflow: 'block' (sources wait) or 'drop' (newest readings are
+                  dropped and counted) when the queue is full
+        executor: where steps run (default: one worker thread)
+        """
+        if overflow not in ('block', 'drop'):
+            raise ValueError("overflow is 'block' or 'drop'")
+        self.target = target
+        self.tick = tick
+        self.max_batch = max_batch
+        self.overflow = overflow
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.executor = executor
+        self.metrics = PipelineMetrics()
+        self._sources = []
+        self._stopping = False
+        self._waiting = 0                 # readings in the queue
+        self._arrived = asyncio.Event()
+
+    def add_source(self, source):
+        """feed readings from an async iterable (see rate_source & co)."""
+        self._sources.append(source)
+
+    def stop(self):
+        """finish the current batch and stop, even if sources are still going."""
+        self._stopping = True
+
+    async def _pump(self, source):
+        try:
+            async for reading in source:
+                if self._stopping:
+                    break
+                cells, values = reading
+                item = (np.atleast_1d(np.asarray(cells, dtype=np.int64)),
+                        np.atleast_1d(np.asarray(values, dtype=np.float64)),
+                        time.perf_counter())
+                if self.overflow == 'block':
+                    await self.queue.put(item)       # full queue = the source waits
+                else:
+                    try:
+                        self.queue.put_nowait(item)
+                    except asyncio.QueueFull:
+                        self.metrics.dropped += len(item[0])
+                        continue
+                self._waiting += len(item[0])
+                self.metrics.queue_high = max(self.metrics.queue_high, self.queue.qsize())
+                self._arrived.set()
+        finally:
+            self._arrived.set()
+
+    def _step(self, cells, values):
+        """one step of the target - runs in the executor, off the loop."""
+        started = time.perf_counter()
+        target = self.target
+        if hasattr(target, 'tick'):                   # a Scheduler
+            target.tick(cells, values)
+        elif isinstance(target.memories, SparseMemoryBank):
+            target.feel_some(cells, values)           # sparse population
+        else:
+            inputs = target.last_input.copy()         # dense: hold everyone else's input
+            inputs[cells] = values
+            target.feel(inputs)
+        return time.perf_counter() - started
+
+    def _instruments(self):
+        target = getattr(self.target, 'population', self.target)
+        return target.instruments
+
+    def _drain(self):
+        """everything waiting in the queue, as one batch (last reading per cell wins)."""
+        inst = self._instruments()
+        if inst is not None:
+            started = time.perf_counter()
+        items = []
+        while not self.queue.empty():
+            items.append(self.queue.get_nowait())
+        self._waiting = 0
+        if not items:
+            return None
+        cells = np.concatenate([c for c, _, _ in items])
+        values = np.concatenate([v for _, v, _ in items])
+        stamps = np.concatenate([np.full(len(c), t) for c, _, t in items])
+        self.metrics.readings += len(cells)
+        if len(cells) > 1:
+            keep_cells, last = np.unique(cells[::-1], return_index=True)
+            values = values[::-1][last]
+            cells = keep_cells
+        if inst is not None:
+            inst.add_time('batching', time.perf_counter() - started)
+        return cells, values, stamps
+
+    async def _wait_for_batch(self, pumps, until=None):
+        """
+        wait for the next tick - or past it, if nothing has arrived yet -
+        returning early once max_batch readings are waiting, and never
+        past `until` (a perf_counter time) even if nothing ever arrives.
+        """
+        deadline = time.perf_counter() + self.tick
+        while not self._stopping:
+            if pumps.done() and self.queue.empty():
+                return
+            now = time.perf_counter()
+            if until is not None and now >= until:
+                return
+            left = deadline - now
+            if left <= 0 and not self.queue.empty():
+                return
+            if self.max_batch and self._waiting >= self.max_batch:
+                return
+            cap = until - now if until is not None else float('inf')
+            if left > 0 and not self.max_batch:
+                await asyncio.sleep(min(left, cap))
+                continue
+            # woken by the next arrival (or a pump finishing)
+            self._arrived.clear()
+            try:
+                await asyncio.wait_for(self._arrived.wait(), timeout=min(max(left, 0.05), cap))
+            except asyncio.TimeoutError:
+                pass
+
+    async def run(self, duration=None):
+        """
+        run until every source is done (or `duration` seconds, or stop()).
+
+        returns: the metrics snapshot at the end
+        """
+        loop = asyncio.get_running_loop()
+        own_executor = self.executor is None
+        executor = ThreadPoolExecutor(max_workers=1) if own_executor else self.executor
+        self.metrics.started = time.perf_counter()
+        until = None if duration is None else self.metrics.started + duration
+        self._stopping = False
+
+        pumps = asyncio.gather(*(self._pump(s) for s in self._sources))
+        try:
+            while True:
+                if until is not None and time.perf_counter() >= until:
+                    self.stop()
+                await self._wait_for_batch(pumps, until)
+                batch = self._drain()
+                if batch is not None:
+                    cells, values, stamps = batch
+                    spent = await loop.run_in_executor(executor, self._step, cells, values)
+                    done = time.perf_counter()
+                    self.metrics.ticks += 1
+                    self.metrics.cell_steps += len(cells)
+                    self.metrics.step_time.update(spent)
+                    self.metrics.latency.update_many(done - stamps)
+                    self.metrics.latency_hist.update_many(done - stamps)
+                elif pumps.done() or self._stopping:
+                    break
+        finally:
+            self._stopping = True
+            if not pumps.done():
+                pumps.cancel()
+            try:
+                await pumps
+            except asyncio.CancelledError:
+                pass
+            if own_executor:
+                executor.shutdown(wait=True)
+        return self.metrics.snapshot()
@@ -0,0 +1,254 @@
+"""
+sequential.py
+stop running trials once the answer is in.
+
+a fixed trial count is either too many (the effect was obvious after 8)
+or too few. these tests look at the data as it arrives and stop as soon
+as it's decided, while keeping the false-alarm rate at alpha:
+
+- GroupSequentialTest: a paired t-test checked at a few planned looks,
+  alpha split evenly across the looks (bonferroni spending). simple,
+  conservative, and the p-value it reports is honest however early it stops.
+- SPRT: wald's sequential probability ratio test on "did the effect show
+  up this trial, yes or no", checked after every trial. decides either
+  way - effect or no effect - usually in very few trials.
+
+    test = GroupSequentialTest(alpha=0.05, looks=5, max_trials=plan_trials(0.5))
+    while test.decision is None:
+        test.update(run_more(test.next_batch()))
+"""
+
+import math
+
+from online_stats import Moments
+
+
+def _normal_ppf(p):
+    """inverse normal cdf (acklam's rational approximation, ~1e-9)."""
+    if not 0.0 < p < 1.0:
+        raise ValueError("p must be in (0, 1)")
+    a = (-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+         1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00)
+    b = (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+         6.680131188771972e+01, -1.328068155288572e+01)
+    c = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+         -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00)
+    d = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00,
+         3.754408661907416e+00)
+    if p < 0.02425:
+        q = math.sqrt(-2 * math.log(p))
+        return (((((c[0]*q + c[1])*q + c[2])*q + c[3])*q + c[4])*q + c[5]) / \
+               ((((d[0]*q + d[1])*q + d[2])*q + d[3])*q + 1)
+    if p > 1 - 0.02425:
+        return -_normal_ppf(1 - p)
+    q = p - 0.5
+    r = q * q
+    return (((((a[0]*r + a[1])*r + a[2])*r + a[3])*r + a[4])*r + a[5]) * q / \
+           (((((b[0]*r + b[1])*r + b[2])*r + b[3])*r + b[4])*r + 1)
+
+
+def _betacf(a, b, x):
+    """continued fraction of the incomplete beta (modified lentz)."""
+    tiny = 1e-300
+    c, d = 1.0, 1.0 - (a + b) * x / (a + 1.0)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    h = d
+    for m in range(1, 300):
+        m2 = 2 * m
+        for num in (m * (b - m) * x / ((a + m2 - 1.0) * (a + m2)),
+                    -(a + m) * (a + b + m) * x / ((a + m2) * (a + m2 + 1.0))):
+            d = 1.0 + num * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + num / c
+            c = c if abs(c) > tiny else tiny
+            h *= d * c
+        if abs(d * c - 1.0) < 1e-15:
+            break
+    return h
+
+
+def _betainc(a, b, x):
+    """regularized incomplete beta I_x(a, b)."""
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b)
+                     + a * math.log(x) + b * math.log1p(-x))
+    if x < (a + 1.0) / (a + b + 2.0):
+        return front * _betacf(a, b, x) / a
+    return 1.0 - front * _betacf(b, a, 1.0 - x) / b
+
+
+def t_pvalue(t, df):
+    """
+    two-sided p-value of a t statistic with df degrees of freedom
+    (student's t, exact to ~1e-12 - no scipy needed).
+    """
+    if math.isnan(t):
+        return math.nan
+    if math.isinf(t):
+        return 0.0
+    return _betainc(df / 2.0, 0.5, df / (df + t * t))
+
+
+def paired_t(diffs):
+    """
+    one-sample t-test of the mean of paired differences against 0.
+
+    diffs: Moments of (treatment - control), one value per trial
+    returns: (t, two-sided p). a spread of exactly 0 gives t = +-inf, p = 0
+    """
+    if diffs.n < 2:
+        return math.nan, math.nan
+    se = math.sqrt(diffs.sample_variance() / diffs.n)
+    if se == 0.0:
+        if diffs.mean == 0.0:
+            return 0.0, 1.0
+        return math.copysign(math.inf, diffs.mean), 0.0
+    t = diffs.mean / se
+    return t, t_pvalue(t, diffs.n - 1)
+
+
+def plan_trials(effect, alpha=0.05, power=0.8, looks=1):
+    """
+    trials a paired t-test needs to catch a standardized effect
+    (mean difference / sd of differences) with the given power, when
+    alpha is split over `looks` looks. normal approximation plus the
+    usual small-sample bump.
+    """
+    if effect <= 0:
+        raise ValueError("effect must be positive")
+    z_a = _normal_ppf(1.0 - alpha / looks / 2.0)
+    z_b = _normal_ppf(power)
+    n = ((z_a + z_b) / effect) ** 2 + z_a ** 2 / 2.0
+    return max(3, math.ceil(n))
+
+
+class GroupSequentialTest:
+    """
+    paired t-test with interim looks.
+
+    trials are added in batches; after each batch (a "look") the test
+    stops for an effect if p < alpha / looks. if no look gets there by
+    max_trials, the answer is "no effect". p_adjusted = looks * (smallest
+    p seen) is a valid p-value for the whole procedure, whenever it stopped.
+    """
+
+    def __init__(self, alpha=0.05, looks=5, max_trials=100):
+        if looks < 1 or max_trials < 2 * looks:
+            raise ValueError("need looks >= 1 and at least 2 trials per look")
+        self.alpha = alpha
+        self.looks = looks
+        self.max_trials = max_trials
+        self.threshold = alpha / looks
+        # cumulative trial counts at each look, evenly spaced
+        self.schedule = [math.ceil(max_trials * (k + 1) / looks) for k in range(looks)]
+
+        self.diffs = Moments()
+        self.look = 0
+        self.t = math.nan
+        self.p = math.nan
+        self.min_p = math.nan  # smallest p over the looks taken
+        self.decision = None   # None (keep going), 'effect' or 'no effect'
+
+    def next_batch(self):
+        """how many more trials to run before the next look (0 when decided)."""
+        if self.decision is not None:
+            return 0
+        return self.schedule[self.look] - self.diffs.n
+
+    def update(self, diffs):
+        """add one batch of paired differences and take a look."""
+        if self.decision is not None:
+            raise ValueError("test already decided")
+        for d in diffs:
+            self.diffs.update(d)
+        if self.diffs.n < self.schedule[self.look]:
+            return self.decision  # not at a look yet
+
+        self.t, self.p = paired_t(self.diffs)
+        self.min_p = self.p if math.isnan(self.min_p) else min(self.min_p, self.p)
+        self.look += 1
+        if self.p < self.threshold:
+            self.decision = 'effect'
+        elif self.look == self.looks:
+            self.decision = 'no effect'
+        return self.decision
+
+    @property
+    def p_adjusted(self):
+        return min(1.0, self.min_p * self.looks) if not math.isnan(self.min_p) else math.nan
+
+    def result(self):
+        return {
+            'decision': self.decision,
+            'trials': self.diffs.n,
+            'looks': self.look,
+            'mean_diff': self.diffs.mean,
+            't': self.t,
+            'p': self.p,
+            'p_adjusted': self.p_adjusted,
+        }
+
+
+class SPRT:
+    """
+    wald's sequential probability ratio test on yes/no outcomes.
+
+    h0: the effect shows up with probability p0 (0.5 = coin flip, no effect)
+    h1: it shows up with probability p1
+    stops at the first trial where the likelihood ratio leaves
+    (beta / (1 - alpha), 1 / alpha). 1 / (largest ratio seen) is an
+    anytime-valid p-value against h0 (ville's inequality), so "effect"
+    always comes with p <= alpha. (wald's textbook upper bound,
+    (1 - beta) / alpha, is a bit looser and only approximately alpha.)
+    """
+
+    def __init__(self, alpha=0.05, power=0.8, p0=0.5, p1=0.75, max_trials=1000):
+        if not 0 < p0 < p1 < 1:
+            raise ValueError("need 0 < p0 < p1 < 1")
+        self.alpha = alpha
+        self.beta = 1.0 - power
+        self.max_trials = max_trials
+        self.upper = math.log(1.0 / alpha)
+        self.lower = math.log(self.beta / (1.0 - alpha))
+        self._yes = math.log(p1 / p0)
+        self._no = math.log((1.0 - p1) / (1.0 - p0))
+
+        self.trials = 0
+        self.hits = 0
+        self.llr = 0.0       # log likelihood ratio h1 : h0
+        self.best = 0.0      # largest llr so far
+        self.decision = None
+
+    def update(self, outcomes):
+        """
+        add yes/no outcomes one at a time; stops at the first crossing
+        and ignores the rest of the batch.
+        """
+        for hit in outcomes:
+            if self.decision is not None:
+                break
+            self.trials += 1
+            self.hits += bool(hit)
+            self.llr += self._yes if hit else self._no
+            self.best = max(self.best, self.llr)
+            if self.llr >= self.upper:
+                self.decision = 'effect'
+            elif self.llr <= self.lower or self.trials >= self.max_trials:
+                self.decision = 'no effect'
+        return self.decision
+
+    @property
+    def p(self):
+        return min(1.0, math.exp(-self.best))
+
+    def result(self):
+        return {
+            'decision': self.decision,
+            'trials': self.trials,
+            'hits': self.hits,
+            'llr': self.llr,
+            'p': self.p,
+        }
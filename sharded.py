@@ -0,0 +1,313 @@
+"""
+sharded.py
+one brain, every core. the same ticks as brain.Brain, split across processes.
+
+a vectorized step still runs on one core. ShardedBrain moves a brain's
+whole state (every array of the CellPopulation, its memory rings, two
+activation buffers and the outside drive) into multiprocessing
+shared_memory blocks and gives each worker process a contiguous shard of
+cells to own:
+
+    cells   [ shard 0 | shard 1 | shard 2 | shard 3 ]
+    worker      0         1         2         3
+
+every tick each worker
+  1. gathers its halo - the activations of friends that live in other
+     shards - straight out of the shared previous-tick buffer,
+  2. computes what its cells hear (its rows of the weights) and feels it
+     through an ordinary CellPopulation whose arrays are views of its
+     shard,
+  3. writes its new activations into the other buffer and waits at the
+     barrier.
+the buffers swap every tick, so nobody reads an activation that is being
+overwritten. the coordinator only writes the drive, says "go" and waits:
+no state is ever pickled or copied, and `brain.population` reads the
+live shared arrays between ticks.
+
+    with ShardedBrain(pop, weights, workers=8) as brain:
+        brain.run(1000, external=drive)
+        brain.population.fatigue.mean()
+
+same numbers as Brain bit for bit - every row's sum is taken in the same
+order. cost per tick is (cells + edges) / workers plus one barrier, so
+ticks scale with cores as long as shards stay big (≳100k cells each) and
+most edges stay inside their shard (grid and small_world do).
+
+limits: dense memories only (not sparse=True, not consolidated or
+indexed), no track_stats, clock must be the population's own ticks, and
+instruments aren't shared.
+"""
+
+import multiprocessing as mp
+import os
+from multiprocessing import shared_memory
+from threading import BrokenBarrierError
+
+import numpy as np
+
+from brain import SparseWeights
+from cognicell import cognicell
+from memory import MemoryBank
+from population import CellPopulation
+
+
+_STATE = ('ids', 'fatigue', 'curiosity', 'last_input', 'age',
+          'times_activated', 'times_rested')
+_GO, _STOP = 1, 2
+
+
+def _share(arrays):
+    """copy arrays into fresh shared memory blocks. returns (blocks, spec)."""
+    blocks, spec = [], {}
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+        np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+        blocks.append(block)
+        spec[name] = (block.name, array.shape, array.dtype)
+    return blocks, spec
+
+
+def _attach(spec):
+    """map every block of a spec. returns (blocks, {name: array})."""
+    blocks, arrays = [], {}
+    for name, (block_name, shape, dtype) in spec.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        blocks.append(block)
+        arrays[name] = np.ndarray(shape, dtype, buffer=block.buf)
+    return blocks, arrays
+
+
+def _view_population(arrays, layout, cells):
+    """a CellPopulation whose state is the shared arrays (sliced to `cells`)."""
+    n = cells.stop - cells.start
+    pop = CellPopulation(n, curiosity=0.0, max_memories=0, **layout['params'])
+    for name in _STATE:
+        setattr(pop, name, arrays[name][cells])
+    for name in layout['param_arrays']:
+        setattr(pop, name, arrays[f'param.{name}'][cells])
+    pop.activation = arrays[f"activation.{layout['ticks'] % 2}"][cells]
+    pop.ticks = layout['ticks']
+    pop.max_memories = layout['max_memories']
+
+    if 'memories.records' in arrays:
+        bank = MemoryBank.__new__(MemoryBank)
+        bank.n = n
+        bank.capacity = layout['max_memories']
+        bank.records = arrays['memories.records'][:, cells]
+        bank.window_sum = arrays['memories.window_sum'][cells]
+        bank.head, bank.count = layout['head'], layout['count']
+        bank.window = layout['window']
+        pop.memories = bank
+    return pop
+
+
+def _halo_weights(weights, lo, hi):
+    """
+    rows lo:hi of the weights, with columns renumbered: this shard's own
+    cells first (0..m-1), then its halo (m..) in the order of `halo`.
+
+    returns: (SparseWeights for the shard, halo cell indices)
+    """
+    start, stop = weights.indptr[lo], weights.indptr[hi]
+    columns = weights.indices[start:stop].astype(np.int64)
+    remote = (columns < lo) | (columns >= hi)
+    halo, where = np.unique(columns[remote], return_inverse=True)
+    local = columns - lo
+    local[remote] = (hi - lo) + where
+    shard = SparseWeights(weights.indptr[lo:hi + 1] - start, local,
+                          weights.weights[start:stop], hi - lo)
+    return shard, halo
+
+
+def _worker(spec, layout, lo, hi, weights, halo, start, ticks_done):
+    """one shard's life: wait for go, tick, wait, until told to stop."""
+    blocks, arrays = _attach(spec)  # mapped until the process exits
+    try:
+        pop = _view_population(arrays, layout, slice(lo, hi))
+        buffers = (arrays['activation.0'], arrays['activation.1'])
+        control, external = arrays['control'], arrays['external']
+        m = hi - lo
+        heard = np.empty(m + len(halo))  # own activations, then the halo
+
+        while True:
+            start.wait()
+            if control[0] == _STOP:
+                return
+            for _ in range(int(control[1])):
+                previous = buffers[pop.ticks % 2]
+                heard[:m] = previous[lo:hi]
+                heard[m:] = previous[halo]              # the halo exchange
+                inputs = weights.matvec(heard)
+                inputs += external[lo:hi]
+                activation = pop.feel(inputs)
+                mine = buffers[pop.ticks % 2][lo:hi]
+                mine[:] = activation
+                pop.activation = mine
+                ticks_done.wait()                       # nobody reads a half-written tick
+            start.wait()
+    except BrokenBarrierError:
+        return
+    except BaseException:
+        start.abort()   # wake the coordinator instead of leaving it at the barrier
+        ticks_done.abort()
+        raise
+
+
+class ShardedBrain:
+    """a Brain whose cells are stepped by worker processes over shared memory."""
+
+    def __init__(self, population, weights, workers=None, context=None):
+        """
+        population: the CellPopulation to move into shared memory (its
+                    state is copied once; use brain.population afterwards)
+        weights: a SparseWeights with one row per cell
+        workers: processes (default: one per core), each owning a
+                 contiguous shard of cells
+        context: multiprocessing start method ('fork', 'spawn', ...)
+        """
+        if weights.n != population.n:
+            raise ValueError(f"weights are for {weights.n} cells, population has {population.n}")
+        if population.memories is not None and not isinstance(population.memories, MemoryBank):
+            raise ValueError("sharded populations need dense memories (sparse=False)")
+        if population.memories is not None and population.memories.tiers is not None:
+            raise ValueError("consolidated memories aren't shared across shards")
+        if population.memories is not None and population.memories.index is not None:
+            raise ValueError("a recall index isn't shared across shards")
+        if population.stats is not None:
+            raise ValueError("track_stats isn't supported across shards")
+        if population.clock is not None:
+            raise ValueError("sharded populations stamp memories with their ticks (clock=None)")
+
+        n = population.n
+        workers = max(1, min(workers or os.cpu_count() or 1, n))
+        bounds = np.linspace(0, n, workers + 1).astype(np.int64)
+        self.shards = [(int(lo), int(hi)) for lo, hi in zip(bounds[:-1], bounds[1:])]
+        self.ticks = 0
+
+        arrays = {name: getattr(population, name) for name in _STATE}
+        current = population.ticks % 2
+        arrays[f'activation.{current}'] = population.activation
+        arrays[f'activation.{1 - current}'] = population.activation
+        arrays['external'] = np.zeros(n)
+        arrays['control'] = np.zeros(2, dtype=np.int64)
+        layout = {'ticks': population.ticks, 'max_memories': population.max_memories,
+                  'params': {}, 'param_arrays': []}
+        for name in cognicell.PARAMS:
+            value = getattr(population, name)
+            if np.ndim(value):
+                arrays[f'param.{name}'] = value
+                layout['param_arrays'].append(name)
+            else:
+                layout['params'][name] = value
+        if population.memories is not None:
+            bank = population.memories
+            arrays['memories.records'] = bank.records
+            arrays['memories.window_sum'] = bank.window_sum
+            layout.update(head=bank.head, count=bank.count, window=bank.window)
+
+        self._blocks, spec = _share(arrays)
+        self._arrays = {name: np.ndarray(shape, dtype, buffer=block.buf)
+                        for block, (name, (_, shape, dtype)) in zip(self._blocks, spec.items())}
+        self.population = _view_population(self._arrays, layout, slice(0, n))
+
+        ctx = mp.get_context(context)
+        self._start = ctx.Barrier(workers + 1)
+        self._ticks_done = ctx.Barrier(workers)
+        self._workers = []
+        self.halo_sizes = []   # per shard: remote activations it reads every tick
+        for lo, hi in self.shards:
+            shard, halo = _halo_weights(weights, lo, hi)
+            self.halo_sizes.append(len(halo))
+            proc = ctx.Process(target=_worker, daemon=True,
+                               args=(spec, layout, lo, hi, shard, halo,
+                                     self._start, self._ticks_done))
+            proc.start()
+            self._workers.append(proc)
+
+    def _go(self, command, ticks=0):
+        control = self._arrays['control']
+        control[0], control[1] = command, ticks
+        try:
+            self._start.wait()      # everyone starts
+            if command == _GO:
+                self._start.wait()  # everyone is done
+        except BrokenBarrierError:
+            self.close()
+            raise RuntimeError("a shard worker died - see its traceback above") from None
+
+    def run(self, ticks, external=0.0):
+        """
+        tick `ticks` times with the same outside drive (one value or one
+        per cell). returns everyone's activation after the last tick.
+        """
+        if not self._workers:
+            raise RuntimeError("this ShardedBrain is closed")
+        ticks = int(ticks)
+        if ticks <= 0:
+            return self.population.activation
+        self._arrays['external'][:] = external
+        self._go(_GO, ticks)
+
+        pop = self.population
+        self.ticks += ticks
+        pop.ticks += ticks
+        pop.activation = self._arrays[f'activation.{pop.ticks % 2}']
+        if pop.memories is not None:
+            # every shard moved its ring the same way
+            bank = pop.memories
+            bank.head = (bank.head + ticks) % bank.capacity
+            bank.count = min(bank.capacity, bank.count + ticks)
+        return pop.activation
+
+    def tick(self, external=0.0):
+        """one step of the whole brain. returns everyone's new activation."""
+        return self.run(1, external)
+
+    def close(self):
+        """
+        stop the workers and free the shared memory. brain.population
+        keeps working afterwards, as a plain copy of the final state.
+        """
+        if self._workers:
+            if all(p.is_alive() for p in self._workers):
+                try:
+                    self._arrays['control'][0] = _STOP
+                    self._start.wait(timeout=10)
+                except BrokenBarrierError:
+                    pass
+            for proc in self._workers:
+                proc.join(timeout=10)
+                if proc.is_alive():
+                    proc.terminate()
+            self._workers = []
+        if self._blocks:
+            self._detach()
+            self._arrays = {}
+            for block in self._blocks:
+                block.close()
+                block.unlink()
+            self._blocks = []
+
+    def _detach(self):
+        """swap every shared view the population holds for a private copy."""
+        pop = self.population
+        for name in _STATE + ('activation',) + cognicell.PARAMS:
+            value = getattr(pop, name)
+            if isinstance(value, np.ndarray):
+                setattr(pop, name, value.copy())
+        if pop.memories is not None:
+            pop.memories.records = pop.memories.records.copy()
+            pop.memories.window_sum = pop.memories.window_sum.copy()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
@@ -0,0 +1,132 @@
+"""
+sweep.py
+is 0.3 too high? try every threshold at once and find out.
+"""
+
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from cognicell import cognicell
+from population import CellPopulation
+
+
+def default_schedule(n_cells, steps=50, rng=0):
+    """
+    the individuality experiment's varied life, for n cells.
+
+    first 20 steps wander in 0.3-0.7, then 0.5-0.8. returns (steps, n_cells).
+    """
+    rng = np.random.default_rng(rng)
+    schedule = np.empty((steps, n_cells))
+    early = min(20, steps)
+    schedule[:early] = 0.3 + 0.4 * rng.random((early, n_cells))
+    schedule[early:] = 0.5 + 0.3 * rng.random((steps - early, n_cells))
+    return schedule
+
+
+def _sweep_block(block, names, schedule, curiosity):
+    """
+    step one block of grid points as a single population.
+
+    grid point j owns cells j*n_cells .. (j+1)*n_cells - 1. returns the
+    per-point metrics for the block.
+    """
+    g = len(block)
+    n_cells = len(curiosity)
+    steps = schedule.shape[0]
+
+    params = {name: np.repeat(block[:, k], n_cells) for k, name in enumerate(names)}
+    pop = CellPopulation(g * n_cells, curiosity=np.tile(curiosity, g),
+                         max_memories=0, **params)
+
+    # every grid point sees the same schedule: tile it once, then live
+    # it in one fused call that only keeps each cell's running sum
+    total = pop.feel_sequence(np.tile(schedule, g), trace=(), reduce=('activation.sum',))
+
+    per_cell = (total['activation.sum'] / steps).reshape(g, n_cells)
+    return (per_cell.mean(axis=1),
+            per_cell.max(axis=1) - per_cell.min(axis=1),
+            pop.fatigue.reshape(g, n_cells).mean(axis=1))
+
+
+def sweep(grid, n_cells=1000, schedule=None, curiosity=None, chunk_cells=1 << 16,
+          rng=0, workers=1):
+    """
+    run the same cells through every combination of parameters.
+
+    grid: {param name: 1-d values}, names from cognicell.PARAMS. the
+          grid's shape is the lengths in insertion order
+    n_cells: cells per grid point
+    schedule: (steps, n_cells) inputs, shared by every grid point so only
+              the parameters differ. defaults to default_schedule()
+    curiosity: per-cell personalities (n_cells,), also shared. defaults
+               to uniform 0.3-0.9
+    chunk_cells: roughly how many cells to step at once. grid points are
+                 stacked side by side into one population of about this
+                 size, so the whole grid is a handful of vectorized runs
+                 instead of one cognicell per point
+    workers: processes to spread the blocks over (1 = run right here).
+             results don't depend on it
+
+    returns: dict of arrays shaped like the grid:
+        mean_activation - average activation over all cells and steps
+        act_range       - spread of per-cell average activation (max - min)
+        final_fatigue   - average fatigue after the last step
+    """
+    names = list(grid)
+    for name in names:
+        if name not in cognicell.PARAMS:
+            raise TypeError(f"unknown cell parameter: {name}")
+    axes = [np.asarray(grid[name], dtype=np.float64) for name in names]
+    shape = tuple(len(a) for a in axes)
+    points = np.array(list(itertools.product(*axes))).reshape(-1, len(names))
+
+    rng = np.random.default_rng(rng)
+    if schedule is None:
+        schedule = default_schedule(n_cells, rng=rng)
+    schedule = np.asarray(schedule, dtype=np.float64)
+    if curiosity is None:
+        curiosity = rng.uniform(0.3, 0.9, n_cells)
+
+    per_chunk = max(1, chunk_cells // n_cells)
+    blocks = [points[i:i + per_chunk] for i in range(0, len(points), per_chunk)]
+    jobs = (blocks, itertools.repeat(names), itertools.repeat(schedule),
+            itertools.repeat(curiosity))
+
+    if workers <= 1 or len(blocks) <= 1:
+        results = list(map(_sweep_block, *jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_sweep_block, *jobs))
+
+    mean_activation, act_range, final_fatigue = (np.concatenate(r) for r in zip(*results))
+    return {
+        'mean_activation': mean_activation.reshape(shape),
+        'act_range': act_range.reshape(shape),
+        'final_fatigue': final_fatigue.reshape(shape),
+    }
+
+
+if __name__ == "__main__":
+    import time
+
+    grid = {
+        'novelty_threshold': np.linspace(0.0, 0.5, 50),
+        'curiosity_boost': np.linspace(0.0, 1.0, 50),
+        'recovery': np.linspace(0.0, 0.01, 20),
+    }
+    print("sweeping 50 x 50 x 20 grid over 1000 cells...")
+    started = time.perf_counter()
+    result = sweep(grid, n_cells=1000, workers=os.cpu_count())
+    print(f"done in {time.perf_counter() - started:.1f}s")
+
+    # which threshold gives the most individuality (averaged over the rest)?
+    spread = result['act_range'].mean(axis=(1, 2))
+    best = np.argmax(spread)
+    near_default = np.argmin(np.abs(grid['novelty_threshold'] - 0.3))
+    print(f"most individual threshold: {grid['novelty_threshold'][best]:.3f} "
+          f"(act range {spread[best]:.3f})")
+    print(f"near 0.3: act range {spread[near_default]:.3f}")
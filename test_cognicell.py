@@ -4,9 +4,15 @@ tests that prove the cells actually work.
 """
 import sys
 import os
+import random
 sys.path.insert(0, os.path.dirname(__file__))
 
+import numpy as np
+
 from cognicell import cognicell
+from clock import TickClock, WallClock
+from compact_cell import CompactCell
+from memory import MemoryRing
 
 
 def test_basics():
@@ -129,6 +135,217 @@ def test_memory():
     return True
 
 
+def test_memory_ring():
+    """do memories still read like dicts after the ring wraps around?"""
+    print("\ntest 7: memory ring...")
+    c = cognicell(id=301)
+    
+    for i in range(250):
+        c.feel(i * 0.01)
+    
+    # newest is the last thing we felt, oldest is 100 steps back
+    assert c.memories[-1]['input'] == 2.49, f"newest wrong: {c.memories[-1]['input']}"
+    assert c.memories[0]['input'] == 1.5, f"oldest wrong: {c.memories[0]['input']}"
+    assert c.memories[-1]['output'] == c.activation, "output not remembered"
+    assert set(dict(c.memories[5])) == {'input', 'output', 'fatigue', 'time'}, "fields changed"
+    
+    # slices and iteration walk oldest -> newest
+    last = [m['input'] for m in c.memories[-3:]]
+    assert last == [2.47, 2.48, 2.49], f"slice order wrong: {last}"
+    assert len(list(c.memories)) == 100, "iteration length wrong"
+    assert list(c.memories.column('input')) == [m['input'] for m in c.memories]
+    print("  ✓ ring buffer keeps fifo order across wraparound")
+    
+    return True
+
+
+def test_feel_constant():
+    """does fast-forwarding give the same life as feeling step by step?"""
+    print("\ntest 8: fast-forward...")
+    
+    for steps in (1, 40, 150, 2000):
+        slow = cognicell(id=400, curiosity=0.7)
+        fast = cognicell(id=401, curiosity=0.7)
+        for c in (slow, fast):
+            c.feel(0.1)  # so the first constant step is a novelty
+        
+        for _ in range(steps):
+            slow.feel(0.8)
+        fast.feel_constant(0.8, steps)
+        
+        assert fast.activation == slow.activation, f"{steps}: activation differs"
+        assert fast.fatigue == slow.fatigue, f"{steps}: fatigue differs"
+        assert fast.age == slow.age and fast.times_activated == slow.times_activated
+        assert len(fast.memories) == len(slow.memories), f"{steps}: memory count differs"
+        for field in ('input', 'output', 'fatigue', 'time'):
+            assert list(fast.memories.column(field)) == list(slow.memories.column(field)), \
+                f"{steps}: {field} memories differ"
+    
+    print(f"  ✓ identical state, saturated at fatigue {fast.fatigue:.3f}")
+    return True
+
+
+def test_quiet_birth():
+    """can cells be born without shouting about it?"""
+    print("\ntest 9: quiet births...")
+    heard = []
+    cognicell.logger = heard.append
+    try:
+        cognicell(id=500, curiosity=0.4)
+        cognicell(id=501, curiosity=0.4, quiet=True)
+        cognicell.spawn_many(1000, rng=3)
+    finally:
+        cognicell.logger = print
+    
+    assert heard == ["cell 500 born. curiosity: 0.40"], f"wrong announcements: {heard}"
+    print("  ✓ only the loud cell was announced")
+    
+    return True
+
+
+def test_spawn_many():
+    """does bulk spawning give a ready-to-use, reproducible population?"""
+    print("\ntest 10: spawning in bulk...")
+    a = cognicell.spawn_many(10_000, rng=42)
+    b = cognicell.spawn_many(10_000, rng=42)
+    
+    assert len(a) == 10_000, "wrong number of cells"
+    assert (a.curiosity == b.curiosity).all(), "same seed, different personalities"
+    assert 0.3 <= a.curiosity.min() and a.curiosity.max() <= 0.9, "curiosity out of range"
+    assert (a.fatigue == 0).all() and (a.age == 0).all(), "not born fresh"
+    
+    a.feel(0.5)
+    assert (a.age == 1).all(), "population can't feel"
+    print(f"  ✓ {len(a)} cells spawned, mean curiosity {a.curiosity.mean():.2f}")
+    
+    return True
+
+
+def test_clocks():
+    """are memory stamps reproducible, and can cells share a timeline?"""
+    print("\ntest 11: clocks...")
+    
+    # default: stamps are logical ticks, identical on every run
+    a = cognicell(id=600, curiosity=0.5)
+    b = cognicell(id=601, curiosity=0.5)
+    for c in (a, b):
+        for x in (0.2, 0.9, 0.4):
+            c.feel(x)
+    assert [m['time'] for m in a.memories] == [1.0, 2.0, 3.0], "ticks should count steps"
+    assert list(a.memories.ordered()) == list(b.memories.ordered()), "traces not reproducible"
+    
+    # a shared tick clock interleaves two cells on one timeline
+    shared = TickClock()
+    c = cognicell(id=602, clock=shared)
+    d = cognicell(id=603, clock=shared)
+    c.feel(0.1)
+    d.feel(0.1)
+    c.feel_constant(0.1, 500)
+    d.feel(0.1)
+    assert d.memories[0]['time'] == 2.0, "second cell should stamp tick 2"
+    assert c.memories[-1]['time'] == 502.0 and d.memories[-1]['time'] == 503.0
+    
+    # wall clock is the old behaviour: real seconds
+    e = cognicell(id=604, clock=WallClock())
+    e.feel(0.3)
+    assert e.memories[0]['time'] > 1e9, "wall clock should be epoch seconds"
+    print("  ✓ logical, shared and wall clocks all stamp correctly")
+    
+    return True
+
+
+def test_running_stats():
+    """do the running stats agree with computing them the slow way?"""
+    print("\ntest 12: running stats...")
+    c = cognicell(id=700, curiosity=0.6, track_stats=True)
+    
+    outs = []
+    for i in range(1234):
+        outs.append(c.feel(((i * 37) % 17) / 17.0))
+        status = c.how_are_you()
+        slow = sum(outs[-10:]) / len(outs[-10:])
+        assert abs(status['avg_feeling'] - slow) < 1e-12, f"step {i}: rolling mean drifted"
+    
+    mean = sum(outs) / len(outs)
+    var = sum((o - mean) ** 2 for o in outs) / len(outs)
+    assert abs(status['var_feeling'] - var) < 1e-12, "variance wrong"
+    assert status['min_feeling'] == min(outs) and status['max_feeling'] == max(outs)
+    
+    # fast-forward updates stats in closed form
+    d = cognicell(id=701, curiosity=0.6, track_stats=True)
+    e = cognicell(id=702, curiosity=0.6, track_stats=True)
+    for _ in range(300):
+        d.feel(0.5)
+    e.feel_constant(0.5, 300)
+    for key in ('avg_feeling', 'ewma_feeling', 'var_feeling', 'min_feeling', 'max_feeling'):
+        assert abs(d.how_are_you()[key] - e.how_are_you()[key]) < 1e-12, f"{key} differs"
+    print(f"  ✓ mean/var/min/max/ewma match, var={var:.4f}")
+    
+    return True
+
+
+def test_rng_streams():
+    """do personalities come from the stream we hand in, and only from it?"""
+    print("\ntest 13: random streams...")
+    
+    # same seed, same cell - and the global `random` module plays no part
+    random.seed(1)
+    a = cognicell(id=700, rng=5, quiet=True)
+    random.seed(2)
+    b = cognicell(id=701, rng=5, quiet=True)
+    assert a.curiosity == b.curiosity, "seeded cells differ"
+    assert 0.3 <= a.curiosity <= 0.9, "curiosity out of range"
+    
+    # one generator, cells one by one == a population in one call
+    gen = np.random.default_rng(9)
+    cells = [cognicell(id=i, rng=gen, quiet=True) for i in range(50)]
+    pop = cognicell.spawn_many(50, rng=9)
+    assert np.array_equal([c.curiosity for c in cells], pop.curiosity), "scalar and bulk draws differ"
+    print("  ✓ seeded personalities repeat, one-by-one matches bulk")
+    
+    return True
+
+
+def test_compact_cell():
+    """does the packed cell live the same life in a fraction of the bytes?"""
+    print("\ntest 14: compact cells...")
+    Small = CompactCell.variant(precision='f')
+    reference = cognicell(id=800, curiosity=0.6, quiet=True)
+    exact = CompactCell(id=800, curiosity=0.6)
+    small = Small(id=800, curiosity=0.6)
+    
+    rng = np.random.default_rng(14)
+    for step in range(500):
+        x = rng.uniform(-1, 1) if step % 4 else 0.8
+        want = reference.feel(x)
+        assert exact.feel(x) == want, f"float64 compact differs at step {step}"
+        assert abs(small.feel(x) - want) < 1e-5, f"float32 drifted at step {step}"
+        if step % 97 == 0:
+            reference.rest(), exact.rest(), small.rest()
+    
+    assert np.array_equal(exact.memory_column('output'), reference.memories.column('output'))
+    assert np.allclose(small.memory_column('fatigue'), reference.memories.column('fatigue'), atol=1e-5)
+    assert small.memories[-1]['time'] == reference.memories[-1]['time'] == 500
+    assert abs(small.how_are_you()['avg_feeling'] - reference.how_are_you()['avg_feeling']) < 1e-5
+    
+    # the recent average comes out bit for bit, whatever step we poll at
+    for memories in (100, 19, 30):
+        Sized = CompactCell.variant(max_memories=memories)
+        reference = cognicell(id=801, curiosity=0.6, quiet=True)
+        reference.memories = MemoryRing(memories)
+        exact = Sized(id=801, curiosity=0.6)
+        for step in range(130):
+            x = rng.uniform(-1, 1)
+            reference.feel(x), exact.feel(x)
+            assert exact.how_are_you()['avg_feeling'] == reference.how_are_you()['avg_feeling'], \
+                f"{memories} memories: avg_feeling differs at step {step}"
+    
+    assert small.nbytes < 2000 and exact.nbytes < 3500, f"too big: {small.nbytes}, {exact.nbytes}"
+    print(f"  ✓ float64 exact, float32 within 1e-5, {small.nbytes} bytes a cell")
+    
+    return True
+
+
 def run_all_tests():
     """run the full test suite."""
     print("=" * 50)
@@ -141,7 +358,15 @@ def run_all_tests():
         test_tiredness,
         test_rest,
         test_curiosity,
-        test_memory
+        test_memory,
+        test_memory_ring,
+        test_feel_constant,
+        test_quiet_birth,
+        test_spawn_many,
+        test_clocks,
+        test_running_stats,
+        test_rng_streams,
+        test_compact_cell
     ]
     
     passed = 0
@@ -0,0 +1,138 @@
+"""
+test_experiment.py
+tests that prove experiments give the same answers however they're run.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+
+import contextlib
+import io
+import tempfile
+
+from real_experiment import main, real_experiment
+
+
+def _quietly(fn, *args):
+    """experiments talk a lot - keep the test output readable."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args)
+
+
+def test_workers_dont_matter():
+    """does spreading trials over processes change the data?"""
+    print("test 1: serial vs parallel...")
+
+    runs = []
+    for workers in (1, 2):
+        exp = _quietly(real_experiment, 1234, workers)
+        _quietly(exp.test_homeostasis, 6)
+        _quietly(exp.test_curiosity, 6)
+        _quietly(exp.test_individuality, 7)
+        runs.append(exp.data)
+
+    assert repr(runs[0]) == repr(runs[1]), "results depend on worker count"
+    print("  ✓ same data with 1 or 2 workers")
+
+    return True
+
+
+def test_seed_matters():
+    """do different master seeds actually give different lives?"""
+    print("\ntest 2: seeds...")
+
+    ranges = []
+    for seed in (1, 2):
+        exp = _quietly(real_experiment, seed)
+        _quietly(exp.test_individuality, 5)
+        ranges.append(exp.data[0]['act_range'])
+
+    assert ranges[0] != ranges[1], "seed ignored"
+    print("  ✓ master seed drives every trial")
+
+    return True
+
+
+def test_sequential_stops_early():
+    """does a sequential curiosity test see the same trials, and fewer of them?"""
+    print("\ntest 3: sequential curiosity...")
+
+    fixed = _quietly(real_experiment, 99)
+    _quietly(fixed.test_curiosity, 40)
+    full = fixed.data[0]
+
+    for kind in ('group', 'sprt'):
+        exp = _quietly(real_experiment, 99, 2)
+        assert _quietly(exp.test_curiosity, 40, kind), f"{kind}: effect not found"
+        seq = exp.data[0]
+        n = seq['sequential']['trials']
+        assert n < 40, f"{kind}: never stopped early"
+        # batches start where the last one ended - trial i is trial i
+        assert seq['ratios'] == full['ratios'][:n], f"{kind}: trials differ from a fixed run"
+        assert seq['p'] <= 0.05
+        print(f"  ✓ {kind}: decided after {n} of 40 trials, p={seq['p']:.2g}")
+
+    return True
+
+
+def test_cli_few_trials():
+    """does the headless cli cope with fewer trials than a group test has looks?"""
+    print("\ntest 4: cli with --trials 5...")
+
+    here = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)   # the report lands in the working directory
+        try:
+            for kind in ('group', 'sprt'):
+                _quietly(main, ['--trials', '5', '--sequential', kind, '--no-plot', '--seed', '3'])
+            assert len([f for f in os.listdir(tmp) if f.startswith('report_')]) >= 1
+            try:
+                with contextlib.redirect_stderr(io.StringIO()):
+                    main(['--trials', '1', '--sequential', 'group', '--no-plot'])
+                assert False, "--trials 1 --sequential accepted"
+            except SystemExit as e:
+                assert e.code == 2, "expected an argparse error"
+        finally:
+            os.chdir(here)
+    print("  ✓ --trials 5 runs both sequential tests, --trials 1 is refused")
+
+    return True
+
+
+def run_all_tests():
+    """run the full test suite."""
+    print("=" * 50)
+    print("testing real_experiment...")
+    print("=" * 50)
+
+    tests = [
+        test_workers_dont_matter,
+        test_seed_matters,
+        test_sequential_stops_early,
+        test_cli_few_trials,
+    ]
+
+    passed = 0
+    results = []
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+                results.append((test.__name__, "✓ PASS"))
+        except AssertionError as e:
+            results.append((test.__name__, f"✗ FAIL: {e}"))
+        except Exception as e:
+            results.append((test.__name__, f"💥 ERROR: {e}"))
+
+    for name, status in results:
+        print(f"{name:28} {status}")
+
+    print("\n" + "=" * 50)
+    print(f"summary: {passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,157 @@
+"""
+test_online_stats.py
+tests that prove the streaming stats agree with the batch ones.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pickle
+
+import numpy as np
+
+from cognicell import cognicell
+from online_stats import Covariance, Histogram, Moments, merge_all
+from real_experiment import homeostasis_trial, individuality_trial
+
+
+def test_moments_match_numpy():
+    """do one-at-a-time, batched and merged moments all equal numpy's?"""
+    print("test 1: moments...")
+    xs = np.random.default_rng(1).normal(3.0, 2.0, 10_000)
+
+    one = Moments()
+    for x in xs:
+        one.update(x)
+    batched = Moments()
+    for part in np.array_split(xs, 7):
+        batched.update_many(part)
+    shards = [Moments() for _ in range(4)]
+    for i, part in enumerate(np.array_split(xs, 4)):
+        shards[i].update_many(part)
+    merged = merge_all(reversed(shards))  # order doesn't matter
+
+    for m in (one, batched, merged):
+        assert m.n == len(xs)
+        assert np.isclose(m.mean, xs.mean(), rtol=1e-12), f"mean off: {m.mean}"
+        assert np.isclose(m.variance, xs.var(), rtol=1e-10), f"variance off: {m.variance}"
+        assert np.isclose(m.sample_variance(), xs.var(ddof=1), rtol=1e-10)
+        assert m.min == xs.min() and m.max == xs.max()
+    print("  ✓ single, batched and merged all match np.mean / np.var")
+
+    return True
+
+
+def test_covariance_match_numpy():
+    """does the streaming correlation equal np.corrcoef, merged or not?"""
+    print("\ntest 2: covariance...")
+    rng = np.random.default_rng(2)
+    xs = rng.uniform(0, 1, 5000)
+    ys = 0.3 * xs + rng.normal(0, 0.1, 5000)
+
+    one = Covariance()
+    for x, y in zip(xs, ys):
+        one.update(x, y)
+    shards = []
+    for px, py in zip(np.array_split(xs, 3), np.array_split(ys, 3)):
+        acc = Covariance()
+        acc.update_many(px, py)
+        shards.append(pickle.loads(pickle.dumps(acc)))  # as if back from a worker
+    merged = merge_all(shards)
+
+    r = np.corrcoef(xs, ys)[0, 1]
+    cov = np.cov(xs, ys, bias=True)[0, 1]
+    for acc in (one, merged):
+        assert np.isclose(acc.correlation, r, rtol=1e-10), f"r off: {acc.correlation} vs {r}"
+        assert np.isclose(acc.covariance, cov, rtol=1e-10), "covariance off"
+    assert np.isnan(Covariance().correlation), "empty correlation should be nan"
+    print(f"  ✓ r={r:.4f} streamed, batched and merged")
+
+    return True
+
+
+def test_histogram_sketch():
+    """are histogram quantiles within a bin width, and do sketches merge?"""
+    print("\ntest 3: histogram sketch...")
+    xs = np.random.default_rng(3).normal(0.0, 0.4, 20_000)
+
+    one = Histogram(-1, 1, bins=100)
+    for x in xs[:500]:
+        one.update(x)
+    one.update_many(xs[500:])
+    halves = [Histogram(-1, 1, bins=100), Histogram(-1, 1, bins=100)]
+    halves[0].update_many(xs[:12_345])
+    halves[1].update_many(xs[12_345:])
+    merged = merge_all(halves)
+
+    assert np.array_equal(one.counts, merged.counts), "merged counts differ"
+    assert one.n == len(xs), "values went missing"
+    assert one.below == (xs < -1).sum() and one.above == (xs >= 1).sum()
+    assert np.array_equal(one.counts, np.histogram(xs[(xs >= -1) & (xs < 1)], bins=one.edges)[0])
+    for q in (0.1, 0.5, 0.9):
+        assert abs(one.quantile(q) - np.quantile(xs, q)) <= 0.02, f"quantile {q} off"
+    print("  ✓ counts exact, quantiles within one bin")
+
+    return True
+
+
+def test_trials_match_batch():
+    """do the experiment trials still report what the old list-based code did?"""
+    print("\ntest 4: experiment trials...")
+    seed = np.random.SeedSequence(7)
+
+    # rebuild the old homeostasis numbers by hand, with lists
+    acc = homeostasis_trial(0, seed)
+    cell = cognicell(id="again", quiet=True, rng=np.random.default_rng(seed))
+    acts, fats = [], []
+    for _ in range(50):
+        acts.append(cell.feel(0.7))
+        fats.append(cell.fatigue)
+    assert np.isclose(acc.correlation, np.corrcoef(acts, fats)[0, 1], rtol=1e-12)
+
+    # a long trial keeps the same few numbers around
+    long_run = individuality_trial(0, seed, cycles=20_000)
+    assert long_run['acts'].n == 20_000 and long_run['hist'].n == 20_000
+    assert len(pickle.dumps(long_run)) < 4096, "trial result grows with cycles"
+    print(f"  ✓ corr {acc.correlation:.4f} matches np.corrcoef, results stay small")
+
+    return True
+
+
+def run_all_tests():
+    """run the full test suite."""
+    print("=" * 50)
+    print("testing online stats...")
+    print("=" * 50)
+
+    tests = [
+        test_moments_match_numpy,
+        test_covariance_match_numpy,
+        test_histogram_sketch,
+        test_trials_match_batch,
+    ]
+
+    passed = 0
+    results = []
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+                results.append((test.__name__, "✓ PASS"))
+        except AssertionError as e:
+            results.append((test.__name__, f"✗ FAIL: {e}"))
+        except Exception as e:
+            results.append((test.__name__, f"💥 ERROR: {e}"))
+
+    for name, status in results:
+        print(f"{name:28} {status}")
+
+    print("\n" + "=" * 50)
+    print(f"summary: {passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,845 @@
+"""
+test_population.py
+tests that prove a population lives the same life as single cells,
+and that a brain wires them together the way friends lists would.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+
+import json
+import tempfile
+
+import numpy as np
+
+from cognicell import cognicell
+from population import CellPopulation
+from brain import Brain, SparseWeights, random_regular, small_world, grid
+from sweep import sweep, default_schedule
+from traces import TraceRecorder, TraceReader
+import checkpoint
+from scheduler import Scheduler, RestWhenTired, RestEvery
+from sharded import ShardedBrain
+from recall import scan
+from memory import MemoryBank, MemoryRing, SparseMemoryBank
+from clock import TickClock
+from replay import Recording, replay, diverge
+
+
+def test_matches_cells():
+    """does a population match a loop over scalar cells bit for bit?"""
+    print("test 1: population vs single cells...")
+    rng = np.random.default_rng(7)
+    curiosities = rng.uniform(0.1, 0.9, 20)
+
+    cells = [cognicell(id=i, curiosity=c) for i, c in enumerate(curiosities)]
+    pop = CellPopulation(20, curiosity=curiosities)
+
+    # mix of small drifts and big jumps so novelty fires sometimes
+    for step in range(200):
+        inputs = rng.uniform(-1.0, 1.0, 20) if step % 7 else rng.uniform(0.4, 0.5, 20)
+        expected = [c.feel(x) for c, x in zip(cells, inputs)]
+        got = pop.feel(inputs)
+        assert list(got) == expected, f"step {step} differs"
+
+        if step % 25 == 24:
+            for c in cells[::2]:
+                c.rest()
+            pop.rest(np.arange(0, 20, 2))
+
+    assert list(pop.fatigue) == [c.fatigue for c in cells], "fatigue drifted"
+    assert list(pop.age) == [c.age for c in cells], "age drifted"
+    assert list(pop.times_rested) == [c.times_rested for c in cells], "rest counter wrong"
+    print("  ✓ identical activations and fatigue for 200 steps")
+
+    return True
+
+
+def test_from_cells():
+    """can an experiment switch engines halfway through?"""
+    print("\ntest 2: switching engines...")
+    cells = [cognicell(id=i, curiosity=0.2 + 0.1 * i) for i in range(5)]
+    for c in cells:
+        for x in (0.1, 0.9, 0.5):
+            c.feel(x)
+
+    pop = CellPopulation.from_cells(cells)
+    got = pop.feel(0.8)
+    expected = [c.feel(0.8) for c in cells]
+
+    assert list(got) == expected, "switching engines changed the answer"
+    assert pop.how_are_you(3)['age'] == cells[3].age, "age lost in the move"
+    print("  ✓ population picks up where the cells left off")
+
+    return True
+
+
+def test_population_memory():
+    """does everyone remember the same things a single cell would?"""
+    print("\ntest 3: population memories...")
+    cells = [cognicell(id=i, curiosity=0.5) for i in range(4)]
+    pop = CellPopulation(4, curiosity=0.5)
+
+    for step in range(130):
+        inputs = np.array([0.1, 0.4, 0.7, 1.0]) * ((step % 5) / 4)
+        for c, x in zip(cells, inputs):
+            c.feel(x)
+        pop.feel(inputs)
+
+    assert len(pop.memories) == 100, f"memory wrong size: {len(pop.memories)}"
+    for field in ('input', 'output', 'fatigue', 'time'):
+        assert np.array_equal(pop.memories.column(field)[:, 2], cells[2].memories.column(field)), \
+            f"{field} memories differ"
+    assert pop.memories.cell(1)[0]['input'] == cells[1].memories[0]['input'], "oldest differs"
+
+    status = pop.how_are_you(3)
+    assert abs(status['avg_feeling'] - cells[3].how_are_you()['avg_feeling']) < 1e-12
+    print("  ✓ memory bank matches every cell's ring")
+
+    return True
+
+
+def test_advance_constant():
+    """does a fast-forwarded population end where a stepped one does?"""
+    print("\ntest 4: population fast-forward...")
+    inputs = np.linspace(-1.0, 1.0, 9)
+
+    for steps in (3, 120, 5000):
+        slow = CellPopulation(9, curiosity=np.linspace(0.1, 0.9, 9))
+        fast = CellPopulation(9, curiosity=np.linspace(0.1, 0.9, 9))
+        for _ in range(steps):
+            slow.feel(inputs)
+        fast.advance_constant(inputs, steps)
+
+        assert np.array_equal(fast.activation, slow.activation), f"{steps}: activation differs"
+        assert np.array_equal(fast.fatigue, slow.fatigue), f"{steps}: fatigue differs"
+        assert np.array_equal(fast.age, slow.age), f"{steps}: age differs"
+        for field in ('input', 'output', 'fatigue', 'time'):
+            assert np.array_equal(fast.memories.column(field), slow.memories.column(field)), \
+                f"{steps}: {field} memories differ"
+
+    # sparse populations fast-forward too (each cell keeps its own ring)
+    slow = CellPopulation(5, curiosity=0.5, sparse=True)
+    fast = CellPopulation(5, curiosity=0.5, sparse=True)
+    slow.feel(0.3)
+    fast.feel(0.3)
+    for _ in range(500):
+        slow.feel(0.8)
+    fast.advance_constant(0.8, 500)
+    assert np.array_equal(fast.fatigue, slow.fatigue), "sparse: fatigue differs"
+    for field in ('input', 'output', 'fatigue', 'time'):
+        assert np.array_equal(fast.memories.cell_column(3, field), slow.memories.cell_column(3, field)), \
+            f"sparse: {field} memories differ"
+
+    print("  ✓ same end state without living every step")
+    return True
+
+
+def test_brain_matches_friends():
+    """does a brain pass signals the way a loop over friends would?"""
+    print("\ntest 5: brain signal passing...")
+    cells = [cognicell(id=i, curiosity=0.3 + 0.1 * i) for i in range(6)]
+    twins = [cognicell(id=i, curiosity=0.3 + 0.1 * i) for i in range(6)]
+    for group in (cells, twins):
+        for i, c in enumerate(group):
+            c.friends = [group[(i + 1) % 6], group[(i + 3) % 6]]
+        group[5].friends = []  # a loner, hears nothing
+
+    brain = Brain.from_cells(cells)
+    for tick in range(30):
+        drive = 0.5 if tick % 10 < 5 else -0.2
+        heard = [sum(f.activation for f in c.friends) / len(c.friends) if c.friends else 0.0
+                 for c in twins]
+        expected = [c.feel(h + drive) for c, h in zip(twins, heard)]
+        got = brain.tick(drive)
+        assert np.allclose(got, expected, rtol=0, atol=1e-12), f"tick {tick} differs"
+
+    print("  ✓ sparse mat-vec matches friends lists")
+    return True
+
+
+def test_topologies():
+    """do the graph builders make the graphs they promise?"""
+    print("\ntest 6: topologies...")
+    for w in (random_regular(500, 8, rng=1), small_world(500, 8, p=0.2, rng=1)):
+        degrees = np.diff(w.indptr)
+        assert (degrees == 8).all(), "wrong number of friends"
+        for i in (0, 123, 499):
+            friends = w.friends_of(i)
+            assert i not in friends, "cell is its own friend"
+            assert len(set(friends.tolist())) == 8, "same friend twice"
+
+    sheet = grid(4, 5, periodic=False)
+    assert sorted(sheet.friends_of(0).tolist()) == [1, 5], "corner should have 2 friends"
+    assert len(sheet.friends_of(6)) == 4, "middle should have 4 friends"
+    for rows, cols, friends in ((2, 5, 3), (2, 2, 2), (1, 4, 2), (1, 1, 0)):
+        torus = grid(rows, cols)
+        for i in range(rows * cols):
+            mine = torus.friends_of(i).tolist()
+            assert i not in mine and len(set(mine)) == len(mine) == friends, \
+                f"{rows}x{cols} torus: cell {i} has friends {mine}"
+
+    dense = np.zeros((20, 20))
+    for i in range(20):
+        lo, hi = sheet.indptr[i], sheet.indptr[i + 1]
+        dense[i, sheet.indices[lo:hi]] = sheet.weights[lo:hi]
+    x = np.random.default_rng(3).uniform(-1, 1, 20)
+    assert np.allclose(sheet.matvec(x), dense @ x), "mat-vec wrong"
+
+    empty = SparseWeights.from_edges([0], [2], [1.0], 4)
+    assert list(empty.matvec(np.array([3.0, 0, 0, 0]))) == [0, 0, 3.0, 0], "empty rows broken"
+    print("  ✓ regular, small-world and grid graphs look right")
+    return True
+
+
+def test_parameters():
+    """do per-cell parameters behave like the same knobs on single cells?"""
+    print("\ntest 7: per-cell parameters...")
+    thresholds = [0.05, 0.3, 0.6]
+    cells = [cognicell(id=i, curiosity=0.8, novelty_threshold=t, recovery=0.004, rest_amount=0.2)
+             for i, t in enumerate(thresholds)]
+    pop = CellPopulation(3, curiosity=0.8, novelty_threshold=thresholds,
+                         recovery=0.004, rest_amount=[0.2, 0.2, 0.2])
+
+    for step in range(60):
+        x = 0.1 + 0.2 * (step % 4)
+        assert list(pop.feel(x)) == [c.feel(x) for c in cells], f"step {step} differs"
+    pop.rest()
+    for c in cells:
+        c.rest()
+    assert list(pop.fatigue) == [c.fatigue for c in cells], "rest amount ignored"
+
+    try:
+        cognicell(id=9, novelty=0.1)
+        assert False, "typo in a parameter name should fail"
+    except TypeError:
+        pass
+    print("  ✓ thresholds, recovery and rest match cell by cell")
+    return True
+
+
+def test_sweep():
+    """does a sweep grid point give the same numbers as running it alone?"""
+    print("\ntest 8: parameter sweep...")
+    grid = {'novelty_threshold': [0.1, 0.3], 'curiosity_boost': [0.0, 0.5, 1.0]}
+    curiosity = np.linspace(0.3, 0.9, 40)
+    schedule = default_schedule(40, steps=30, rng=5)
+
+    result = sweep(grid, n_cells=40, schedule=schedule, curiosity=curiosity, chunk_cells=100)
+    assert result['mean_activation'].shape == (2, 3), "grid shape lost"
+
+    pop = CellPopulation(40, curiosity=curiosity, max_memories=0,
+                         novelty_threshold=0.3, curiosity_boost=1.0)
+    acts = np.mean([pop.feel(x) for x in schedule], axis=0)
+    assert np.isclose(result['mean_activation'][1, 2], acts.mean(), rtol=0, atol=1e-12)
+    assert np.isclose(result['act_range'][1, 2], acts.max() - acts.min(), rtol=0, atol=1e-12)
+    assert result['final_fatigue'][1, 2] == pop.fatigue.mean(), "final fatigue differs"
+    print("  ✓ every grid point matches a standalone run")
+    return True
+
+
+def test_status_arrays():
+    """can we poll everyone at once and get what each cell would say?"""
+    print("\ntest 9: status columns...")
+    rng = np.random.default_rng(11)
+    cells = [cognicell(id=i, curiosity=0.5, track_stats=True) for i in range(5)]
+    pop = CellPopulation(5, curiosity=0.5, track_stats=True)
+
+    for step in range(257):
+        inputs = rng.uniform(-1, 1, 5)
+        for c, x in zip(cells, inputs):
+            c.feel(x)
+        pop.feel(inputs)
+
+    columns = pop.status_arrays()
+    for i, c in enumerate(cells):
+        expected = c.how_are_you()
+        assert pop.how_are_you(i).keys() == expected.keys(), "different keys"
+        for key in ('feeling', 'tired', 'age', 'memories', 'avg_feeling', 'min_feeling', 'max_feeling'):
+            assert columns[key][i] == expected[key], f"cell {i}: {key} differs"
+        for key in ('ewma_feeling', 'var_feeling'):
+            assert abs(columns[key][i] - expected[key]) < 1e-12, f"cell {i}: {key} differs"
+    print("  ✓ one read per column, same answers as each cell")
+    return True
+
+
+def test_trace_roundtrip():
+    """does a streamed trace read back exactly what the cells lived?"""
+    print("\ntest 10: trace recorder...")
+    rng = np.random.default_rng(5)
+    pop = CellPopulation(37, curiosity=0.5)
+
+    with tempfile.TemporaryDirectory() as directory:
+        # tiny blocks so the run spans lots of segments and partial batches
+        with TraceRecorder(directory, block_rows=100, max_pending=2) as rec:
+            for step in range(60):
+                x = rng.uniform(-1, 1, 37)
+                pop.feel(x)
+                rec.record_population(pop, x)
+
+        trace = TraceReader(directory)
+        assert len(trace) == 60 * 37, f"wrong row count: {len(trace)}"
+        assert len(trace.manifest['segments']) == 23, "expected many segments"
+
+        # a cell's recorded life ends with the memories it still has
+        life = trace.cell(12)
+        assert list(life['tick']) == list(range(1, 61)), "ticks out of order"
+        assert np.array_equal(life['output'][-len(pop.memories):], pop.memories.column('output')[:, 12])
+        assert life['fatigue'][-1] == pop.fatigue[12], "last fatigue differs"
+
+        window = trace.ticks(10, 13)
+        assert len(window['tick']) == 3 * 37 and set(window['tick']) == {10, 11, 12}
+    print("  ✓ segments, tick slices and per-cell histories read back exactly")
+    return True
+
+
+def test_checkpoint_resume():
+    """does a saved population pick up exactly where it left off?"""
+    print("\ntest 11: checkpoint and resume...")
+    rng = np.random.default_rng(8)
+    drive = rng.uniform(-1, 1, (30, 50))
+    pop = CellPopulation(50, curiosity=rng.uniform(0, 1, 50), track_stats=True,
+                         rest_amount=np.linspace(0.05, 0.2, 50))
+    for x in drive[:20]:
+        pop.feel(x)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'pop.ckpt')
+        checkpoint.save(pop, path)
+        back = checkpoint.load(path)
+        assert isinstance(back.fatigue, np.memmap) or isinstance(back.fatigue.base, np.memmap), \
+            "state should be mapped, not copied"
+        assert back.how_are_you(7) == pop.how_are_you(7), "status differs after load"
+
+        # both keep living the same life
+        for x in drive[20:]:
+            assert np.array_equal(pop.feel(x), back.feel(x)), "resumed run diverged"
+        pop.rest([3, 4])
+        back.rest([3, 4])
+        assert np.array_equal(back.memories.column('output'), pop.memories.column('output'))
+        assert back.how_are_you(3) == pop.how_are_you(3)
+
+        # saving over the same file only rewrites what changed
+        written = checkpoint.save(back, path)
+        assert written < os.path.getsize(path), "incremental save rewrote everything"
+        del back
+        again = checkpoint.load(path, mode='r')
+        assert np.array_equal(again.fatigue, pop.fatigue), "incremental save lost changes"
+        assert again.ticks == pop.ticks and again.how_are_you(9) == pop.how_are_you(9)
+        del again
+
+        # a new layout over the file its own arrays are mapped from
+        back = checkpoint.load(path)
+        pop.feel(drive[0])
+        back.feel(drive[0])
+        recovery = np.linspace(0.01, 0.1, 50)
+        pop.set_param('recovery', recovery)
+        back.set_param('recovery', recovery)
+        checkpoint.save(back, path)
+        again = checkpoint.load(path, mode='r')
+        for name in ('fatigue', 'age', 'curiosity', 'ids', 'recovery'):
+            assert np.array_equal(getattr(again, name), getattr(pop, name)), f"{name} lost on resave"
+        assert np.array_equal(again.memories.records, pop.memories.records)
+        del back, again
+
+        # state a checkpoint can't hold is refused, not dropped
+        consolidated = CellPopulation(5, curiosity=0.5, max_memories=8)
+        consolidated.memories.consolidate()
+        indexed = CellPopulation(5, curiosity=0.5, max_memories=8)
+        indexed.index_memories()
+        for other in (consolidated, indexed):
+            try:
+                checkpoint.save(other, os.path.join(directory, 'other.ckpt'))
+                assert False, "saved memories it can't restore"
+            except ValueError:
+                pass
+        assert os.listdir(directory) == ['pop.ckpt'], "left a scratch file behind"
+    print("  ✓ mapped load, identical resume, incremental and relayout saves")
+    return True
+
+
+def test_scheduler():
+    """does stepping only the busy cells give the same lives as stepping everyone?"""
+    print("\ntest 12: scheduler...")
+    rng = np.random.default_rng(12)
+    n = 25
+    curiosity = rng.uniform(0.3, 0.9, n)
+    busy = rng.random((300, n)) < 0.15
+    drive = rng.uniform(-1, 1, (300, n))
+
+    for passive in (False, True):
+        cells = [cognicell(id=i, curiosity=c, quiet=True) for i, c in enumerate(curiosity)]
+        pop = CellPopulation(n, curiosity=curiosity, sparse=True)
+        sched = Scheduler(pop, [RestWhenTired(0.4), RestEvery(9)], passive_recovery=passive)
+
+        for t in range(1, 301):
+            active = np.flatnonzero(busy[t - 1])
+            sched.tick(active, drive[t - 1, active])
+            # the reference: every cell, every tick
+            for i, c in enumerate(cells):
+                if busy[t - 1, i]:
+                    c.feel(drive[t - 1, i])
+                    if c.fatigue > 0.4:
+                        c.rest()
+                elif passive:
+                    c.fatigue = max(0.0, c.fatigue - c.recovery)
+                if t % 9 == 0:
+                    c.rest()
+        sched.settle()
+
+        assert sched.cell_steps == busy.sum(), "stepped cells that had nothing to do"
+        assert list(pop.times_rested) == [c.times_rested for c in cells], "rests differ"
+        assert list(pop.age) == [c.age for c in cells], "ages differ"
+        for i, c in enumerate(cells):
+            mine = pop.memories.cell_column(i, 'output')
+            theirs = c.memories.column('output')
+            if passive:  # lazy recovery is one subtraction instead of many
+                assert np.allclose(mine, theirs, rtol=0, atol=1e-12), f"cell {i} drifted"
+            else:
+                assert np.array_equal(mine, theirs), f"cell {i} remembers differently"
+        tol = 1e-12 if passive else 0
+        assert np.allclose(pop.fatigue, [c.fatigue for c in cells], rtol=0, atol=tol)
+
+    # queued events: quiet ticks are skipped, not stepped
+    sched = Scheduler(CellPopulation(1000, curiosity=0.5, sparse=True, max_memories=5))
+    sched.post([1, 2], [0.9, 0.9], at=10)
+    sched.post([2], [0.1], at=10)              # same tick: the later input wins
+    sched.post([500], 0.5, at=5000)
+    sched.run(until=10_000)
+    assert sched.now == 10_000 and sched.ticks_run == 2 and sched.cell_steps == 3
+    assert sched.population.last_input[2] == 0.1
+    assert sched.how_are_you(1)['tired'] == 0.0, "idle cell didn't recover"
+    print("  ✓ same lives as stepping everyone, quiet ticks cost nothing")
+    return True
+
+
+def test_instruments():
+    """do the counters count what the cells really did, without changing it?"""
+    print("\ntest 13: instruments...")
+    rng = np.random.default_rng(13)
+    n, steps = 40, 60
+    drive = rng.uniform(-1, 1, (steps, n))
+    params = dict(curiosity=0.7, max_memories=8, tiredness_gain=0.05)
+
+    plain = CellPopulation(n, **params)
+    pop = CellPopulation(n, **params)
+    assert pop.instruments is None
+    inst = pop.instrument()
+
+    novelty = np.zeros(n, dtype=np.int64)
+    saturations = np.zeros(n, dtype=np.int64)
+    for x in drive:
+        novelty += np.abs(x - pop.last_input) > pop.novelty_threshold
+        before = pop.fatigue.copy()
+        plain.feel(x)
+        pop.feel(x)
+        saturations += before + (np.abs(pop.activation) * pop.tiredness_gain + pop.tiredness_base) >= 1.0
+    assert np.array_equal(pop.activation, plain.activation), "counting changed the numbers"
+    assert np.array_equal(inst.novelty, novelty), "novelty miscounted"
+    assert np.array_equal(inst.saturations, saturations) and saturations.any(), "saturations miscounted"
+    assert (inst.evictions == steps - 8).all(), "evictions miscounted"
+    assert inst.phases['step'].n == steps and inst.phases['recording'].n == steps
+
+    # skipping settled steps counts as if they were lived
+    lived, skipped = CellPopulation(n, **params), CellPopulation(n, **params)
+    lived.instrument(), skipped.instrument()
+    for _ in range(500):
+        lived.feel(0.9)
+    skipped.advance_constant(0.9, 500)
+    assert lived.instruments.totals() == skipped.instruments.totals()
+
+    # sparse steps count only the cells that moved
+    sparse = CellPopulation(n, sparse=True, **params)
+    sparse.instrument()
+    for _ in range(10):
+        sparse.feel_some([3, 7], [0.9, -0.9])
+    assert sparse.instruments.evictions.sum() == 2 * 2 and sparse.instruments.novelty.sum() == 2
+    for _ in range(3):   # everyone, through feel(): only the full rings evict
+        sparse.feel(0.5)
+    assert sparse.instruments.evictions[[3, 7]].tolist() == [5, 5]
+    assert sparse.instruments.evictions.sum() == 10
+
+    totals = inst.totals()
+    text = inst.to_prometheus(labels={'run': 'test'})
+    assert f'cognicell_novelty_total{{run="test"}} {totals["novelty"]}' in text
+    assert 'cognicell_phase_seconds_count{run="test",phase="step"} 60' in text
+    assert json.loads(inst.to_json())['counters'] == totals
+    print(f"  ✓ {totals} match a hand count, exported as json and prometheus text")
+    return True
+
+
+def test_sharded_brain():
+    """do worker processes over shared memory tick exactly like one brain?"""
+    print("\ntest 14: sharded brain...")
+    rng = np.random.default_rng(14)
+    n = 2000
+    weights = small_world(n, 6, p=0.1, rng=14)
+    curiosity = rng.uniform(0.3, 0.9, n)
+    gain = rng.uniform(0.05, 0.15, n)
+    drive = rng.uniform(-1, 1, (25, n))
+    make = lambda: CellPopulation(n, curiosity=curiosity, max_memories=7, tiredness_gain=gain)
+
+    reference = Brain(make(), weights)
+    with ShardedBrain(make(), weights, workers=3) as brain:
+        assert len(brain.shards) == 3 and all(brain.halo_sizes), "small world has cross-shard friends"
+        for t in range(25):
+            assert np.array_equal(brain.tick(drive[t]), reference.tick(drive[t])), f"tick {t} differs"
+        brain.run(10, external=0.2)
+        reference.run(10, external=0.2)
+        assert not brain.population.fatigue.flags.owndata, "state isn't the shared blocks"
+    mine, theirs = brain.population, reference.population  # a private copy after close
+    for name in ('activation', 'fatigue', 'last_input', 'age', 'times_activated'):
+        assert np.array_equal(getattr(mine, name), getattr(theirs, name)), f"{name} differs"
+    assert np.array_equal(mine.memories.records, theirs.memories.records)
+    assert np.array_equal(mine.memories.recent_mean(), theirs.memories.recent_mean())
+    assert mine.ticks == theirs.ticks == 35
+
+    # what the workers can't share is refused, not silently dropped
+    for opt_in in (lambda pop: pop.memories.consolidate(), lambda pop: pop.index_memories()):
+        pop = make()
+        opt_in(pop)
+        try:
+            ShardedBrain(pop, weights, workers=2)
+            assert False, "sharded a population whose extras would be lost"
+        except ValueError:
+            pass
+    print(f"  ✓ 3 shards, halos of {brain.halo_sizes} cells, same 35 ticks as one brain")
+    return True
+
+
+def test_recall():
+    """does the index find the same nearest memories as reading them all?"""
+    print("\ntest 15: recall...")
+    rng = np.random.default_rng(15)
+    n = 300
+    pop = CellPopulation(n, curiosity=rng.uniform(0.3, 0.9, n), max_memories=20)
+    for _ in range(5):
+        pop.feel(rng.uniform(-1, 1, n))
+    index = pop.index_memories(bins=8)
+
+    queries = [(0.5, 0.3, 0.1), (0.9, None, None), (-0.4, 0.2, None), (3.0, -1.0, 1.0)]
+
+    def check(k):
+        for q in queries:
+            fast = pop.recall(*q, k=k)
+            slow = scan(pop.memories, *q, k=k)
+            for key in ('cell', 'time', 'distance'):
+                assert np.array_equal(fast[key], slow[key]), f"index and scan disagree on {q}"
+            assert np.all(np.diff(fast['distance']) >= 0), "not closest first"
+
+    check(7)
+    for _ in range(30):                      # laps the ring: evicted memories must vanish
+        pop.feel(rng.uniform(-1, 1, n))
+    check(7)
+    assert pop.recall(0.5, k=50)['time'].min() > pop.ticks - 20, "recalled a forgotten memory"
+    pop.advance_constant(0.25, 100)          # ring rewritten in one go
+    check(3)
+    hit = pop.recall(0.25, output=float(pop.activation[0]), k=1)
+    assert hit['distance'][0] == 0.0 and hit['time'][0] == pop.ticks
+    index.refit()
+    check(5)
+
+    # one lone cell remembers the same way as its column of the population
+    cell = cognicell(id=0, curiosity=0.6, quiet=True)
+    single = CellPopulation(1, curiosity=0.6, max_memories=100)
+    for x in rng.uniform(-1, 1, 150):
+        cell.feel(x)
+        single.feel(x)
+    mine = cell.recall(0.2, fatigue=0.05, k=4)
+    theirs = single.recall(0.2, fatigue=0.05, k=4, cells=[0])
+    assert [m['time'] for m in mine] == list(theirs['time'])
+    print("  ✓ index matches a full scan through evictions, repeats and refits")
+    return True
+
+
+def test_consolidation():
+    """do consolidated bands remember a long life the way the full history does?"""
+    print("\ntest 16: consolidation...")
+    rng = np.random.default_rng(16)
+    cell = cognicell(id=0, curiosity=0.6, quiet=True)
+    cell.memories.consolidate(unit=4)
+    history = []
+    for x in rng.uniform(-1, 1, 3000):
+        cell.feel(x)
+        history.append((x, cell.activation, cell.fatigue))
+    history = np.array(history)
+
+    whole = cell.memories.summary()
+    assert whole['count'] == 3000
+    assert np.isclose(whole['mean']['output'], history[:, 1].mean())
+    assert np.isclose(whole['var']['input'], history[:, 0].var())
+    bands = cell.memories.tiers.bands
+    assert len(bands) <= np.log2(2900 / 4) + 1, "bands aren't merging"
+    # a window ending on a band boundary is exact
+    edge = 100 + cell.memories.tiers.open.count + bands[-1].count
+    assert np.isclose(cell.memories.summary(edge)['mean']['fatigue'], history[-edge:, 2].mean())
+
+    # skipping settled steps consolidates the same as living them
+    pop = CellPopulation(3, curiosity=[0.3, 0.6, 0.9], max_memories=20)
+    stepped = CellPopulation(3, curiosity=[0.3, 0.6, 0.9], max_memories=20)
+    pop.memories.consolidate(unit=4)
+    stepped.memories.consolidate(unit=4)
+    cells = [cognicell(id=i, curiosity=q, quiet=True) for i, q in enumerate([0.3, 0.6, 0.9])]
+    for c in cells:
+        c.max_memories = 20
+        c.memories = MemoryRing(20)
+        c.memories.consolidate(unit=4)
+    for x in rng.uniform(-1, 1, (37, 3)):
+        pop.feel(x)
+        stepped.feel(x)
+        for c, v in zip(cells, x):
+            c.feel(v)
+    pop.advance_constant(0.4, 500)
+    for _ in range(500):
+        stepped.feel(np.full(3, 0.4))
+    for c in cells:
+        c.feel_constant(0.4, 500)
+
+    ours, theirs = pop.memories.summary(), stepped.memories.summary()
+    assert ours['count'] == theirs['count'] == 537
+    for field in ('input', 'output', 'fatigue'):
+        assert np.allclose(ours['mean'][field], theirs['mean'][field])
+        assert np.allclose(ours['var'][field], theirs['var'][field], atol=1e-12)
+    for i, c in enumerate(cells):
+        mine = c.memories.summary(300)
+        assert np.isclose(mine['mean']['output'], pop.memories.summary(300)['mean']['output'][i])
+    print(f"  ✓ 3000 steps in {len(bands)} bands + a ring; skipped steps fold like lived ones")
+    return True
+
+
+def test_replay():
+    """does a recorded run replay bit for bit, and does diverge() catch a change?"""
+    print("\ntest 17: replay...")
+    rng = np.random.default_rng(17)
+    n = 40
+    curiosity = rng.uniform(0.3, 0.9, n)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "run.rec")
+        pop = CellPopulation(n, curiosity=curiosity)
+        pop.record_inputs(path)
+        for _ in range(100):
+            pop.feel(rng.uniform(-1, 1, n))
+        pop.feel(0.3)
+        pop.advance_constant(0.5, 1000)          # one frame, not 1000
+        pop.rest(pop.fatigue > 0.5)
+        pop.rest()
+        pop.record_inputs(None)
+        assert sum(1 for _ in Recording(path)) == 104
+
+        again = CellPopulation(n, curiosity=curiosity)
+        assert replay(path, again) == pop.ticks
+        for name in ('activation', 'fatigue', 'age', 'times_rested'):
+            assert np.array_equal(getattr(again, name), getattr(pop, name)), f"{name} differs"
+        assert np.array_equal(again.memories.records, pop.memories.records)
+
+        # the scalar engine agrees with the vectorized one, column by column
+        cells = [cognicell(id=i, curiosity=c, quiet=True) for i, c in enumerate(curiosity)]
+        assert diverge(path, CellPopulation(n, curiosity=curiosity), cells) is None
+        one = cognicell(id=0, curiosity=curiosity[7], quiet=True)
+        assert diverge(path, CellPopulation(n, curiosity=curiosity), one, column=7) is None
+
+        # and a change in the last bits of one cell is found where it bites
+        nudged = curiosity.copy()
+        nudged[13] += 1e-9
+        found = diverge(path, CellPopulation(n, curiosity=curiosity),
+                        CellPopulation(n, curiosity=nudged))
+        assert found is not None and found.cell == 13 and found.field == 'activation'
+        assert diverge(path, CellPopulation(n, curiosity=curiosity),
+                       CellPopulation(n, curiosity=nudged), atol=1e-6) is None
+
+        # sparse steps, and a lone cell's own recording
+        sparse = CellPopulation(n, curiosity=curiosity, sparse=True)
+        sparse.record_inputs(path)
+        for _ in range(50):
+            sparse.feel_some(rng.choice(n, 5, replace=False), rng.uniform(-1, 1, 5))
+        sparse.record_inputs(None)
+        again = CellPopulation(n, curiosity=curiosity, sparse=True)
+        replay(path, again)
+        assert np.array_equal(again.memories.records, sparse.memories.records)
+
+        cell = cognicell(id=0, curiosity=0.5, quiet=True)
+        cell.record_inputs(path)
+        for x in rng.uniform(-1, 1, 30):
+            cell.feel(x)
+        cell.feel_constant(0.2, 500)
+        cell.rest()
+        cell.record_inputs(None)
+        twin = cognicell(id=0, curiosity=0.5, quiet=True)
+        replay(path, twin)
+        assert (twin.activation, twin.fatigue, twin.age) == (cell.activation, cell.fatigue, cell.age)
+        print(f"  ✓ {pop.ticks} steps replayed exactly; nudge found at frame {found.frame}, cell 13")
+    return True
+
+
+def test_feel_sequence():
+    """does one fused call over a whole schedule end exactly where feel() row by row does?"""
+    print("\ntest 18: feel_sequence...")
+    rng = np.random.default_rng(18)
+    n = 500
+    curiosity = rng.uniform(0.3, 0.9, n)
+    schedule = rng.uniform(-1, 1, (137, n))
+    for kw in ({}, {'max_memories': 10, 'track_stats': True}, {'sparse': True}):
+        fused = CellPopulation(n, curiosity=curiosity, **kw)
+        stepped = CellPopulation(n, curiosity=curiosity, **kw)
+        fused.instrument()
+        stepped.instrument()
+        out = fused.feel_sequence(schedule, reduce=('activation.mean', 'fatigue.max'), block=128)
+        activations, fatigues = [], []
+        for row in schedule:
+            activations.append(stepped.feel(row).copy())
+            fatigues.append(stepped.fatigue.copy())
+
+        assert np.array_equal(out['activation'], activations), f"activations differ ({kw})"
+        assert np.array_equal(out['fatigue'], fatigues)
+        assert np.allclose(out['activation.mean'], np.mean(activations, axis=0))
+        assert np.array_equal(out['fatigue.max'], np.max(fatigues, axis=0))
+        for name in ('activation', 'fatigue', 'last_input', 'age', 'times_activated'):
+            assert np.array_equal(getattr(fused, name), getattr(stepped, name)), f"{name} differs"
+        assert fused.ticks == stepped.ticks
+        assert np.array_equal(fused.memories.records, stepped.memories.records), "memories differ"
+        assert np.array_equal(fused.status_arrays()['avg_feeling'],
+                              stepped.status_arrays()['avg_feeling']), "avg_feeling differs"
+        assert fused.how_are_you(7) == stepped.how_are_you(7)
+        assert fused.instruments.totals() == stepped.instruments.totals()
+        if kw.get('track_stats'):
+            assert np.array_equal(fused.stats.mean, stepped.stats.mean)
+
+    # the kernel writes the ring itself: clock stamps and a recall index too
+    fused = CellPopulation(n, curiosity=curiosity, clock=TickClock(5))
+    stepped = CellPopulation(n, curiosity=curiosity, clock=TickClock(5))
+    fused.index_memories()
+    stepped.index_memories()
+    fused.feel_sequence(schedule, trace=(), block=64)
+    for row in schedule:
+        stepped.feel(row)
+    assert np.array_equal(fused.memories.records, stepped.memories.records), "stamps differ"
+    assert fused.memories.head == stepped.memories.head
+    assert np.array_equal(fused.memories.index.order, stepped.memories.index.order)
+    found, expected = fused.recall(0.2, 0.1), stepped.recall(0.2, 0.1)
+    assert all(np.array_equal(found[key], expected[key]) for key in expected), "recall differs"
+
+    # one value per step for everyone, reductions only, consolidated memories
+    fused = CellPopulation(n, curiosity=curiosity, max_memories=20)
+    fused.memories.consolidate(unit=4)
+    levels = np.linspace(-1, 1, 300)
+    assert fused.feel_sequence(levels, trace=()) == {}
+    cell = cognicell(id=0, curiosity=curiosity[0], quiet=True)
+    cell.memories = MemoryRing(20)
+    cell.memories.consolidate(unit=4)
+    for x in levels:
+        cell.feel(x)
+    assert (cell.activation, cell.fatigue) == (fused.activation[0], fused.fatigue[0])
+    assert cell.memories.recent_mean() == fused.memories.recent_mean()[0]
+    assert np.isclose(cell.memories.summary()['mean']['output'],
+                      fused.memories.summary()['mean']['output'][0])
+    print(f"  ✓ {len(schedule)} steps in one call match feel() bit for bit")
+    return True
+
+
+def test_window_sum():
+    """do appends, repeats and many-step writes all keep the same running window sum?"""
+    print("\ntest 19: running window sums...")
+    rng = np.random.default_rng(19)
+    for capacity, window in ((100, 10), (10, 10), (25, 10), (7, 3), (1, 1)):
+        outputs = np.tanh(rng.normal(0, 1, (180, 3)))
+        ring, twin = MemoryRing(capacity, window), MemoryRing(capacity, window)
+        stepped = [MemoryBank(3, capacity, window), SparseMemoryBank(3, capacity, window)]
+        landed = [MemoryBank(3, capacity, window), SparseMemoryBank(3, capacity, window)]
+        at = 0
+        for size in (1, 5, 13, 2, 40, 36, 3, 80):
+            chunk = outputs[at:at + size]
+            at += size
+            for row in chunk:
+                ring.append(0.0, row[0], 0.0, 0.0)
+                twin.append(0.0, row[0], 0.0, 0.0)
+                for bank in stepped:
+                    bank.append(row, row, row, 0.0)
+            for bank in landed:
+                bank.extend(chunk, chunk, chunk, 0.0)
+            # the same value k times: repeat() or k appends
+            k = min(size, capacity)
+            ring.repeat(0.0, chunk[-1, 0], 0.0, 0.0, k)
+            for _ in range(k):
+                twin.append(0.0, chunk[-1, 0], 0.0, 0.0)
+                for bank in stepped:
+                    bank.append(chunk[-1], chunk[-1], chunk[-1], 0.0)
+            landed[0].repeat(chunk[-1], chunk[-1], chunk[-1], 0.0, k)
+            landed[1].repeat(chunk[-1], chunk[-1], chunk[-1], 0.0, k)
+
+            assert ring.window_sum == twin.window_sum, f"{capacity}/{window}: repeat differs"
+            for bank in stepped + landed:
+                assert np.array_equal(bank.window_sum, stepped[0].window_sum), \
+                    f"{capacity}/{window}: {type(bank).__name__} differs after {at} steps"
+            assert ring.window_sum == stepped[0].window_sum[0], f"{capacity}/{window}: ring vs bank"
+            fresh = ring.column('output')[-ring.window:].mean()
+            assert abs(ring.recent_mean() - fresh) < 1e-12, "running sum drifted"
+
+        # sparse cells at different heads, then everyone lands many steps at once
+        stepped, landed = SparseMemoryBank(3, capacity, window), SparseMemoryBank(3, capacity, window)
+        for j, row in enumerate(outputs[:23]):
+            cells = np.arange(3)[np.arange(3) <= j % 3]
+            for bank in (stepped, landed):
+                bank.append_some(cells, row[cells], row[cells], row[cells], 0.0)
+        for size in (4, 17):
+            chunk = outputs[23:23 + size]
+            for row in chunk:
+                stepped.append(row, row, row, 0.0)
+            landed.extend(chunk, chunk, chunk, 0.0)
+            assert np.array_equal(landed.window_sum, stepped.window_sum), \
+                f"{capacity}/{window}: staggered sparse differs"
+    print("  ✓ rings, dense and sparse banks agree bit for bit, however the steps land")
+    return True
+
+
+def run_all_tests():
+    """run the full test suite."""
+    print("=" * 50)
+    print("testing CellPopulation...")
+    print("=" * 50)
+
+    tests = [
+        test_matches_cells,
+        test_from_cells,
+        test_population_memory,
+        test_advance_constant,
+        test_brain_matches_friends,
+        test_topologies,
+        test_parameters,
+        test_sweep,
+        test_status_arrays,
+        test_trace_roundtrip,
+        test_checkpoint_resume,
+        test_scheduler,
+        test_instruments,
+        test_sharded_brain,
+        test_recall,
+        test_consolidation,
+        test_replay,
+        test_feel_sequence,
+        test_window_sum,
+    ]
+
+    passed = 0
+    results = []
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+                results.append((test.__name__, "✓ PASS"))
+        except AssertionError as e:
+            results.append((test.__name__, f"✗ FAIL: {e}"))
+        except Exception as e:
+            results.append((test.__name__, f"💥 ERROR: {e}"))
+
+    for name, status in results:
+        print(f"{name:20} {status}")
+
+    print("\n" + "=" * 50)
+    print(f"summary: {passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
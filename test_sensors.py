@@ -0,0 +1,190 @@
+"""
+test_sensors.py
+tests that prove live readings get to the right cells, and that a slow
+step slows the sources down instead of eating memory.
+"""
+import sys
+import os
+import asyncio
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(__file__))
+
+import numpy as np
+
+from population import CellPopulation
+from scheduler import Scheduler
+from sensors import SensorPipeline, file_source, rate_source, socket_source
+
+
+class SlowPipeline(SensorPipeline):
+    """a pipeline whose step takes a while, like a big population would."""
+
+    def _step(self, cells, values):
+        time.sleep(0.005)
+        return super()._step(cells, values)
+
+
+def test_readings_reach_cells():
+    """does every reading arrive, and does each cell end on its last one?"""
+    print("test 1: readings reach cells...")
+    pop = CellPopulation(1000, curiosity=0.5, sparse=True)
+    signal = lambda t, which: which / 1000.0
+    pipe = SensorPipeline(pop, tick=0.002)
+    pipe.add_source(rate_source(np.arange(0, 1000, 10), rate=20_000, count=2000, signal=signal))
+    metrics = asyncio.run(pipe.run())
+
+    assert metrics['readings'] == 2000 and metrics['dropped'] == 0
+    fed = np.arange(0, 1000, 10)
+    assert np.allclose(pop.last_input[fed], fed / 1000.0), "cells didn't end on their input"
+    untouched = np.setdiff1d(np.arange(1000), fed)
+    assert (pop.age[untouched] == 0).all(), "cells without readings were stepped"
+    assert pop.age[fed].sum() == metrics['cell_steps']
+    assert metrics['latency_p99_ms'] < 1000
+    print(f"  ✓ {metrics['readings']} readings in {metrics['ticks']} ticks, "
+          f"{metrics['readings_per_s']:.0f}/s, p99 {metrics['latency_p99_ms']:.1f} ms")
+
+    return True
+
+
+def test_backpressure():
+    """with a slow step, do sources wait (or get dropped) instead of piling up?"""
+    print("\ntest 2: backpressure...")
+    pop = CellPopulation(100, curiosity=0.5, sparse=True)
+    pipe = SlowPipeline(pop, tick=0, queue_size=4)
+    pipe.add_source(rate_source(np.arange(100), rate=1e6, count=5000, chunk=10))
+    blocked = asyncio.run(pipe.run())
+    assert blocked['queue_high_water'] <= 4
+    assert blocked['readings'] == 5000 and blocked['dropped'] == 0, "block mode lost readings"
+
+    pop = CellPopulation(100, curiosity=0.5, sparse=True)
+    pipe = SlowPipeline(pop, tick=0, queue_size=4, overflow='drop')
+    pipe.add_source(rate_source(np.arange(100), rate=1e6, count=5000, chunk=10))
+    dropping = asyncio.run(pipe.run())
+    assert dropping['dropped'] > 0, "nothing dropped with a tiny queue"
+    assert dropping['readings'] + dropping['dropped'] == 5000, "readings went missing uncounted"
+    print(f"  ✓ block: queue never above {blocked['queue_high_water']}; "
+          f"drop: {dropping['dropped']} of 5000 dropped")
+
+    return True
+
+
+def test_dense_and_scheduler_targets():
+    """do dense populations hold inputs, and do schedulers get ticked?"""
+    print("\ntest 3: dense and scheduler targets...")
+    pop = CellPopulation(10, curiosity=0.5)
+    pop.last_input[:] = 0.25
+    pipe = SensorPipeline(pop, tick=0.001)
+    pipe.add_source(rate_source([3], rate=1000, count=1, signal=lambda t, c: np.array([0.9])))
+    asyncio.run(pipe.run())
+    assert pop.last_input[3] == 0.9
+    assert (np.delete(pop.last_input, 3) == 0.25).all(), "other cells lost their input"
+    assert (pop.age == pop.ticks).all(), "dense step skipped cells"
+
+    sched = Scheduler(CellPopulation(50, curiosity=0.5, sparse=True))
+    pipe = SensorPipeline(sched, tick=0.001)
+    pipe.add_source(rate_source([1, 2], rate=10_000, count=20))
+    metrics = asyncio.run(pipe.run())
+    assert sched.ticks_run == metrics['ticks'] and sched.cell_steps == metrics['cell_steps']
+    print(f"  ✓ dense held 9 inputs, scheduler ran {sched.ticks_run} ticks")
+
+    return True
+
+
+def test_file_and_socket_sources():
+    """do the file and tcp stand-ins for a device deliver the same readings?"""
+    print("\ntest 4: file and socket sources...")
+    lines = [f"{i % 7} {i / 100}\n" for i in range(50)]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "stream.txt")
+        with open(path, "w") as f:
+            f.writelines(lines)
+        pop = CellPopulation(7, curiosity=0.5, sparse=True)
+        pipe = SensorPipeline(pop, tick=0.001)
+        pipe.add_source(file_source(path, block=8))
+        from_file = asyncio.run(pipe.run())
+    assert from_file['readings'] == 50
+    expected = pop.last_input.copy()
+
+    async def over_tcp():
+        pop = CellPopulation(7, curiosity=0.5, sparse=True)
+        pipe = SensorPipeline(pop, tick=0.001)
+        ready = asyncio.get_running_loop().create_future()
+        pipe.add_source(socket_source(ready=ready))
+        running = asyncio.ensure_future(pipe.run())
+        host, port = await ready
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write("".join(lines).encode())
+        await writer.drain()
+        writer.close()
+        await writer.wait_closed()
+        return pop, await running
+
+    pop, from_socket = asyncio.run(over_tcp())
+    assert from_socket['readings'] == 50
+    assert np.array_equal(pop.last_input, expected), "socket and file disagree"
+    print("  ✓ 50 readings from a file and over tcp, same final inputs")
+
+    return True
+
+
+def test_duration_with_silent_source():
+    """does run(duration=) end on time when a source never says anything?"""
+    print("\ntest 5: duration with a silent source...")
+
+    async def silent():
+        await asyncio.Event().wait()   # a stalled device
+        yield [0], [0.0]
+
+    for max_batch in (None, 8):
+        pipe = SensorPipeline(CellPopulation(5, curiosity=0.5, sparse=True),
+                              tick=0.01, max_batch=max_batch)
+        pipe.add_source(silent())
+        started = time.perf_counter()
+        metrics = asyncio.run(asyncio.wait_for(pipe.run(duration=0.2), timeout=5))
+        took = time.perf_counter() - started
+        assert metrics['readings'] == 0 and metrics['ticks'] == 0
+        assert took < 1.0, f"run(duration=0.2) took {took:.2f} s"
+    print(f"  ✓ stopped after {took:.2f} s with nothing to read")
+
+    return True
+
+
+def run_all_tests():
+    """run the full test suite."""
+    print("=" * 50)
+    print("testing the sensor pipeline...")
+    print("=" * 50)
+
+    tests = [
+        test_readings_reach_cells,
+        test_backpressure,
+        test_dense_and_scheduler_targets,
+        test_file_and_socket_sources,
+        test_duration_with_silent_source,
+    ]
+
+    passed = 0
+    results = []
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+                results.append((test.__name__, "✓ PASS"))
+        except AssertionError as e:
+            results.append((test.__name__, f"✗ FAIL: {e}"))
+        except Exception as e:
+            results.append((test.__name__, f"💥 ERROR: {e}"))
+
+    for name, status in results:
+        print(f"{name:34} {status}")
+
+    print("\n" + "=" * 50)
+    print(f"summary: {passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
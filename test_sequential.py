@@ -0,0 +1,151 @@
+"""
+test_sequential.py
+tests that prove stopping early doesn't cheat.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+
+import numpy as np
+
+from online_stats import Moments
+from sequential import GroupSequentialTest, SPRT, paired_t, plan_trials, t_pvalue
+
+
+def _moments(xs):
+    m = Moments()
+    m.update_many(xs)
+    return m
+
+
+def test_paired_t_matches_scipy():
+    """is the streamed paired t-test the same as scipy's?"""
+    print("test 1: paired t-test...")
+    # student's t, not the normal: small df must give honest (bigger) p-values.
+    # reference values from scipy.stats.t.sf
+    for t, df, expected in ((2.5, 4, 0.06676654481198814), (2.3, 9, 0.04699938892186315),
+                            (10.0, 3, 0.0021283990584141503), (0.5, 30, 0.6207230048851272)):
+        assert np.isclose(t_pvalue(t, df), expected, rtol=1e-10), f"t={t}, df={df}"
+        assert t_pvalue(-t, df) == t_pvalue(t, df)
+    assert paired_t(_moments([0.5, 0.5, 0.5]))[1] == 0.0, "no spread, real effect -> p = 0"
+
+    try:
+        from scipy import stats
+    except ImportError:
+        print("  ✓ p-values match student's t (scipy not installed, skipped ttest_rel)")
+        return True
+    rng = np.random.default_rng(1)
+    low = rng.normal(0.6, 0.05, 30)
+    high = low + rng.normal(0.02, 0.05, 30)
+
+    t, p = paired_t(_moments(high - low))
+    ref = stats.ttest_rel(high, low)
+    assert np.isclose(t, ref.statistic, rtol=1e-10), f"t off: {t} vs {ref.statistic}"
+    assert np.isclose(p, ref.pvalue, rtol=1e-8), f"p off: {p} vs {ref.pvalue}"
+    print(f"  ✓ t={t:.3f}, p={p:.4f} like scipy.stats.ttest_rel")
+
+    return True
+
+
+def test_group_sequential_keeps_alpha():
+    """with no effect at all, does peeking 5 times still reject <= 5% of the time?"""
+    print("\ntest 2: group sequential under the null...")
+    rng = np.random.default_rng(2)
+    runs, rejected = 400, 0
+    for _ in range(runs):
+        test = GroupSequentialTest(alpha=0.05, looks=5, max_trials=50)
+        while test.decision is None:
+            test.update(rng.normal(0, 1, test.next_batch()))
+        rejected += test.decision == 'effect'
+        assert test.decision != 'effect' or test.p_adjusted <= 0.05
+    rate = rejected / runs
+    assert rate <= 0.05 + 0.02, f"false alarms: {rate:.3f}"
+    print(f"  ✓ false alarm rate {rate:.3f} at alpha 0.05")
+
+    return True
+
+
+def test_group_sequential_stops_early():
+    """with a clear effect, does it stop well before the cap?"""
+    print("\ntest 3: group sequential with an effect...")
+    rng = np.random.default_rng(3)
+    cap = plan_trials(0.3, alpha=0.05, power=0.8, looks=5)
+    trials = []
+    for _ in range(100):
+        test = GroupSequentialTest(alpha=0.05, looks=5, max_trials=cap)
+        while test.decision is None:
+            test.update(rng.normal(1.0, 1, test.next_batch()))
+        assert test.decision == 'effect', "missed a 1-sd effect"
+        trials.append(test.result()['trials'])
+    assert np.mean(trials) < cap / 3, f"barely saved anything: {np.mean(trials)} of {cap}"
+    print(f"  ✓ {np.mean(trials):.1f} trials on average instead of {cap}")
+
+    return True
+
+
+def test_sprt():
+    """does the sprt keep alpha under the null and catch a real effect fast?"""
+    print("\ntest 4: sprt...")
+    rng = np.random.default_rng(4)
+
+    false_alarms = 0
+    for _ in range(400):
+        test = SPRT(alpha=0.05, power=0.8, p0=0.5, p1=0.75, max_trials=500)
+        while test.decision is None:
+            test.update(rng.random(10) < 0.5)
+        false_alarms += test.decision == 'effect'
+    assert false_alarms / 400 <= 0.05, f"false alarms: {false_alarms / 400:.3f}"
+
+    caught, lengths = 0, []
+    for _ in range(200):
+        test = SPRT(alpha=0.05, power=0.8, p0=0.5, p1=0.75, max_trials=500)
+        while test.decision is None:
+            test.update(rng.random(10) < 0.9)
+        if test.decision == 'effect':
+            assert test.p <= 0.05, "effect declared without p <= alpha"
+            caught += 1
+        lengths.append(test.trials)
+    assert caught / 200 >= 0.8, f"power too low: {caught / 200:.2f}"
+    print(f"  ✓ {false_alarms / 400:.3f} false alarms, caught {caught / 200:.0%} "
+          f"in {np.mean(lengths):.1f} trials on average")
+
+    return True
+
+
+def run_all_tests():
+    """run the full test suite."""
+    print("=" * 50)
+    print("testing sequential tests...")
+    print("=" * 50)
+
+    tests = [
+        test_paired_t_matches_scipy,
+        test_group_sequential_keeps_alpha,
+        test_group_sequential_stops_early,
+        test_sprt,
+    ]
+
+    passed = 0
+    results = []
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+                results.append((test.__name__, "✓ PASS"))
+        except AssertionError as e:
+            results.append((test.__name__, f"✗ FAIL: {e}"))
+        except Exception as e:
+            results.append((test.__name__, f"💥 ERROR: {e}"))
+
+    for name, status in results:
+        print(f"{name:34} {status}")
+
+    print("\n" + "=" * 50)
+    print(f"summary: {passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,181 @@
+"""
+tiers.py
+forgetting the details, not the life.
+
+a memory ring keeps the last `capacity` moments exactly and, until now,
+threw the rest away. MemoryTiers catches what falls out of the ring and
+folds it into summary bands - count, mean and variance of input, output
+and fatigue - that get coarser the older they are:
+
+    ring (exact)      last 100 memories
+    open band         the next-oldest, still filling up (< unit memories)
+    bands             unit, 2 unit, 4 unit, ... memories each, newest
+                      smallest - a binary counter: two bands of the same
+                      size merge (chan et al) into one of twice the size
+
+so a cell that has lived a million steps keeps its 100 memories plus at
+most log2(age / unit) + 1 bands, ~48 bytes each. "how have i felt over
+the last 10k steps" reads the ring, then whole bands newest first; the
+band the window ends inside counts pro rata (its mean, scaled), so
+windows are exact on band boundaries and close everywhere else.
+
+for a population every cell forgets at the same moment, so all cells
+share one band layout and each band holds (3, n) arrays.
+
+    cell.memories.consolidate()          # or pop.memories.consolidate()
+    ...live a long life...
+    cell.memories.summary(10_000)        # {'count', 'mean': {...}, 'var': {...}}
+"""
+
+import numpy as np
+
+
+FIELDS = ('input', 'output', 'fatigue')
+
+
+class Band:
+    """count, mean and m2 (per field, per cell) of `count` consecutive memories."""
+
+    __slots__ = ('count', 'mean', 'm2')
+
+    def __init__(self, count, mean, m2):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    def merge(self, other):
+        """fold another band into this one. returns self."""
+        if not other.count:
+            return self
+        n = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * (other.count / n)
+        self.m2 = self.m2 + other.m2 + delta * delta * (self.count * other.count / n)
+        self.count = n
+        return self
+
+    def part(self, k):
+        """k of these memories, assumed typical of the band (k <= count)."""
+        return Band(k, self.mean, self.m2 * (k / self.count))
+
+    def __repr__(self):
+        return f"Band({self.count} memories)"
+
+
+class MemoryTiers:
+    """the consolidated past of one cell (n=None) or of n cells in lockstep."""
+
+    def __init__(self, n=None, unit=16):
+        """
+        n: cells sharing the layout (None = one cell, plain per-field values)
+        unit: memories in the smallest band. smaller = finer recent
+              history, a few more bands
+        """
+        self.n = n
+        self.unit = int(unit)
+        self.shape = (3,) if n is None else (3, n)
+        self.bands = []       # oldest (biggest) first
+        self.folded = 0       # memories consolidated so far
+        self._reset_open()
+
+    def _reset_open(self):
+        self.open = Band(0, np.zeros(self.shape), np.zeros(self.shape))
+
+    def fold(self, inputs, outputs, fatigue):
+        """one memory (per cell) just fell out of the ring."""
+        band = self.open
+        band.count += 1
+        mean, m2 = band.mean, band.m2
+        for f, x in enumerate((inputs, outputs, fatigue)):
+            delta = x - mean[f]
+            mean[f] += delta / band.count
+            m2[f] += delta * (x - mean[f])
+        self.folded += 1
+        if band.count == self.unit:
+            self._push(band)
+            self._reset_open()
+
+    def fold_constant(self, inputs, outputs, fatigue, k):
+        """
+        k identical memories in a row (a settled cell's skipped steps),
+        in O(log k) instead of k folds.
+        """
+        k = int(k)
+        if k <= 0:
+            return
+        value = np.empty(self.shape)
+        value[0], value[1], value[2] = inputs, outputs, fatigue
+        constant = lambda count: Band(count, value.copy(), np.zeros(self.shape))
+        self.folded += k
+
+        # top up the open band
+        take = min(k, self.unit - self.open.count)
+        if take:
+            self.open.merge(constant(take))
+        k -= take
+        if self.open.count == self.unit:
+            self._push(self.open)
+            self._reset_open()
+
+        # whole bands, as big as alignment allows: a new band can't be
+        # bigger than the newest one, or the counter stops being binary
+        units, rest = divmod(k, self.unit)
+        while units:
+            room = self.bands[-1].count // self.unit if self.bands else units
+            size = 1 << (min(units, room).bit_length() - 1)
+            self._push(constant(size * self.unit))
+            units -= size
+        if rest:
+            self.open.merge(constant(rest))
+
+    def _push(self, band):
+        """add a full band, then carry: equal neighbours merge."""
+        self.bands.append(band)
+        while len(self.bands) > 1 and self.bands[-1].count == self.bands[-2].count:
+            newer = self.bands.pop()
+            self.bands[-1].merge(newer)
+
+    def recent(self, k):
+        """
+        the newest k consolidated memories as one Band (fewer if there
+        aren't that many). a band cut by the window counts pro rata.
+        """
+        total = Band(0, np.zeros(self.shape), np.zeros(self.shape))
+        for band in [self.open] + self.bands[::-1]:
+            if k <= 0:
+                break
+            if band.count:
+                take = min(k, band.count)
+                total.merge(band if take == band.count else band.part(take))
+                k -= take
+        return total
+
+    @property
+    def nbytes(self):
+        """what the consolidated past costs (all cells)."""
+        return sum(b.mean.nbytes + b.m2.nbytes for b in self.bands + [self.open])
+
+    def __repr__(self):
+        return f"MemoryTiers({self.folded} folded into {len(self.bands)} bands + {self.open.count} open)"
+
+
+def summarize(band):
+    """a Band as {'count', 'mean': {field: ...}, 'var': {field: ...}} (population variance)."""
+    var = band.m2 / band.count if band.count else np.zeros_like(band.m2)
+    mean = band.mean if band.count else np.zeros_like(band.mean)
+    return {
+        'count': band.count,
+        'mean': {name: mean[f] for f, name in enumerate(FIELDS)},
+        'var': {name: var[f] for f, name in enumerate(FIELDS)},
+    }
+
+
+def exact(records):
+    """ring memories (oldest first along axis 0) as one Band."""
+    count = len(records)
+    shape = (3,) + records.shape[1:]
+    if not count:
+        return Band(0, np.zeros(shape), np.zeros(shape))
+    mean = np.stack([records[name].mean(axis=0) for name in FIELDS])
+    m2 = np.stack([((records[name] - mean[f]) ** 2).sum(axis=0) for f, name in enumerate(FIELDS)])
+    return Band(count, mean, m2)
@@ -0,0 +1,243 @@
+"""
+traces.py
+a cell's whole life on disk, not just its last 100 memories.
+
+the recorder collects (tick, cell, input, output, fatigue) rows into
+fixed-size columnar blocks and a background thread writes each full block
+as a set of .npy files (one per column). the reader memory-maps those
+files, so a run far bigger than ram can be sliced by tick or by cell
+without loading it.
+
+layout of a trace directory:
+    trace.json                 - manifest: columns, dtypes, segments, rows
+    seg_000000.tick.npy        - one file per column per segment
+    seg_000000.cell.npy
+    ...
+"""
+
+import json
+import os
+import queue
+import threading
+
+import numpy as np
+
+
+TRACE_COLUMNS = (
+    ('tick', np.int64),
+    ('cell', np.int64),
+    ('input', np.float64),
+    ('output', np.float64),
+    ('fatigue', np.float64),
+)
+
+MANIFEST = 'trace.json'
+
+
+class TraceRecorder:
+    """
+    streams rows to disk in the background.
+
+    memory is bounded: one block being filled plus at most `max_pending`
+    full blocks waiting for the writer. the simulation only ever waits if
+    the disk falls that far behind.
+
+        with TraceRecorder('run_01') as rec:
+            for t in range(10_000):
+                x = drive[t]
+                pop.feel(x)
+                rec.record_population(pop, x)
+    """
+
+    def __init__(self, directory, block_rows=1 << 20, max_pending=4):
+        """
+        directory: where the trace goes (created if missing)
+        block_rows: rows per segment
+        max_pending: full blocks allowed to queue up for the writer
+        """
+        self.directory = directory
+        self.block_rows = int(block_rows)
+        os.makedirs(directory, exist_ok=True)
+
+        self.segments = []   # (name, rows), filled in by the writer
+        self.rows = 0        # rows handed to record()
+        self.error = None    # set if the writer thread died
+
+        # blocks get recycled so a long run doesn't keep allocating
+        self._free = queue.Queue()
+        for _ in range(max_pending + 1):
+            self._free.put(self._new_block())
+        self._pending = queue.Queue(maxsize=max_pending)
+
+        self._block = self._free.get()
+        self._fill = 0
+        self._closed = False
+
+        self._writer = threading.Thread(target=self._write_loop, name='trace-writer', daemon=True)
+        self._writer.start()
+        self._write_manifest([])
+
+    def _new_block(self):
+        return {name: np.empty(self.block_rows, dtype=dtype) for name, dtype in TRACE_COLUMNS}
+
+    def record(self, tick, cells, inputs, outputs, fatigue):
+        """
+        add one batch of rows. tick can be one value for the batch;
+        cells/inputs/outputs/fatigue are arrays of the same length.
+        """
+        if self._closed:
+            raise ValueError("recorder is closed")
+        if self.error is not None:
+            raise RuntimeError("trace writer failed") from self.error
+
+        columns = {'cell': cells, 'input': inputs, 'output': outputs, 'fatigue': fatigue}
+        n = len(cells)
+        done = 0
+        while done < n:
+            take = min(n - done, self.block_rows - self._fill)
+            lo, hi = self._fill, self._fill + take
+            self._block['tick'][lo:hi] = tick
+            for name, values in columns.items():
+                self._block[name][lo:hi] = values[done:done + take]
+            self._fill = hi
+            done += take
+            if self._fill == self.block_rows:
+                self._hand_off()
+
+        self.rows += n
+
+    def record_population(self, population, inputs):
+        """record the step a CellPopulation just took (call right after feel)."""
+        inputs = np.broadcast_to(inputs, (population.n,))
+        self.record(population.ticks, population.ids, inputs,
+                    population.activation, population.fatigue)
+
+    def _hand_off(self):
+        """give the current block to the writer and start a fresh one."""
+        if self._fill:
+            self._pending.put((self._block, self._fill))
+            self._block = self._free.get()
+            self._fill = 0
+
+    def _write_loop(self):
+        while True:
+            item = self._pending.get()
+            if item is None:
+                self._pending.task_done()
+                return
+            block, rows = item
+            try:
+                name = f"seg_{len(self.segments):06d}"
+                for column, _ in TRACE_COLUMNS:
+                    np.save(os.path.join(self.directory, f"{name}.{column}.npy"), block[column][:rows])
+                self.segments.append((name, rows))
+                self._write_manifest(self.segments)
+            except Exception as e:  # keep draining so record() can't deadlock
+                self.error = e
+            finally:
+                self._free.put(block)
+                self._pending.task_done()
+
+    def _write_manifest(self, segments):
+        """rewrite trace.json atomically - readable even if the run dies."""
+        manifest = {
+            'format': 'cognicell-trace',
+            'version': 1,
+            'columns': [[name, np.dtype(dtype).str] for name, dtype in TRACE_COLUMNS],
+            'segments': [{'name': name, 'rows': rows} for name, rows in segments],
+            'rows': sum(rows for _, rows in segments),
+        }
+        path = os.path.join(self.directory, MANIFEST)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(path + '.tmp', path)
+
+    def flush(self):
+        """push the partly-filled block out and wait for everything to hit disk."""
+        self._hand_off()
+        self._pending.join()
+        if self.error is not None:
+            raise RuntimeError("trace writer failed") from self.error
+
+    def close(self):
+        """finish writing and stop the background thread."""
+        if self._closed:
+            return
+        self._hand_off()
+        self._pending.put(None)
+        self._writer.join()
+        self._closed = True
+        if self.error is not None:
+            raise RuntimeError("trace writer failed") from self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TraceReader:
+    """
+    reads a trace directory without loading it.
+
+    every column of every segment is memory-mapped; only the pages you
+    actually slice get read from disk.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, MANIFEST)) as f:
+            self.manifest = json.load(f)
+        self.columns = [name for name, _ in self.manifest['columns']]
+        self._segments = [s['name'] for s in self.manifest['segments']]
+        self._maps = {}
+
+    def __len__(self):
+        return self.manifest['rows']
+
+    def segment(self, i):
+        """segment i as {column: read-only memmap}."""
+        if i not in self._maps:
+            name = self._segments[i]
+            self._maps[i] = {c: np.load(os.path.join(self.directory, f"{name}.{c}.npy"), mmap_mode='r')
+                             for c in self.columns}
+        return self._maps[i]
+
+    def segments(self):
+        """every segment in order, as {column: memmap}."""
+        for i in range(len(self._segments)):
+            yield self.segment(i)
+
+    def column(self, name):
+        """one whole column, concatenated (this one does load it)."""
+        parts = [seg[name] for seg in self.segments()]
+        if not parts:
+            return np.empty(0, dtype=dict(self.manifest['columns'])[name])
+        return np.concatenate(parts)
+
+    def ticks(self, start, stop):
+        """
+        every row with start <= tick < stop, as {column: array}.
+
+        ticks only go up, so each segment is cut with a binary search on
+        its tick column - only the matching pages get touched.
+        """
+        out = {c: [] for c in self.columns}
+        for seg in self.segments():
+            tick = seg['tick']
+            if not len(tick) or tick[-1] < start or tick[0] >= stop:
+                continue
+            lo, hi = np.searchsorted(tick, [start, stop])
+            for c in self.columns:
+                out[c].append(np.asarray(seg[c][lo:hi]))
+        return {c: np.concatenate(v) if v else np.empty(0) for c, v in out.items()}
+
+    def cell(self, cell_id):
+        """one cell's whole recorded life, as {column: array}, in tick order."""
+        out = {c: [] for c in self.columns}
+        for seg in self.segments():
+            rows = np.flatnonzero(seg['cell'] == cell_id)
+            for c in self.columns:
+                out[c].append(seg[c][rows])
+        return {c: np.concatenate(v) if v else np.empty(0) for c, v in out.items()}